@@ -0,0 +1,253 @@
+"""jobs queue with leases
+
+Revision ID: 7c1e4a9b2d30
+Revises: cff9f7b10170
+Create Date: 2026-10-18 15:10:00.000000
+
+Приводит схему к моделям Project/Job: старые таблицы projects и
+generation_jobs (integer id, title/tech_stack) заменяются таблицами
+с UUID-ключами. Таблица jobs получает поля аренды для очереди заданий.
+
+Строки старых таблиц переносятся: UUID строится из старого id
+(md5 от имени таблицы и id), поэтому задания находят свои проекты.
+projects.user_id здесь ещё UUID (как в модели этой ревизии), поэтому
+владельцы старых проектов откладываются в legacy_project_owners и
+возвращаются ревизией c7a1e5d93f28. Генерации n8n новым воркером не
+продолжить: незавершённые проекты переносятся как FAILED (их можно
+перезапустить через /generate/retry), незавершённые задания — как
+CANCELLED. Откат переносит данные только в пустую схему.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "7c1e4a9b2d30"
+down_revision: Union[str, Sequence[str], None] = "cff9f7b10170"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PROJECT_STATUS = (
+    "PENDING",
+    "GENERATING",
+    "REVIEWING",
+    "READY",
+    "DEPLOYING",
+    "DEPLOYED",
+    "FAILED",
+)
+JOB_TYPE = (
+    "FRONTEND_GENERATION",
+    "DESIGN_GENERATION",
+    "BACKEND_GENERATION",
+    "IMAGE_GENERATION",
+    "CODE_REVIEW",
+    "BUILD_ZIP",
+    "DEPLOY",
+    "GITHUB_CREATE",
+)
+JOB_STATUS = ("PENDING", "RUNNING", "COMPLETED", "FAILED", "CANCELLED")
+
+# Статусы n8n переносятся как есть, если совпадают с новыми, иначе — по
+# словарю; всё незавершённое закрывается (см. описание ревизии)
+LEGACY_PROJECT_STATUS = "'READY', 'DEPLOYED', 'FAILED'"
+LEGACY_JOB_STATUS = {
+    "COMPLETED": "COMPLETED",
+    "DONE": "COMPLETED",
+    "SUCCESS": "COMPLETED",
+    "FAILED": "FAILED",
+    "ERROR": "FAILED",
+    "CANCELLED": "CANCELLED",
+    "CANCELED": "CANCELLED",
+}
+
+
+def _legacy_uuid(table: str, column: str) -> str:
+    """Детерминированный UUID из целочисленного id старой таблицы"""
+    return f"md5('{table}:' || {column})::uuid"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Старые таблицы убираются с дороги, данные копируются в новые ниже
+    op.drop_index(op.f("ix_generation_jobs_project_id"), table_name="generation_jobs")
+    op.rename_table("generation_jobs", "legacy_generation_jobs")
+    op.drop_index(op.f("ix_projects_user_id"), table_name="projects")
+    op.rename_table("projects", "legacy_projects")
+
+    op.create_table(
+        "projects",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("prompt", sa.Text(), nullable=False),
+        sa.Column("generated_structure", sa.JSON(), nullable=True),
+        sa.Column("generated_html", sa.Text(), nullable=True),
+        sa.Column("generated_css", sa.Text(), nullable=True),
+        sa.Column("generated_js", sa.Text(), nullable=True),
+        sa.Column("generated_backend", sa.Text(), nullable=True),
+        sa.Column("color_scheme", sa.String(length=100), nullable=True),
+        sa.Column("ai_model_used", sa.String(length=100), nullable=True),
+        sa.Column("zip_file_url", sa.String(length=500), nullable=True),
+        sa.Column("preview_url", sa.String(length=500), nullable=True),
+        sa.Column("deployed_url", sa.String(length=500), nullable=True),
+        sa.Column("github_repo_url", sa.String(length=500), nullable=True),
+        sa.Column(
+            "status", sa.Enum(*PROJECT_STATUS, name="projectstatus"), nullable=True
+        ),
+        sa.Column("is_public", sa.Boolean(), nullable=True),
+        sa.Column("tokens_used", sa.JSON(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_table(
+        "jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("project_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("job_type", sa.Enum(*JOB_TYPE, name="jobtype"), nullable=False),
+        sa.Column("status", sa.Enum(*JOB_STATUS, name="jobstatus"), nullable=True),
+        sa.Column("input_data", sa.JSON(), nullable=True),
+        sa.Column("output_data", sa.JSON(), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("ai_model", sa.String(length=100), nullable=True),
+        sa.Column("tokens_used", sa.Integer(), nullable=True),
+        sa.Column("generation_time", sa.Float(), nullable=True),
+        sa.Column("worker_id", sa.String(length=100), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_jobs_status_created_at", "jobs", ["status", "created_at"], unique=False
+    )
+
+    op.execute(
+        f"""
+        INSERT INTO projects
+            (id, name, prompt, status, is_public, created_at, updated_at)
+        SELECT {_legacy_uuid("projects", "id")}, title, prompt,
+            (CASE WHEN upper(status) IN ({LEGACY_PROJECT_STATUS})
+                THEN upper(status) ELSE 'FAILED' END)::projectstatus,
+            false, created_at, updated_at
+        FROM legacy_projects
+        """
+    )
+    op.create_table(
+        "legacy_project_owners",
+        sa.Column("project_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("project_id"),
+    )
+    op.execute(
+        f"""
+        INSERT INTO legacy_project_owners (project_id, user_id)
+        SELECT {_legacy_uuid("projects", "id")}, user_id
+        FROM legacy_projects
+        """
+    )
+    job_status = " ".join(
+        f"WHEN '{old}' THEN '{new}'" for old, new in LEGACY_JOB_STATUS.items()
+    )
+    op.execute(
+        f"""
+        INSERT INTO jobs
+            (id, project_id, job_type, status, input_data, error_message,
+             created_at, completed_at)
+        SELECT {_legacy_uuid("generation_jobs", "id")},
+            {_legacy_uuid("projects", "project_id")},
+            'FRONTEND_GENERATION'::jobtype,
+            (CASE upper(status) {job_status} ELSE 'CANCELLED' END)::jobstatus,
+            json_build_object('n8n_execution_id', n8n_execution_id),
+            error_message, created_at, coalesce(finished_at, created_at)
+        FROM legacy_generation_jobs
+        """
+    )
+    op.drop_table("legacy_generation_jobs")
+    op.drop_table("legacy_projects")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Обратно в integer-ключи без потерь не перенести: откат только пустой схемы
+    rows = op.get_bind().scalar(sa.text("SELECT count(*) FROM projects"))
+    if rows:
+        raise RuntimeError(
+            f"Cannot downgrade {revision}: projects table has {rows} rows"
+        )
+    op.drop_table("legacy_project_owners")
+    op.drop_index("ix_jobs_status_created_at", table_name="jobs")
+    op.drop_table("jobs")
+    op.drop_table("projects")
+    sa.Enum(name="jobstatus").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="jobtype").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="projectstatus").drop(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        "projects",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(length=200), nullable=False),
+        sa.Column("prompt", sa.String(length=5000), nullable=False),
+        sa.Column("tech_stack", sa.String(length=50), nullable=False),
+        sa.Column("status", sa.String(length=30), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_projects_user_id"), "projects", ["user_id"], unique=False)
+    op.create_table(
+        "generation_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("error_message", sa.String(length=1000), nullable=True),
+        sa.Column("n8n_execution_id", sa.String(length=100), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_generation_jobs_project_id"),
+        "generation_jobs",
+        ["project_id"],
+        unique=False,
+    )
@@ -0,0 +1,35 @@
+"""rate limit buckets
+
+Revision ID: a4d2f8c61e57
+Revises: 7c1e4a9b2d30
+Create Date: 2026-10-18 17:40:00.000000
+
+Общие для воркеров token bucket лимитера запросов к DeepSeek.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a4d2f8c61e57"
+down_revision: Union[str, Sequence[str], None] = "7c1e4a9b2d30"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "rate_limit_buckets",
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("tokens", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("rate_limit_buckets")
@@ -0,0 +1,80 @@
+"""job fair queue
+
+Revision ID: a9e3d5c7f214
+Revises: f2c6a8d41b93
+Create Date: 2026-10-19 03:20:00.000000
+
+Планирование очереди заданий: владелец задания (jobs.user_id), класс
+приоритета и метка взвешенной справедливой очереди (virtual_finish),
+вес пользователя (users.queue_weight). Индекс по (status, created_at)
+заменяется индексом по (status, priority, virtual_finish).
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a9e3d5c7f214"
+down_revision: Union[str, Sequence[str], None] = "f2c6a8d41b93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column("queue_weight", sa.Float(), server_default="1", nullable=False),
+    )
+    op.add_column("jobs", sa.Column("user_id", sa.Integer(), nullable=True))
+    op.add_column(
+        "jobs",
+        sa.Column("priority", sa.SmallInteger(), server_default="1", nullable=False),
+    )
+    op.add_column(
+        "jobs",
+        sa.Column("virtual_finish", sa.Float(), server_default="0", nullable=False),
+    )
+    op.create_foreign_key(
+        "fk_jobs_user_id_users",
+        "jobs",
+        "users",
+        ["user_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+    # Задания уже поставленных генераций получают владельца проекта
+    op.execute(
+        "UPDATE jobs SET user_id = projects.user_id "
+        "FROM projects WHERE projects.id = jobs.project_id"
+    )
+
+    op.drop_index("ix_jobs_status_created_at", table_name="jobs")
+    op.create_index(
+        "ix_jobs_status_priority_virtual_finish",
+        "jobs",
+        ["status", "priority", "virtual_finish"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_jobs_user_id_status_priority_virtual_finish",
+        "jobs",
+        ["user_id", "status", "priority", "virtual_finish"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_jobs_user_id_status_priority_virtual_finish", table_name="jobs")
+    op.drop_index("ix_jobs_status_priority_virtual_finish", table_name="jobs")
+    op.create_index(
+        "ix_jobs_status_created_at", "jobs", ["status", "created_at"], unique=False
+    )
+    op.drop_constraint("fk_jobs_user_id_users", "jobs", type_="foreignkey")
+    op.drop_column("jobs", "virtual_finish")
+    op.drop_column("jobs", "priority")
+    op.drop_column("jobs", "user_id")
+    op.drop_column("users", "queue_weight")
@@ -0,0 +1,31 @@
+"""section regeneration job type
+
+Revision ID: b81e0c3f5a12
+Revises: a4d2f8c61e57
+Create Date: 2026-10-18 19:20:00.000000
+
+Новый тип задания SECTION_REGENERATION (перегенерация отдельных секций).
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "b81e0c3f5a12"
+down_revision: Union[str, Sequence[str], None] = "a4d2f8c61e57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ADD VALUE нельзя использовать в той же транзакции, где он добавлен
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE jobtype ADD VALUE IF NOT EXISTS 'SECTION_REGENERATION'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Postgres не умеет удалять значения enum: убираем только задания этого типа
+    op.execute("DELETE FROM jobs WHERE job_type = 'SECTION_REGENERATION'")
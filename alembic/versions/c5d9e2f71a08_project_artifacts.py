@@ -0,0 +1,104 @@
+"""project artifacts
+
+Revision ID: c5d9e2f71a08
+Revises: b81e0c3f5a12
+Create Date: 2026-10-18 21:00:00.000000
+
+Сгенерированный код переезжает из колонок projects в версионированную
+таблицу project_artifacts: списки и статусы проектов больше не тянут
+мегабайты текста. Существующий код становится версией 1.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "c5d9e2f71a08"
+down_revision: Union[str, Sequence[str], None] = "b81e0c3f5a12"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ARTIFACT_KIND = ("STRUCTURE", "HTML", "CSS", "JAVASCRIPT", "BACKEND")
+
+# Вид артефакта -> (колонка projects, выражение для текста)
+COLUMNS = {
+    "STRUCTURE": ("generated_structure", "generated_structure::text"),
+    "HTML": ("generated_html", "generated_html"),
+    "CSS": ("generated_css", "generated_css"),
+    "JAVASCRIPT": ("generated_js", "generated_js"),
+    "BACKEND": ("generated_backend", "generated_backend"),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "project_artifacts",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("project_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column(
+            "kind", sa.Enum(*ARTIFACT_KIND, name="artifactkind"), nullable=False
+        ),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "project_id", "kind", "version", name="uq_project_artifacts_version"
+        ),
+    )
+
+    for kind, (column, content) in COLUMNS.items():
+        op.execute(
+            f"""
+            INSERT INTO project_artifacts
+                (id, project_id, kind, version, content, size, created_at)
+            SELECT gen_random_uuid(), id, '{kind}', 1, {content},
+                   octet_length({content}),
+                   COALESCE(completed_at, updated_at, created_at, now())
+            FROM projects
+            WHERE {column} IS NOT NULL
+            """
+        )
+
+    for column, _ in COLUMNS.values():
+        op.drop_column("projects", column)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column("projects", sa.Column("generated_backend", sa.Text(), nullable=True))
+    op.add_column("projects", sa.Column("generated_js", sa.Text(), nullable=True))
+    op.add_column("projects", sa.Column("generated_css", sa.Text(), nullable=True))
+    op.add_column("projects", sa.Column("generated_html", sa.Text(), nullable=True))
+    op.add_column(
+        "projects", sa.Column("generated_structure", sa.JSON(), nullable=True)
+    )
+
+    # В колонки возвращаются последние версии
+    for kind, (column, _) in COLUMNS.items():
+        value = "a.content::json" if kind == "STRUCTURE" else "a.content"
+        op.execute(
+            f"""
+            UPDATE projects p SET {column} = {value}
+            FROM project_artifacts a
+            WHERE a.project_id = p.id AND a.kind = '{kind}'
+              AND a.version = (
+                  SELECT max(version) FROM project_artifacts
+                  WHERE project_id = p.id AND kind = '{kind}'
+              )
+            """
+        )
+
+    op.drop_table("project_artifacts")
+    sa.Enum(name="artifactkind").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,55 @@
+"""restore legacy project owners
+
+Revision ID: c7a1e5d93f28
+Revises: b4f7c2e8a915
+Create Date: 2026-10-19 05:00:00.000000
+
+Проекты, перенесённые из схемы n8n (7c1e4a9b2d30), теряли владельца:
+projects.user_id тогда был UUID, а e8b4c2d90f17 переводит его в integer
+через NULL. Владельцы отложены в legacy_project_owners — возвращаем их
+и удаляем таблицу.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "c7a1e5d93f28"
+down_revision: Union[str, Sequence[str], None] = "b4f7c2e8a915"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Пользователь мог быть удалён после переноса — такие проекты без владельца
+    op.execute(
+        """
+        UPDATE projects
+        SET user_id = owners.user_id
+        FROM legacy_project_owners AS owners
+        JOIN users ON users.id = owners.user_id
+        WHERE projects.id = owners.project_id AND projects.user_id IS NULL
+        """
+    )
+    op.drop_table("legacy_project_owners")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Владельцы снова откладываются: e8b4c2d90f17 при откате обнулит user_id
+    op.create_table(
+        "legacy_project_owners",
+        sa.Column("project_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("project_id"),
+    )
+    op.execute(
+        """
+        INSERT INTO legacy_project_owners (project_id, user_id)
+        SELECT id, user_id FROM projects WHERE user_id IS NOT NULL
+        """
+    )
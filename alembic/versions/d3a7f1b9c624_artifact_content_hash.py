@@ -0,0 +1,43 @@
+"""artifact content hash
+
+Revision ID: d3a7f1b9c624
+Revises: c5d9e2f71a08
+Create Date: 2026-10-18 23:00:00.000000
+
+Код артефактов переезжает в хранилище блобов (ARTIFACT_STORE_URL):
+строка хранит SHA-256 содержимого. Существующие версии остаются в
+колонке content, пока их не перенесёт python -m app.offload_artifacts.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d3a7f1b9c624"
+down_revision: Union[str, Sequence[str], None] = "c5d9e2f71a08"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "project_artifacts",
+        sa.Column("content_hash", sa.String(length=64), nullable=True),
+    )
+    op.alter_column(
+        "project_artifacts", "content", existing_type=sa.Text(), nullable=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Код из хранилища обратно в строки не переносится: версии без него
+    # удаляются, поэтому перед откатом проекты стоит перегенерировать
+    op.execute("DELETE FROM project_artifacts WHERE content IS NULL")
+    op.alter_column(
+        "project_artifacts", "content", existing_type=sa.Text(), nullable=False
+    )
+    op.drop_column("project_artifacts", "content_hash")
@@ -0,0 +1,62 @@
+"""project owner keyset index
+
+Revision ID: e8b4c2d90f17
+Revises: d3a7f1b9c624
+Create Date: 2026-10-19 00:30:00.000000
+
+projects.user_id становится ссылкой на users.id (был UUID, который не
+мог ссылаться на целочисленный ключ users и не заполнялся), плюс индекс
+(user_id, created_at, id) для keyset-страниц списка проектов.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "e8b4c2d90f17"
+down_revision: Union[str, Sequence[str], None] = "d3a7f1b9c624"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        "projects",
+        "user_id",
+        existing_type=postgresql.UUID(as_uuid=True),
+        type_=sa.Integer(),
+        existing_nullable=True,
+        postgresql_using="NULL",
+    )
+    op.create_foreign_key(
+        "fk_projects_user_id_users",
+        "projects",
+        "users",
+        ["user_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+    op.create_index(
+        "ix_projects_user_id_created_at",
+        "projects",
+        ["user_id", "created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_projects_user_id_created_at", table_name="projects")
+    op.drop_constraint("fk_projects_user_id_users", "projects", type_="foreignkey")
+    op.alter_column(
+        "projects",
+        "user_id",
+        existing_type=sa.Integer(),
+        type_=postgresql.UUID(as_uuid=True),
+        existing_nullable=True,
+        postgresql_using="NULL",
+    )
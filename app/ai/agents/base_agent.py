@@ -1,6 +1,21 @@
+import asyncio
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
-from app.ai.client import DeepSeekClient
+from typing import AsyncIterator, Dict, Any, List, Optional, Type
+from pydantic import BaseModel
+from app.ai.client import DeepSeekClient, deepseek_client
+from app.ai.retry import deadline_scope
+from app.ai.agents.stages import (
+    Stage,
+    StageCheckpoint,
+    StageExecutor,
+    StageRun,
+    current_agent,
+    current_stage,
+    generation_events,
+)
+from app.core.config import settings
+from app.core.metrics import LLM_CALLS, LLM_LATENCY
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,38 +25,142 @@ class BaseAIAgent(ABC):
     """Базовый класс для всех AI агентов"""
 
     def __init__(self, client: Optional[DeepSeekClient] = None):
-        self.client = client or DeepSeekClient()
+        # По умолчанию все агенты делят общий пул соединений
+        self.client = client or deepseek_client
         self.agent_name = self.__class__.__name__
 
     @abstractmethod
-    async def generate(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Основной метод генерации"""
+    async def generate(
+        self,
+        input_data: Dict[str, Any],
+        checkpoint: Optional[StageCheckpoint] = None,
+    ) -> Dict[str, Any]:
+        """Основной метод генерации (с чекпоинтом — возобновление по стадиям)"""
         pass
 
+    def get_stages(self) -> List[Stage]:
+        """
+        Граф стадий агента.
+
+        Агент объявляет стадии и их зависимости, а run_stages сам
+        запускает независимые стадии параллельно.
+        """
+        return []
+
+    async def run_stages(
+        self,
+        input_data: Dict[str, Any],
+        checkpoint: Optional[StageCheckpoint] = None,
+    ) -> StageRun:
+        """
+        Прогон графа стадий с замером времени каждой стадии
+
+        Все вызовы LLM стадий укладываются в GENERATION_DEADLINE.
+        Стадии из чекпоинта не перезапускаются.
+        """
+        with deadline_scope(settings.GENERATION_DEADLINE):
+            run = await StageExecutor(self.get_stages()).run(input_data, checkpoint)
+        resumed = f", resumed: {run.resumed}" if run.resumed else ""
+        logger.info(
+            f"[{self.agent_name}] Stages finished in {run.wall_time:.2f}s: "
+            f"{run.durations()}{resumed}"
+        )
+        return run
+
+    async def stream(
+        self,
+        input_data: Dict[str, Any],
+        checkpoint: Optional[StageCheckpoint] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Генерация с потоковой выдачей событий
+
+        События:
+            {"event": "token", "stage": str, "delta": str}  - фрагмент кода
+            {"event": "stage", "stage": str, "duration": float}  - стадия готова
+            {"event": "done", "result": dict}  - результат generate()
+
+        Ошибка генерации пробрасывается из итератора. Закрытый итератор
+        (aclose) отменяет генерацию и дожидается её остановки: после него
+        стадии уже не пишут чекпоинты в сессию вызывающего.
+        """
+        queue: asyncio.Queue[Optional[Dict[str, Any]]] = asyncio.Queue()
+
+        # Задача генерации наследует контекст вместе с приёмником событий
+        reset_token = generation_events.set(queue.put_nowait)
+        try:
+            task = asyncio.create_task(self.generate(input_data, checkpoint))
+        finally:
+            generation_events.reset(reset_token)
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+
+        try:
+            while (event := await queue.get()) is not None:
+                yield event
+            yield {"event": "done", "result": task.result()}
+        finally:
+            if not task.done():
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
     async def _call_ai(
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
         json_schema: Optional[Dict[str, Any]] = None,
-    ) -> Dict[str, Any]:
-        """Обертка для вызова AI с логированием"""
-        logger.info(f"[{self.agent_name}] Calling AI with prompt length: {len(prompt)}")
+        use_cache: bool = True,
+        response_model: Optional[Type[BaseModel]] = None,
+    ) -> Any:
+        """
+        Обертка для вызова AI с логированием (use_cache=False — мимо кэша ответов)
 
+        response_model — ответ валидируется сразу в модель и возвращается ею
+        """
+        stage = current_stage.get()
+        log_prefix = f"[{self.agent_name}:{stage}]" if stage else f"[{self.agent_name}]"
+        logger.info(f"{log_prefix} Calling AI with prompt length: {len(prompt)}")
+
+        agent_token = current_agent.set(self.agent_name)
+        started = time.perf_counter()
+        outcome = "error"
         try:
-            if json_schema:
+            if response_model is not None:
+                result = await self.client.generate_model(
+                    prompt=prompt,
+                    response_model=response_model,
+                    system_prompt=system_prompt,
+                    use_cache=use_cache,
+                )
+            elif json_schema:
                 result = await self.client.generate_structured(
                     prompt=prompt,
                     response_schema=json_schema,
                     system_prompt=system_prompt,
+                    use_cache=use_cache,
+                )
+            elif (emit := generation_events.get()) is not None:
+                # Стриминг: отдаём фрагменты наружу по мере генерации
+                stream = self.client.stream_completion(
+                    prompt=prompt, system_prompt=system_prompt, use_cache=use_cache
                 )
+                async for delta in stream:
+                    emit({"event": "token", "stage": stage, "delta": delta})
+                result = stream.result()
             else:
                 result = await self.client.generate_completion(
-                    prompt=prompt, system_prompt=system_prompt
+                    prompt=prompt, system_prompt=system_prompt, use_cache=use_cache
                 )
 
-            logger.info(f"[{self.agent_name}] AI call successful")
+            logger.info(f"{log_prefix} AI call successful")
+            outcome = "ok"
             return result
 
         except Exception as e:
-            logger.error(f"[{self.agent_name}] AI call failed: {e}")
+            logger.error(f"{log_prefix} AI call failed: {e}")
             raise
+        finally:
+            current_agent.reset(agent_token)
+            LLM_LATENCY.labels(self.agent_name, stage or "none").observe(
+                time.perf_counter() - started
+            )
+            LLM_CALLS.labels(self.agent_name, stage or "none", outcome).inc()
@@ -1,24 +1,61 @@
+import asyncio
 from app.ai.agents.base_agent import BaseAIAgent
+from app.ai.agents.stages import Stage, StageCheckpoint, current_stage
+from app.ai.client import DeepSeekClient
 from app.ai.prompts.frontend_prompts import FrontendPrompts
-from app.ai.schemas import WebsiteStructure, GeneratedFrontend, ColorScheme
-from typing import Dict, Any
+from app.ai.retry import deadline_scope
+from app.ai.schemas import WebsiteSection, WebsiteStructure, GeneratedFrontend, ColorScheme
+from app.ai.sections import assemble_page, strip_code_fences
+from app.ai.structure_index import StructureIndex, structure_index
+from app.core.config import settings
+from typing import Dict, Any, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class FrontendAgent(BaseAIAgent):
-    """Агент для генерации фронтенд кода"""
+    """
+    Агент для генерации фронтенд кода
 
-    async def generate(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    html_mode: "single" — вся страница одним вызовом LLM, "sections" —
+    каркас страницы и каждая секция отдельными параллельными вызовами
+    (время — по самой большой секции, страница не упирается в max_tokens).
+
+    index: индекс похожих промптов (по умолчанию общий, если
+    STRUCTURE_CACHE_ENABLED) — структура для почти такого же запроса
+    берётся без вызова LLM, для похожего подсказывается модели.
+    """
+
+    HTML_MODES = ("single", "sections")
+
+    def __init__(
+        self,
+        client: Optional[DeepSeekClient] = None,
+        html_mode: Optional[str] = None,
+        index: Optional[StructureIndex] = None,
+    ):
+        super().__init__(client)
+        self.structure_index = index if index is not None else structure_index
+        self.html_mode = html_mode or settings.FRONTEND_HTML_MODE
+        if self.html_mode not in self.HTML_MODES:
+            raise ValueError(f"Unsupported html_mode: {self.html_mode}")
+
+    async def generate(
+        self,
+        input_data: Dict[str, Any],
+        checkpoint: Optional[StageCheckpoint] = None,
+    ) -> Dict[str, Any]:
         """
         Генерация фронтенд кода на основе промпта пользователя
 
         Args:
             input_data: {
                 "user_prompt": str,
-                "color_scheme": dict (опционально)
+                "color_scheme": dict (опционально),
+                "user_id": int (опционально, владелец для индекса структур)
             }
+            checkpoint: результаты уже выполненных стадий (возобновление)
 
         Returns:
             GeneratedFrontend
@@ -27,41 +64,153 @@ class FrontendAgent(BaseAIAgent):
             f"[FrontendAgent] Starting generation for prompt: {input_data['user_prompt'][:100]}..."
         )
 
-        # 1. Генерация структуры сайта
-        structure = await self._generate_structure(input_data["user_prompt"])
+        # structure -> colors -> {html, css, js}: три последние стадии
+        # зависят только от структуры и цветов и выполняются параллельно
+        run = await self.run_stages(input_data, checkpoint)
 
-        # 2. Определение цветовой схемы
-        color_scheme = await self._generate_color_scheme(
-            input_data.get("color_scheme"), structure
+        result = GeneratedFrontend(
+            html=run.results["html"],
+            css=run.results["css"],
+            javascript=run.results["javascript"],
+            structure=run.results["structure"],
+            stage_timings=run.durations(),
         )
 
-        # 3. Генерация HTML
-        html = await self._generate_html(structure, color_scheme)
+        logger.info(f"[FrontendAgent] Generation completed successfully")
+        return result.model_dump()
+
+    async def regenerate_sections(
+        self,
+        structure: WebsiteStructure,
+        section_types: List[str],
+        color_hint: Optional[str] = None,
+        instructions: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Перегенерация отдельных секций сайта
 
-        # 4. Генерация CSS
-        css = await self._generate_css(structure, color_scheme)
+        Для каждой секции параллельно запрашиваются только её HTML-фрагмент
+        и CSS-правила. Кэш ответов не используется: повторный запрос
+        должен давать новый вариант.
 
-        # 5. Генерация JavaScript
-        js = await self._generate_javascript(structure)
+        Returns:
+            {"html": {type: fragment}, "css": {type: rules}}
+        """
+        sections = {section.type.value: section for section in structure.sections}
+        unknown = [t for t in section_types if t not in sections]
+        if unknown:
+            raise ValueError(f"Sections not in structure: {unknown}")
 
-        result = GeneratedFrontend(
-            html=html, css=css, javascript=js, structure=structure
-        )
+        colors = await self._generate_color_scheme(color_hint, structure)
 
-        logger.info(f"[FrontendAgent] Generation completed successfully")
-        return result.dict()
+        async def regenerate(section: WebsiteSection):
+            return await asyncio.gather(
+                self._call_ai(
+                    prompt=FrontendPrompts.get_section_html_prompt(
+                        structure, section, colors, instructions
+                    ),
+                    system_prompt="Ты опытный фронтенд разработчик. Генерируй чистый, семантический HTML5 код.",
+                    use_cache=False,
+                ),
+                self._call_ai(
+                    prompt=FrontendPrompts.get_section_css_prompt(
+                        structure, section, colors, instructions
+                    ),
+                    system_prompt="Ты опытный CSS разработчик. Генерируй современный, адаптивный CSS код.",
+                    use_cache=False,
+                ),
+            )
 
-    async def _generate_structure(self, user_prompt: str) -> WebsiteStructure:
-        """Генерация структуры сайта"""
-        prompt = FrontendPrompts.get_structure_prompt(user_prompt)
+        with deadline_scope(settings.GENERATION_DEADLINE):
+            results = await asyncio.gather(
+                *(regenerate(sections[t]) for t in section_types)
+            )
 
-        result = await self._call_ai(
+        return {
+            "html": {
+                t: strip_code_fences(html["content"])
+                for t, (html, _) in zip(section_types, results)
+            },
+            "css": {
+                t: strip_code_fences(css["content"])
+                for t, (_, css) in zip(section_types, results)
+            },
+        }
+
+    def get_stages(self) -> List[Stage]:
+        return [
+            # 1. Генерация структуры сайта
+            Stage(
+                "structure",
+                lambda ctx: self._generate_structure(
+                    ctx["user_prompt"], ctx.get("user_id")
+                ),
+                dump=lambda structure: structure.model_dump(),
+                load=lambda data: WebsiteStructure(**data),
+            ),
+            # 2. Определение цветовой схемы
+            Stage(
+                "colors",
+                lambda ctx: self._generate_color_scheme(
+                    ctx.get("color_scheme"), ctx["structure"]
+                ),
+                depends_on=("structure",),
+            ),
+            # 3. Генерация HTML
+            Stage(
+                "html",
+                lambda ctx: self._generate_html(ctx["structure"], ctx["colors"]),
+                depends_on=("structure", "colors"),
+            )
+            if self.html_mode == "single"
+            else Stage(
+                "html",
+                lambda ctx: self._generate_html_by_sections(
+                    ctx["structure"], ctx["colors"]
+                ),
+                depends_on=("structure", "colors"),
+            ),
+            # 4. Генерация CSS
+            Stage(
+                "css",
+                lambda ctx: self._generate_css(ctx["structure"], ctx["colors"]),
+                depends_on=("structure", "colors"),
+            ),
+            # 5. Генерация JavaScript
+            Stage(
+                "javascript",
+                lambda ctx: self._generate_javascript(ctx["structure"]),
+                depends_on=("structure",),
+            ),
+        ]
+
+    async def _generate_structure(
+        self, user_prompt: str, user_id: Optional[int] = None
+    ) -> WebsiteStructure:
+        """Генерация структуры сайта (прошлые структуры — только этого пользователя)"""
+        example = None
+        if self.structure_index is not None:
+            match = self.structure_index.lookup(user_prompt, user_id)
+            if match is not None:
+                if match.similarity >= self.structure_index.reuse_threshold:
+                    logger.info(
+                        f"[FrontendAgent] Reusing structure of a similar prompt "
+                        f"(similarity {match.similarity:.2f})"
+                    )
+                    return WebsiteStructure(**match.structure)
+                example = match.structure
+
+        prompt = FrontendPrompts.get_structure_prompt(user_prompt, example)
+
+        structure = await self._call_ai(
             prompt=prompt,
             system_prompt="Ты опытный UX/UI дизайнер и веб-разработчик.",
-            json_schema=WebsiteStructure.schema(),
+            response_model=WebsiteStructure,
         )
 
-        return WebsiteStructure(**result)
+        if self.structure_index is not None:
+            self.structure_index.add(user_prompt, structure.model_dump(), user_id)
+        return structure
 
     async def _generate_color_scheme(
         self, color_hint: Optional[str], structure: WebsiteStructure
@@ -99,6 +248,35 @@ class FrontendAgent(BaseAIAgent):
 
         return result["content"]
 
+    async def _generate_html_by_sections(
+        self, structure: WebsiteStructure, color_scheme: Dict[str, str]
+    ) -> str:
+        """
+        Генерация HTML по секциям: fan-out на каркас и все секции, сборка по order
+        """
+        system_prompt = "Ты опытный фронтенд разработчик. Генерируй чистый, семантический HTML5 код."
+
+        async def call(part: str, prompt: str) -> str:
+            # Токены каждой части помечаются своей подстадией (html:hero, ...)
+            current_stage.set(f"html:{part}")
+            result = await self._call_ai(prompt=prompt, system_prompt=system_prompt)
+            return strip_code_fences(result["content"])
+
+        sections = sorted(structure.sections, key=lambda s: s.order)
+        shell, *fragments = await asyncio.gather(
+            call("shell", FrontendPrompts.get_shell_prompt(structure, color_scheme)),
+            *(
+                call(
+                    section.type.value,
+                    FrontendPrompts.get_section_html_prompt(
+                        structure, section, color_scheme
+                    ),
+                )
+                for section in sections
+            ),
+        )
+        return assemble_page(shell, fragments)
+
     async def _generate_css(
         self, structure: WebsiteStructure, color_scheme: Dict[str, str]
     ) -> str:
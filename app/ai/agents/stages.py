@@ -0,0 +1,190 @@
+"""
+Граф стадий генерации и исполнитель с параллельным запуском.
+
+Docs: https://docs.python.org/3/library/asyncio-task.html
+"""
+
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Имя стадии, внутри которой сейчас выполняется код (для логов и метрик)
+current_stage: ContextVar[Optional[str]] = ContextVar("current_stage", default=None)
+
+# Агент, от имени которого идёт текущий вызов LLM (для метрик токенов)
+current_agent: ContextVar[Optional[str]] = ContextVar("current_agent", default=None)
+
+# Приёмник событий генерации (токены, завершение стадий) при стриминге.
+# Задаётся BaseAIAgent.stream и наследуется задачами стадий.
+generation_events: ContextVar[Optional[Callable[[Dict[str, Any]], None]]] = ContextVar(
+    "generation_events", default=None
+)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    Стадия генерации.
+
+    run получает словарь с входными данными агента и результатами
+    уже завершённых стадий (по их именам). dump/load переводят результат
+    в JSON-совместимый вид и обратно для чекпоинтов (по умолчанию как есть).
+    """
+
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    depends_on: Tuple[str, ...] = ()
+    dump: Optional[Callable[[Any], Any]] = None
+    load: Optional[Callable[[Any], Any]] = None
+
+
+@dataclass
+class StageCheckpoint:
+    """
+    Чекпоинты стадий для возобновления генерации.
+
+    completed — сохранённые результаты стадий (после Stage.dump): такие
+    стадии не запускаются повторно. save вызывается сразу после
+    завершения каждой стадии.
+    """
+
+    completed: Dict[str, Any] = field(default_factory=dict)
+    save: Optional[Callable[[str, Any], Awaitable[None]]] = None
+
+
+@dataclass
+class StageTiming:
+    started_at: float
+    finished_at: float
+
+    @property
+    def duration(self) -> float:
+        return self.finished_at - self.started_at
+
+
+@dataclass
+class StageRun:
+    """Результат прогона графа стадий"""
+
+    results: Dict[str, Any] = field(default_factory=dict)
+    timings: Dict[str, StageTiming] = field(default_factory=dict)
+    wall_time: float = 0.0
+    # Стадии, взятые из чекпоинта без запуска
+    resumed: List[str] = field(default_factory=list)
+
+    def durations(self) -> Dict[str, float]:
+        return {name: round(t.duration, 3) for name, t in self.timings.items()}
+
+
+class StageExecutor:
+    """
+    Запускает стадии, как только готовы их зависимости.
+
+    Независимые стадии выполняются одновременно, поэтому время прогона
+    равно длине критического пути графа, а не сумме всех стадий.
+    При ошибке в любой стадии остальные отменяются, ошибка пробрасывается.
+    С чекпоинтом уже завершённые стадии не запускаются, а новые
+    сохраняются по мере завершения.
+    """
+
+    def __init__(self, stages: Sequence[Stage]):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage: {stage.name}")
+            self.stages[stage.name] = stage
+        self._validate()
+
+    def _validate(self) -> None:
+        for stage in self.stages.values():
+            for dep in stage.depends_on:
+                if dep not in self.stages:
+                    raise ValueError(
+                        f"Stage '{stage.name}' depends on unknown stage '{dep}'"
+                    )
+
+        # Поиск циклов обходом в глубину
+        visiting: set[str] = set()
+        done: set[str] = set()
+
+        def visit(name: str, path: List[str]) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage cycle: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for dep in self.stages[name].depends_on:
+                visit(dep, path + [name])
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name, [])
+
+    async def run(
+        self,
+        input_data: Optional[Dict[str, Any]] = None,
+        checkpoint: Optional[StageCheckpoint] = None,
+    ) -> StageRun:
+        run = StageRun()
+        completed = checkpoint.completed if checkpoint is not None else {}
+        context: Dict[str, Any] = dict(input_data or {})
+        clashes = set(context) & set(self.stages)
+        if clashes:
+            raise ValueError(f"Input keys clash with stage names: {sorted(clashes)}")
+        tasks: Dict[str, asyncio.Task] = {}
+
+        def finish(stage: Stage, result: Any, **event: Any) -> None:
+            context[stage.name] = result
+            run.results[stage.name] = result
+
+            emit = generation_events.get()
+            if emit is not None:
+                emit({"event": "stage", "stage": stage.name, **event})
+
+        async def execute(stage: Stage) -> Any:
+            if stage.name in completed:
+                data = completed[stage.name]
+                result = stage.load(data) if stage.load else data
+                run.resumed.append(stage.name)
+                finish(stage, result, duration=0.0, resumed=True)
+                return result
+
+            if stage.depends_on:
+                await asyncio.gather(*(tasks[dep] for dep in stage.depends_on))
+
+            current_stage.set(stage.name)
+            started = time.perf_counter()
+            result = await stage.run(context)
+            run.timings[stage.name] = StageTiming(started, time.perf_counter())
+
+            if checkpoint is not None and checkpoint.save is not None:
+                await checkpoint.save(
+                    stage.name, stage.dump(result) if stage.dump else result
+                )
+
+            finish(stage, result, duration=round(run.timings[stage.name].duration, 3))
+            return result
+
+        started = time.perf_counter()
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.create_task(
+                execute(stage), name=f"stage:{stage.name}"
+            )
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            run.wall_time = time.perf_counter() - started
+
+        return run
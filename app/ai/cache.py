@@ -0,0 +1,218 @@
+"""
+Docs:
+https://docs.python.org/3/library/hashlib.html
+https://docs.python.org/3/library/asyncio-task.html#asyncio.to_thread
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def response_cache_key(payload: Dict[str, Any]) -> str:
+    """
+    Ключ ответа: SHA-256 от запроса к API
+
+    В payload входят модель, сообщения (system + user), temperature,
+    max_tokens и response_format (json_mode), поэтому одинаковый
+    запрос всегда даёт одинаковый ключ.
+    """
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class DiskResponseStore:
+    """
+    Дисковый уровень кэша ответов: один JSON-файл на ключ.
+
+    Файлы раскладываются по подкаталогам (первые два символа ключа).
+    При превышении max_bytes удаляются давно не читанные файлы (по mtime,
+    чтение обновляет mtime). Методы блокирующие — вызывать через to_thread.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.root = Path(path)
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def _files(self):
+        return self.root.glob("*/*.json")
+
+    def _ensure_size(self) -> None:
+        if self._size is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._size = sum(p.stat().st_size for p in self._files())
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Broken response cache entry {path}: {e}")
+            self.delete(key)
+            return None
+
+        if entry["expires_at"] <= time.time():
+            self.delete(key)
+            return None
+
+        os.utime(path)
+        return entry
+
+    def set(self, key: str, value: Dict[str, Any], expires_at: float) -> None:
+        data = json.dumps(
+            {"expires_at": expires_at, "value": value}, ensure_ascii=False
+        ).encode("utf-8")
+
+        path = self._path(key)
+        with self._lock:
+            self._ensure_size()
+            path.parent.mkdir(exist_ok=True)
+            old_size = path.stat().st_size if path.exists() else 0
+
+            # Запись через временный файл: читатель не увидит половину JSON
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+
+            self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str) -> None:
+        path = self._path(key)
+        with self._lock:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                return
+            if self._size is not None:
+                self._size -= size
+
+    def _evict(self) -> None:
+        # Освобождаем с запасом, чтобы не сканировать каталог на каждой записи
+        target = int(self.max_bytes * 0.9)
+        files = []
+        for path in self._files():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        for _, size, path in sorted(files, key=lambda item: item[0]):
+            if self._size <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            self._size -= size
+            self.evictions += 1
+
+
+class ResponseCache:
+    """
+    Кэш ответов DeepSeek по содержимому запроса.
+
+    Два уровня: LRU с TTL в памяти процесса и, опционально, каталог
+    на диске (переживает перезапуск, общий для процессов на одной машине).
+    Попадание на диске поднимает ответ в память с оставшимся TTL.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        max_size: Optional[int] = None,
+        disk: Optional[DiskResponseStore] = None,
+    ):
+        self.ttl = settings.LLM_CACHE_TTL if ttl is None else ttl
+        self.memory: TTLCache[str, Dict[str, Any]] = TTLCache(
+            max_size=max_size or settings.LLM_CACHE_MAX_SIZE, ttl=self.ttl
+        )
+        self.disk = disk
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value
+
+        if self.disk is not None:
+            try:
+                entry = await asyncio.to_thread(self.disk.get, key)
+            except OSError as e:
+                logger.warning(f"Response cache disk tier unavailable: {e}")
+                entry = None
+            if entry is not None:
+                self.disk_hits += 1
+                remaining = entry["expires_at"] - time.time()
+                self.memory.set(
+                    key, entry["value"], expires_at=time.monotonic() + remaining
+                )
+                return entry["value"]
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(
+                    self.disk.set, key, value, time.time() + self.ttl
+                )
+            except OSError as e:
+                logger.warning(f"Response cache disk tier unavailable: {e}")
+
+    async def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.delete, key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        stats = {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_size": len(self.memory),
+            "memory_evictions": self.memory.evictions,
+        }
+        if self.disk is not None:
+            stats["disk_bytes"] = self.disk._size or 0
+            stats["disk_evictions"] = self.disk.evictions
+        return stats
+
+
+def create_response_cache() -> Optional[ResponseCache]:
+    """Кэш ответов из настроек: LLM_CACHE_ENABLED, LLM_CACHE_DIR (пусто — только память)"""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    disk = None
+    if settings.LLM_CACHE_DIR:
+        disk = DiskResponseStore(settings.LLM_CACHE_DIR, settings.LLM_CACHE_MAX_BYTES)
+    return ResponseCache(disk=disk)
@@ -1,38 +1,190 @@
-import os
 import json
+import time
 import aiohttp
-from typing import Dict, Any, Optional
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+from typing import AsyncContextManager, AsyncIterator, Dict, Any, List, Optional, Tuple, Type, TypeVar
 from pydantic import BaseModel
-from dotenv import load_dotenv
 import logging
 
-load_dotenv()
+from app.ai.agents.stages import current_agent, current_stage
+from app.ai.errors import DeepSeekAPIError
+from app.ai.cache import ResponseCache, create_response_cache, response_cache_key
+from app.ai.json_extract import extract_json, validate_json
+from app.ai.rate_limit import (
+    LLMRateLimiter,
+    RateLimitLease,
+    create_rate_limiter,
+    estimate_tokens,
+)
+from app.ai.retry import RetryPolicy, remaining_budget
+from app.ai.usage import usage_meter
+from app.core.config import settings
+from app.core.metrics import LLM_TOKENS
 
 logger = logging.getLogger(__name__)
 
+M = TypeVar("M", bound=BaseModel)
+
+
+def record_usage(usage: Dict[str, Any]) -> None:
+    """
+    Токены ответа провайдера в метрики и в счётчик задания
+    (агент, стадия и UsageMeter — из контекста)
+    """
+    agent = current_agent.get() or "direct"
+    stage = current_stage.get() or "none"
+    for kind in ("prompt", "completion"):
+        tokens = usage.get(f"{kind}_tokens")
+        if tokens:
+            LLM_TOKENS.labels(agent, stage, kind).inc(tokens)
+
+    meter = usage_meter.get()
+    if meter is not None:
+        meter.add(agent, stage, usage)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After: число секунд или HTTP-дата"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
 
 class DeepSeekClient:
-    """Клиент для работы с DeepSeek API"""
+    """
+    Клиент для работы с DeepSeek API
+
+    Держит один долгоживущий aiohttp.ClientSession с пулом соединений:
+    keep-alive и кэш DNS избавляют каждый вызов от установки TCP/TLS.
+    Сессия открывается в start() (на старте приложения) и закрывается
+    в close(); если start() не вызывали, сессия создаётся при первом запросе.
+
+    С cache (ResponseCache) одинаковые запросы отдаются из кэша без
+    обращения к API; отключается на вызов через use_cache=False.
+    limiter (LLMRateLimiter) ограничивает параллельность и темп запросов,
+    retry (RetryPolicy) повторяет запросы при 429/5xx/таймаутах.
+    """
 
-    def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
-        self.base_url = "https://api.deepseek.com/v1"
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        pool_limit: Optional[int] = None,
+        pool_limit_per_host: Optional[int] = None,
+        keepalive_timeout: Optional[float] = None,
+        dns_cache_ttl: Optional[int] = None,
+        timeout: Optional[float] = None,
+        cache: Optional[ResponseCache] = None,
+        limiter: Optional[LLMRateLimiter] = None,
+        retry: Optional[RetryPolicy] = None,
+    ):
+        self.api_key = api_key or settings.DEEPSEEK_API_KEY
+        self.base_url = (base_url or settings.DEEPSEEK_BASE_URL).rstrip("/")
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
 
-    async def generate_completion(
+        # None -> значение из настроек (0 у aiohttp означает "без лимита")
+        self.pool_limit = (
+            settings.DEEPSEEK_POOL_LIMIT if pool_limit is None else pool_limit
+        )
+        self.pool_limit_per_host = (
+            settings.DEEPSEEK_POOL_LIMIT_PER_HOST
+            if pool_limit_per_host is None
+            else pool_limit_per_host
+        )
+        self.keepalive_timeout = (
+            settings.DEEPSEEK_KEEPALIVE_TIMEOUT
+            if keepalive_timeout is None
+            else keepalive_timeout
+        )
+        self.dns_cache_ttl = (
+            settings.DEEPSEEK_DNS_CACHE_TTL if dns_cache_ttl is None else dns_cache_ttl
+        )
+        self.timeout = settings.DEEPSEEK_TIMEOUT if timeout is None else timeout
+        self.cache = cache
+        self.limiter = limiter
+        self.retry = retry
+
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self) -> None:
+        """Открыть пул соединений (идемпотентно)"""
+        if self._session is not None and not self._session.closed:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_limit,
+            limit_per_host=self.pool_limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        logger.info(
+            f"DeepSeek connection pool opened "
+            f"(limit={self.pool_limit}, per_host={self.pool_limit_per_host})"
+        )
+
+    async def close(self) -> None:
+        """Закрыть пул соединений"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("DeepSeek connection pool closed")
+        self._session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
+
+    def _limit(
+        self, payload: Dict[str, Any]
+    ) -> AsyncContextManager[Optional[RateLimitLease]]:
+        if self.limiter is None:
+            return nullcontext()
+        return self.limiter.acquire(estimate_tokens(payload))
+
+    def _request_timeout(self) -> aiohttp.ClientTimeout:
+        """Таймаут запроса, урезанный до оставшегося бюджета генерации"""
+        remaining = remaining_budget()
+        if remaining is None:
+            return aiohttp.ClientTimeout(total=self.timeout)
+        return aiohttp.ClientTimeout(total=min(self.timeout, remaining))
+
+    async def _raise_api_error(self, response: aiohttp.ClientResponse) -> None:
+        error_text = await response.text()
+        logger.error(f"DeepSeek API error: {error_text}")
+        error = DeepSeekAPIError(
+            response.status,
+            retry_after=parse_retry_after(response.headers.get("Retry-After")),
+            detail=error_text,
+        )
+        if response.status == 429 and self.limiter is not None:
+            self.limiter.pause(error.retry_after or 1.0)
+        raise error
+
+    def _build_payload(
         self,
         prompt: str,
-        system_prompt: Optional[str] = None,
-        temperature: float = 0.7,
-        max_tokens: int = 2000,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
         json_mode: bool = False,
     ) -> Dict[str, Any]:
-        """
-        Генерация текста через DeepSeek API
-        """
         if not self.api_key:
             raise ValueError("DeepSeek API key not configured")
 
@@ -51,39 +203,123 @@ class DeepSeekClient:
         if json_mode:
             payload["response_format"] = {"type": "json_object"}
 
+        return payload
+
+    async def generate_completion(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        json_mode: bool = False,
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Генерация текста через DeepSeek API
+
+        Ответ из кэша помечается "cached": True.
+        """
+        payload = self._build_payload(
+            prompt, system_prompt, temperature, max_tokens, json_mode
+        )
+
+        cache_key = None
+        if use_cache and self.cache is not None:
+            cache_key = response_cache_key(payload)
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return {**cached, "cached": True}
+
+        if self.retry is not None:
+            result = await self.retry.run(lambda: self._post_completion(payload))
+        else:
+            result = await self._post_completion(payload)
+
+        if cache_key is not None:
+            await self.cache.set(cache_key, result)
+        return result
+
+    async def _post_completion(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Одна попытка запроса к API"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=self.headers,
-                    json=payload,
-                    timeout=60,
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return {
-                            "content": data["choices"][0]["message"]["content"],
-                            "tokens_used": data.get("usage", {}),
-                            "model": data["model"],
-                        }
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"DeepSeek API error: {error_text}")
-                        raise Exception(f"API error: {response.status}")
+            session = await self._get_session()
+            async with self._limit(payload) as lease, session.post(
+                f"{self.base_url}/chat/completions",
+                json=payload,
+                timeout=self._request_timeout(),
+            ) as response:
+                if response.status != 200:
+                    await self._raise_api_error(response)
+
+                data = await response.json()
+                result = {
+                    "content": data["choices"][0]["message"]["content"],
+                    "tokens_used": data.get("usage", {}),
+                    "model": data["model"],
+                }
+            record_usage(result["tokens_used"])
+            if lease is not None:
+                await lease.settle(result["tokens_used"].get("total_tokens"))
+            return result
 
         except Exception as e:
-            logger.error(f"Error calling DeepSeek API: {e}")
+            logger.error(f"Error calling DeepSeek API: {e!r}")
             raise
 
-    async def generate_structured(
+    def stream_completion(
         self,
         prompt: str,
-        response_schema: Dict[str, Any],
         system_prompt: Optional[str] = None,
-    ) -> Dict[str, Any]:
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        use_cache: bool = True,
+    ) -> "CompletionStream":
         """
-        Генерация структурированного JSON ответа
+        Потоковая генерация текста (stream=true, server-sent events)
+
+        Использование:
+            stream = client.stream_completion(prompt)
+            async for delta in stream:
+                ...
+            stream.result()  # как у generate_completion
+
+        Ответ из кэша отдаётся одним фрагментом.
         """
+        payload = self._build_payload(prompt, system_prompt, temperature, max_tokens)
+        # Ключ как у generate_completion: потоковый и обычный вызов делят кэш
+        cache_key = (
+            response_cache_key(payload)
+            if use_cache and self.cache is not None
+            else None
+        )
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+        return CompletionStream(self, payload, cache_key)
+
+    async def forget_cached(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        json_mode: bool = False,
+    ) -> None:
+        """Удалить ответ из кэша (например, если он оказался непригодным)"""
+        if self.cache is None:
+            return
+        payload = self._build_payload(
+            prompt, system_prompt, temperature, max_tokens, json_mode
+        )
+        await self.cache.delete(response_cache_key(payload))
+
+    async def _structured_completion(
+        self,
+        prompt: str,
+        response_schema: Dict[str, Any],
+        system_prompt: Optional[str],
+        use_cache: bool,
+    ) -> Tuple[str, str]:
+        """Запрос JSON по схеме; возвращает (промпт, текст ответа)"""
         schema_str = json.dumps(response_schema, indent=2)
         enhanced_prompt = f"""{prompt}
 
@@ -93,17 +329,196 @@ class DeepSeekClient:
 Верни ТОЛЬКО JSON без каких-либо пояснений, кода бэктиков или markdown."""
 
         result = await self.generate_completion(
-            prompt=enhanced_prompt, system_prompt=system_prompt, json_mode=True
+            prompt=enhanced_prompt,
+            system_prompt=system_prompt,
+            json_mode=True,
+            use_cache=use_cache,
         )
+        return enhanced_prompt, result["content"]
 
+    async def generate_structured(
+        self,
+        prompt: str,
+        response_schema: Dict[str, Any],
+        system_prompt: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Генерация структурированного JSON ответа
+        """
+        enhanced_prompt, content = await self._structured_completion(
+            prompt, response_schema, system_prompt, use_cache
+        )
         try:
-            return json.loads(result["content"])
-        except json.JSONDecodeError as e:
+            return extract_json(content)
+        except ValueError as e:
             logger.error(f"Failed to parse JSON from AI response: {e}")
-            # Попробуем извлечь JSON из текста
-            import re
+            # Непригодный ответ не должен отдаваться из кэша повторно
+            if use_cache:
+                await self.forget_cached(enhanced_prompt, system_prompt, json_mode=True)
+            raise
+
+    async def generate_model(
+        self,
+        prompt: str,
+        response_model: Type[M],
+        system_prompt: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> M:
+        """
+        Генерация ответа сразу в pydantic-модель (model_validate_json, без dict)
+        """
+        enhanced_prompt, content = await self._structured_completion(
+            prompt, response_model.model_json_schema(), system_prompt, use_cache
+        )
+        try:
+            return validate_json(response_model, content)
+        except ValueError as e:
+            logger.error(f"AI response does not match {response_model.__name__}: {e}")
+            if use_cache:
+                await self.forget_cached(enhanced_prompt, system_prompt, json_mode=True)
+            raise
+
+
+class CompletionStream:
+    """
+    Потоковый ответ DeepSeek: асинхронный итератор по фрагментам текста.
+
+    После исчерпания итератора result() возвращает полный текст
+    и блок usage из последнего чанка.
+    """
+
+    def __init__(
+        self,
+        client: DeepSeekClient,
+        payload: Dict[str, Any],
+        cache_key: Optional[str] = None,
+    ):
+        self._client = client
+        self._payload = payload
+        self._cache_key = cache_key
+        self._parts: List[str] = []
+        self.tokens_used: Dict[str, Any] = {}
+        self.model: str = payload["model"]
+        self.cached = False
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[str]:
+        cache = self._client.cache
+        if self._cache_key is not None:
+            cached = await cache.get(self._cache_key)
+            if cached is not None:
+                self.cached = True
+                self.tokens_used = cached["tokens_used"]
+                self.model = cached["model"]
+                self._parts.append(cached["content"])
+                yield cached["content"]
+                return
+
+        retry = self._client.retry
+        attempt = 0
+        while True:
+            try:
+                async for delta in self._attempt():
+                    yield delta
+                break
+            except Exception as e:
+                # Повторяем, только пока наружу не ушло ни одного фрагмента
+                if self._parts or retry is None or not await retry.wait(e, attempt):
+                    raise
+                attempt += 1
+
+        # В кэш попадает только полностью дочитанный ответ
+        if self._cache_key is not None and self._parts:
+            await cache.set(self._cache_key, self.result())
+
+    async def _attempt(self) -> AsyncIterator[str]:
+        """Одна попытка потокового запроса"""
+        try:
+            session = await self._client._get_session()
+            # Слот лимитера занят, пока читается поток
+            async with self._client._limit(self._payload) as lease, session.post(
+                f"{self._client.base_url}/chat/completions",
+                json=self._payload,
+                timeout=self._client._request_timeout(),
+            ) as response:
+                if response.status != 200:
+                    await self._client._raise_api_error(response)
+
+                async for data in iter_sse_data(response.content):
+                    if data == "[DONE]":
+                        break
+
+                    chunk = json.loads(data)
+                    self.model = chunk.get("model", self.model)
+                    if chunk.get("usage"):
+                        self.tokens_used = chunk["usage"]
 
-            json_match = re.search(r"\{.*\}", result["content"], re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
+                    for choice in chunk.get("choices") or []:
+                        delta = (choice.get("delta") or {}).get("content")
+                        if delta:
+                            self._parts.append(delta)
+                            yield delta
+
+            record_usage(self.tokens_used)
+            if lease is not None:
+                await lease.settle(self.tokens_used.get("total_tokens"))
+
+        except Exception as e:
+            logger.error(f"Error streaming from DeepSeek API: {e!r}")
             raise
+
+    @property
+    def content(self) -> str:
+        return "".join(self._parts)
+
+    def result(self) -> Dict[str, Any]:
+        result = {
+            "content": self.content,
+            "tokens_used": self.tokens_used,
+            "model": self.model,
+        }
+        if self.cached:
+            result["cached"] = True
+        return result
+
+
+async def iter_sse_data(lines: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Разбор потока server-sent events: отдаёт поле data каждого события
+
+    Docs: https://html.spec.whatwg.org/multipage/server-sent-events.html
+    """
+    data_lines: List[str] = []
+    async for raw in lines:
+        line = raw.decode("utf-8").rstrip("\r\n")
+
+        # Пустая строка завершает событие
+        if not line:
+            if data_lines:
+                yield "\n".join(data_lines)
+                data_lines = []
+            continue
+
+        # Комментарии (keep-alive пинги)
+        if line.startswith(":"):
+            continue
+
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            data_lines.append(value)
+
+    if data_lines:
+        yield "\n".join(data_lines)
+
+
+# Общий клиент приложения: пул соединений и кэш ответов переиспользуют все агенты
+deepseek_client = DeepSeekClient(
+    cache=create_response_cache(),
+    limiter=create_rate_limiter(),
+    retry=RetryPolicy(),
+)
@@ -0,0 +1,33 @@
+import asyncio
+from typing import Optional
+
+import aiohttp
+
+
+class DeepSeekAPIError(Exception):
+    """Ответ API с ошибкой: HTTP-статус и Retry-After (секунды), если был"""
+
+    def __init__(self, status: int, retry_after: Optional[float] = None, detail: str = ""):
+        super().__init__(f"API error: {status}")
+        self.status = status
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+class DeadlineExceeded(Exception):
+    """Исчерпан бюджет времени генерации"""
+
+
+# Перегрузка и сбои на стороне провайдера; остальные 4xx — ошибка запроса
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Имеет ли смысл повторить запрос после этой ошибки"""
+    if isinstance(error, DeepSeekAPIError):
+        return error.status in RETRYABLE_STATUSES or error.status >= 500
+    # Таймауты, обрывы соединения и недочитанные ответы
+    return isinstance(
+        error,
+        (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError),
+    )
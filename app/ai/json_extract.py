@@ -0,0 +1,123 @@
+"""
+Извлечение JSON из ответа модели: markdown-обёртка, пояснения до и после.
+
+Docs:
+https://github.com/ijl/orjson
+https://docs.pydantic.dev/latest/concepts/json/#json-parsing
+"""
+
+import json
+import re
+from typing import Any, Iterator, List, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+try:
+    # Быстрый парсер, если установлен (pip install orjson); в зависимости не входит
+    import orjson
+
+    JSON_BACKEND = "orjson"
+
+    def json_loads(text: str) -> Any:
+        return orjson.loads(text)
+
+except ImportError:  # pragma: no cover - зависит от окружения
+    JSON_BACKEND = "json"
+    json_loads = json.loads
+
+M = TypeVar("M", bound=BaseModel)
+
+# Строка JSON целиком (скобки внутри неё не считаются) или скобка
+_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[{}]', re.DOTALL)
+
+
+def _outermost(spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Внешние из пар скобок, упорядоченных по закрывающей скобке"""
+    # Внешний объект закрывается после вложенных и начинается раньше них
+    outer = []
+    min_start = float("inf")
+    for start, end in reversed(spans):
+        if start < min_start:
+            outer.append((start, end))
+            min_start = start
+    outer.reverse()
+    return outer
+
+
+def iter_json_objects(text: str) -> Iterator[str]:
+    """
+    Внешние сбалансированные {...} из текста в порядке появления
+
+    Один проход по структурным символам (строки JSON пропускаются целиком,
+    скобки внутри них не считаются); кавычки вне объектов — текст
+    пояснений, их не учитываем. Генератор ленивый: объект отдаётся, как
+    только закрылся, хвост ответа не сканируется, если объект подошёл.
+    Объекты внутри непарной { из пояснений отдаются в конце.
+    """
+    stack: List[int] = []
+    nested: List[Tuple[int, int]] = []
+    pos = text.find("{")
+    while pos != -1:
+        for token in _TOKEN.finditer(text, pos):
+            char = token.group()
+            if char == "{":
+                stack.append(token.start())
+            elif char == "}":
+                start = stack.pop()
+                if not stack:
+                    break
+                nested.append((start, token.end()))
+        else:
+            break
+
+        # Внешний объект закрылся: вне объектов кавычки не считаем
+        nested.clear()
+        yield text[start : token.end()]
+        pos = text.find("{", token.end())
+
+    for start, end in _outermost(nested):
+        yield text[start:end]
+
+
+def _candidates(text: str) -> Iterator[str]:
+    """
+    Что пробовать разобрать, от дешёвого к дорогому: весь текст, срез от
+    первой { до последней } (markdown-обёртка, пояснения без скобок),
+    затем сбалансированные объекты
+    """
+    yield text
+    first, last = text.find("{"), text.rfind("}")
+    if first != -1 and last > first and (first, last + 1) != (0, len(text)):
+        yield text[first : last + 1]
+    yield from iter_json_objects(text)
+
+
+def extract_json(text: str) -> Any:
+    """
+    JSON из ответа модели
+
+    Обычно (json_mode) ответ — чистый JSON и разбирается с первой
+    попытки. JSONDecodeError, если ничего не разобралось.
+    """
+    for candidate in _candidates(text):
+        try:
+            return json_loads(candidate)
+        except ValueError:
+            continue
+    raise json.JSONDecodeError("No JSON object found in AI response", text, 0)
+
+
+def validate_json(model: Type[M], text: str) -> M:
+    """
+    Модель из ответа без промежуточного dict (model_validate_json)
+
+    Берётся первый кандидат, который проходит валидацию: примеры
+    и обрывки JSON в пояснениях пропускаются.
+    """
+    error = None
+    for candidate in _candidates(text):
+        try:
+            return model.model_validate_json(candidate)
+        except ValidationError as e:
+            error = e
+    raise error
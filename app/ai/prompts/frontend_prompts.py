@@ -1,13 +1,17 @@
-from typing import Dict
-from app.ai.schemas import WebsiteStructure
+import json
+from typing import Any, Dict, Optional
+from app.ai.schemas import WebsiteSection, WebsiteStructure
+from app.ai.sections import SECTIONS_PLACEHOLDER
 
 
 class FrontendPrompts:
     """Шаблоны промптов для генерации фронтенда"""
 
     @staticmethod
-    def get_structure_prompt(user_prompt: str) -> str:
-        return f"""Проанализируй запрос пользователя и создай структуру веб-сайта.
+    def get_structure_prompt(
+        user_prompt: str, example: Optional[Dict[str, Any]] = None
+    ) -> str:
+        prompt = f"""Проанализируй запрос пользователя и создай структуру веб-сайта.
 
 Запрос пользователя: "{user_prompt}"
 
@@ -26,6 +30,15 @@ class FrontendPrompts:
 
 Секции должны быть логичными и соответствовать запросу пользователя."""
 
+        if example:
+            # Структура похожего прошлого запроса (StructureIndex)
+            prompt += f"""
+
+Пример структуры для похожего запроса (используй как образец, но
+подстрой название, секции и тексты под текущий запрос):
+{json.dumps(example, ensure_ascii=False)}"""
+        return prompt
+
     @staticmethod
     def get_html_prompt(
         structure: WebsiteStructure, color_scheme: Dict[str, str]
@@ -61,6 +74,31 @@ class FrontendPrompts:
 6. Включи Font Awesome для иконок
 7. Создай навигационное меню с якорными ссылками на секции
 
+Верни ТОЛЬКО HTML код без пояснений."""
+
+    @staticmethod
+    def get_shell_prompt(
+        structure: WebsiteStructure, color_scheme: Dict[str, str]
+    ) -> str:
+        nav = "\n".join(
+            f"- #{s.type.value}: {s.title}"
+            for s in sorted(structure.sections, key=lambda s: s.order)
+        )
+        return f"""Сгенерируй каркас HTML-страницы сайта (без содержимого секций).
+
+Название: {structure.name}
+Описание: {structure.description}
+Цветовая схема: {color_scheme}
+
+Пункты навигации (якорь: подпись):
+{nav}
+
+Требования:
+1. <!DOCTYPE html>, <head> с мета-тегами для SEO и подключением Font Awesome
+2. <header> с навигационным меню по якорным ссылкам из списка выше
+3. <main>, внутри которого только комментарий {SECTIONS_PLACEHOLDER}
+4. Короткий <footer>
+
 Верни ТОЛЬКО HTML код без пояснений."""
 
     @staticmethod
@@ -86,5 +124,60 @@ class FrontendPrompts:
 5. Используй modern CSS (Grid, Flexbox)
 6. Добавь стили для навигации, кнопок, форм
 7. Включи reset/normalize стили
+8. Стили каждой секции помести в отдельный блок между комментариями
+   /* section:<тип> */ и /* /section:<тип> */ (например /* section:hero */)
+
+Верни ТОЛЬКО CSS код без пояснений."""
+
+    @staticmethod
+    def _section_brief(section: WebsiteSection, instructions: Optional[str]) -> str:
+        brief = f"""Тип секции: {section.type.value}
+Заголовок: {section.title}
+Описание: {section.description or 'Описание секции'}"""
+        if instructions:
+            brief += f"\nПожелания к изменениям: {instructions}"
+        return brief
+
+    @staticmethod
+    def get_section_html_prompt(
+        structure: WebsiteStructure,
+        section: WebsiteSection,
+        color_scheme: Dict[str, str],
+        instructions: Optional[str] = None,
+    ) -> str:
+        section_type = section.type.value
+        return f"""Сгенерируй HTML одной секции сайта "{structure.name}" ({structure.description}).
+
+{FrontendPrompts._section_brief(section, instructions)}
+Цветовая схема: {color_scheme}
+
+Требования:
+1. Ровно один элемент <section id="{section_type}" class="section-{section_type}">
+2. Внутри — <div class="container"> с содержимым секции
+3. Семантические HTML5 теги, без <html>, <head>, <body> и навигации
+
+Верни ТОЛЬКО HTML этой секции без пояснений."""
+
+    @staticmethod
+    def get_section_css_prompt(
+        structure: WebsiteStructure,
+        section: WebsiteSection,
+        color_scheme: Dict[str, str],
+        instructions: Optional[str] = None,
+    ) -> str:
+        section_type = section.type.value
+        return f"""Создай CSS для одной секции сайта "{structure.name}".
+
+{FrontendPrompts._section_brief(section, instructions)}
+Цветовая схема:
+- Основной: {color_scheme.get('primary', '#3a86ff')}
+- Вторичный: {color_scheme.get('secondary', '#8338ec')}
+- Фон: {color_scheme.get('background', '#0d1b2a')}
+- Текст: {color_scheme.get('text', '#e0e1dd')}
+
+Требования:
+1. Все селекторы начинаются с .section-{section_type}
+2. Адаптивность для mobile/tablet/desktop
+3. Без reset-стилей и общих правил для всей страницы
 
 Верни ТОЛЬКО CSS код без пояснений."""
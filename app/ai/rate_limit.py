@@ -0,0 +1,277 @@
+"""
+Docs:
+https://en.wikipedia.org/wiki/Token_bucket
+https://docs.python.org/3/library/asyncio-sync.html#semaphore
+https://docs.sqlalchemy.org/en/20/orm/queryguide/query.html#sqlalchemy.orm.Query.with_for_update
+"""
+
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models.rate_limit import RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+
+def _take(
+    tokens: float,
+    updated_at: float,
+    now: float,
+    amount: float,
+    rate: float,
+    capacity: float,
+) -> Tuple[float, float]:
+    """
+    Пополнить bucket за прошедшее время и списать amount.
+
+    Баланс может уйти в минус (резерв в долг): вызывающий ждёт, пока
+    долг не погасится, поэтому очередь обслуживается строго по порядку
+    резервирования. Отрицательный amount — возврат.
+    Возвращает (новый баланс, сколько секунд ждать).
+    """
+    tokens = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+    tokens = min(capacity, tokens - amount)
+    return tokens, max(0.0, -tokens / rate)
+
+
+class BucketStore(ABC):
+    """Хранилище состояния token bucket"""
+
+    @abstractmethod
+    async def reserve(
+        self, name: str, amount: float, rate: float, capacity: float
+    ) -> float:
+        """Списать amount; вернуть задержку в секундах до разрешения запроса"""
+        pass
+
+
+class MemoryBucketStore(BucketStore):
+    """Bucket в памяти процесса"""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    async def reserve(
+        self, name: str, amount: float, rate: float, capacity: float
+    ) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(name, (capacity, now))
+        tokens, delay = _take(tokens, updated_at, now, amount, rate, capacity)
+        self._buckets[name] = (tokens, now)
+        return delay
+
+
+class DatabaseBucketStore(BucketStore):
+    """
+    Bucket в таблице rate_limit_buckets: лимит общий для всех процессов.
+
+    Строка блокируется (SELECT ... FOR UPDATE) на время пересчёта,
+    время — по часам хостов (time.time()).
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
+        self.session_factory = session_factory
+
+    async def reserve(
+        self, name: str, amount: float, rate: float, capacity: float
+    ) -> float:
+        for attempt in range(2):
+            try:
+                return await self._reserve(name, amount, rate, capacity)
+            except IntegrityError:
+                # Строку одновременно создал другой процесс — повторяем
+                if attempt:
+                    raise
+
+    async def _reserve(
+        self, name: str, amount: float, rate: float, capacity: float
+    ) -> float:
+        async with self.session_factory() as session, session.begin():
+            now = time.time()
+            bucket = await session.scalar(
+                select(RateLimitBucket)
+                .where(RateLimitBucket.name == name)
+                .with_for_update()
+            )
+            if bucket is None:
+                bucket = RateLimitBucket(name=name, tokens=capacity, updated_at=now)
+                session.add(bucket)
+
+            bucket.tokens, delay = _take(
+                bucket.tokens, bucket.updated_at, now, amount, rate, capacity
+            )
+            bucket.updated_at = now
+            return delay
+
+
+def estimate_tokens(payload: Dict[str, Any]) -> int:
+    """Грубая оценка токенов запроса до ответа: ~4 символа на токен + max_tokens"""
+    chars = sum(len(m.get("content") or "") for m in payload.get("messages", []))
+    return chars // 4 + int(payload.get("max_tokens") or 0)
+
+
+class RateLimitLease:
+    """Разрешение на один запрос; settle() уточняет списанные токены по usage"""
+
+    def __init__(self, limiter: "LLMRateLimiter", estimated_tokens: int):
+        self._limiter = limiter
+        self.estimated_tokens = estimated_tokens
+
+    async def settle(self, actual_tokens: Optional[int]) -> None:
+        if actual_tokens is None or not self._limiter.tokens_per_minute:
+            return
+        diff = actual_tokens - self.estimated_tokens
+        if diff:
+            await self._limiter._reserve_tokens(diff)
+        self.estimated_tokens = actual_tokens
+
+
+class LLMRateLimiter:
+    """
+    Лимитер исходящих запросов к LLM.
+
+    Ограничивает число одновременных запросов (семафор) и темп:
+    запросы в минуту и токены в минуту (token bucket). Ожидающие
+    обслуживаются в порядке поступления. После 429 новые запросы
+    ждут Retry-After (pause).
+
+    С DatabaseBucketStore лимиты RPM/TPM общие для всех процессов;
+    max_concurrency действует в пределах процесса.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        burst_seconds: Optional[float] = None,
+        store: Optional[BucketStore] = None,
+        name: str = "deepseek",
+    ):
+        self.max_concurrency = (
+            settings.LLM_MAX_CONCURRENCY if max_concurrency is None else max_concurrency
+        )
+        self.requests_per_minute = (
+            settings.LLM_REQUESTS_PER_MINUTE
+            if requests_per_minute is None
+            else requests_per_minute
+        )
+        self.tokens_per_minute = (
+            settings.LLM_TOKENS_PER_MINUTE
+            if tokens_per_minute is None
+            else tokens_per_minute
+        )
+        self.burst_seconds = (
+            settings.LLM_RATE_BURST_SECONDS if burst_seconds is None else burst_seconds
+        )
+        self.store = store or MemoryBucketStore()
+        self.name = name
+
+        # 0 — без ограничения
+        self._slots = (
+            asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        )
+        self._paused_until = 0.0
+        self.in_flight = 0
+        self.waiting = 0
+        self.throttled = 0
+
+    def _bucket(self, kind: str, per_minute: float) -> Tuple[str, float, float]:
+        rate = per_minute / 60
+        # Небольшой запас на всплеск: темп ровный, без пачек по минуте
+        capacity = max(1.0, rate * self.burst_seconds)
+        return f"{self.name}:{kind}", rate, capacity
+
+    def _limits(self, estimated_tokens: int) -> List[Tuple[str, float, float, float]]:
+        limits = []
+        if self.requests_per_minute:
+            name, rate, capacity = self._bucket("requests", self.requests_per_minute)
+            limits.append((name, 1, rate, capacity))
+        if self.tokens_per_minute and estimated_tokens:
+            name, rate, capacity = self._bucket("tokens", self.tokens_per_minute)
+            limits.append((name, estimated_tokens, rate, capacity))
+        return limits
+
+    async def _reserve_tokens(self, amount: int) -> None:
+        name, rate, capacity = self._bucket("tokens", self.tokens_per_minute)
+        await self.store.reserve(name, amount, rate, capacity)
+
+    @asynccontextmanager
+    async def acquire(self, estimated_tokens: int = 0) -> AsyncIterator[RateLimitLease]:
+        """Дождаться слота и бюджета; внутри блока выполняется запрос"""
+        self.waiting += 1
+        try:
+            if self._slots is not None:
+                await self._slots.acquire()
+            try:
+                await self._wait_budget(estimated_tokens)
+            except BaseException:
+                if self._slots is not None:
+                    self._slots.release()
+                raise
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            yield RateLimitLease(self, estimated_tokens)
+        finally:
+            self.in_flight -= 1
+            if self._slots is not None:
+                self._slots.release()
+
+    async def _wait_budget(self, estimated_tokens: int) -> None:
+        reserved = []
+        try:
+            delay = 0.0
+            for name, amount, rate, capacity in self._limits(estimated_tokens):
+                delay = max(delay, await self.store.reserve(name, amount, rate, capacity))
+                reserved.append((name, amount, rate, capacity))
+            if delay:
+                await asyncio.sleep(delay)
+
+            while (pause := self._paused_until - time.monotonic()) > 0:
+                await asyncio.sleep(pause)
+
+        except asyncio.CancelledError:
+            # Запрос не состоялся: возвращаем бюджет очереди
+            for name, amount, rate, capacity in reserved:
+                await self.store.reserve(name, -amount, rate, capacity)
+            raise
+
+    def pause(self, seconds: float) -> None:
+        """Провайдер ответил 429: не отправлять новые запросы seconds секунд"""
+        self.throttled += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        logger.warning(f"LLM rate limited by provider, pausing for {seconds:.1f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "throttled": self.throttled,
+        }
+
+
+def create_rate_limiter() -> LLMRateLimiter:
+    """Лимитер из настроек; LLM_RATE_LIMIT_STORE=database — общий для процессов"""
+    store: Optional[BucketStore] = None
+    if settings.LLM_RATE_LIMIT_STORE == "database":
+        from app.core.database import AsyncSessionLocal
+
+        store = DatabaseBucketStore(AsyncSessionLocal)
+    elif settings.LLM_RATE_LIMIT_STORE != "memory":
+        raise ValueError(
+            f"Unsupported LLM_RATE_LIMIT_STORE: {settings.LLM_RATE_LIMIT_STORE}"
+        )
+    return LLMRateLimiter(store=store)
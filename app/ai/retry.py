@@ -0,0 +1,127 @@
+"""
+Docs:
+https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+https://docs.python.org/3/library/contextvars.html
+"""
+
+import asyncio
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Iterator, Optional, TypeVar
+
+from app.ai.errors import DeadlineExceeded, is_retryable
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Крайний срок текущей генерации по time.monotonic(); None — без ограничения
+generation_deadline: ContextVar[Optional[float]] = ContextVar(
+    "generation_deadline", default=None
+)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Бюджет времени на генерацию: все вызовы LLM внутри блока (и в задачах,
+    созданных в нём) укладываются в seconds. Вложенный бюджет не может
+    продлить внешний.
+    """
+    if not seconds:
+        yield
+        return
+
+    deadline = time.monotonic() + seconds
+    outer = generation_deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+
+    token = generation_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        generation_deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """Сколько секунд осталось до крайнего срока (None — срока нет)"""
+    deadline = generation_deadline.get()
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("Generation deadline exceeded")
+    return remaining
+
+
+class RetryPolicy:
+    """
+    Повтор запросов к LLM при временных ошибках.
+
+    Повторяются 429, 5xx, таймауты и обрывы соединения; остальные 4xx
+    сразу пробрасываются. Пауза — экспоненциальная с полным джиттером,
+    но не меньше Retry-After из ответа. Повтор не начинается, если
+    пауза не укладывается в бюджет генерации (deadline_scope).
+    """
+
+    def __init__(
+        self,
+        max_attempts: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        self.max_attempts = max_attempts or settings.LLM_RETRY_MAX_ATTEMPTS
+        self.base_delay = (
+            settings.LLM_RETRY_BASE_DELAY if base_delay is None else base_delay
+        )
+        self.max_delay = settings.LLM_RETRY_MAX_DELAY if max_delay is None else max_delay
+        self._rng = rng or random.Random()
+        self.retries = 0
+
+    def backoff(self, attempt: int) -> float:
+        """Пауза перед повтором номер attempt (с нуля): full jitter"""
+        return self._rng.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def next_delay(self, error: BaseException, attempt: int) -> Optional[float]:
+        """Пауза перед следующей попыткой или None, если повторять не нужно"""
+        if not is_retryable(error) or attempt + 1 >= self.max_attempts:
+            return None
+
+        delay = self.backoff(attempt)
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        deadline = generation_deadline.get()
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    async def wait(self, error: BaseException, attempt: int) -> bool:
+        """Подождать перед повтором; False — повторять не нужно"""
+        delay = self.next_delay(error, attempt)
+        if delay is None:
+            return False
+        self.retries += 1
+        logger.warning(
+            f"LLM call failed ({error!r}), retry {attempt + 1}/"
+            f"{self.max_attempts - 1} in {delay:.2f}s"
+        )
+        await asyncio.sleep(delay)
+        return True
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            try:
+                return await call()
+            except Exception as e:
+                if not await self.wait(e, attempt):
+                    raise
+                attempt += 1
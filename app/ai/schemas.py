@@ -50,6 +50,7 @@ class GeneratedFrontend(BaseModel):
     css: str
     javascript: str
     structure: WebsiteStructure
+    stage_timings: Dict[str, float] = Field(default_factory=dict)  # секунды по стадиям
 
 
 class GeneratedBackend(BaseModel):
@@ -0,0 +1,106 @@
+"""
+Поиск и замена отдельных секций в сгенерированных HTML и CSS.
+
+Секция в HTML — элемент <section id="{type}" class="section-{type}">
+(так его описывает FrontendPrompts.get_html_prompt). Стили секции в CSS —
+блок между комментариями /* section:{type} */ и /* /section:{type} */.
+Каркас страницы (head, навигация) содержит место для секций SECTIONS_PLACEHOLDER.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+SECTIONS_PLACEHOLDER = "<!-- SECTIONS -->"
+
+_SECTION_TAG = re.compile(r"<(/?)section\b[^>]*>", re.IGNORECASE)
+_CODE_FENCE = re.compile(r"^\s*```[\w-]*\s*\n(.*?)\n?```\s*$", re.DOTALL)
+
+
+def strip_code_fences(text: str) -> str:
+    """Убрать markdown-обёртку ```html ... ```, если модель её добавила"""
+    match = _CODE_FENCE.match(text)
+    return (match.group(1) if match else text).strip()
+
+
+def _is_section_anchor(tag: str, section_type: str) -> bool:
+    return bool(
+        re.search(rf'\bid\s*=\s*["\']{re.escape(section_type)}["\']', tag)
+        or re.search(
+            rf'\bclass\s*=\s*["\'][^"\']*\bsection-{re.escape(section_type)}\b', tag
+        )
+    )
+
+
+def find_section(html: str, section_type: str) -> Optional[Tuple[int, int]]:
+    """Границы [start, end) элемента секции в HTML (с учётом вложенных <section>)"""
+    start = None
+    depth = 0
+    for match in _SECTION_TAG.finditer(html):
+        closing = match.group(1) == "/"
+        if start is None:
+            if not closing and _is_section_anchor(match.group(0), section_type):
+                start = match.start()
+                depth = 1
+            continue
+
+        depth += -1 if closing else 1
+        if depth == 0:
+            return start, match.end()
+    return None
+
+
+def splice_section_html(html: str, section_type: str, fragment: str) -> str:
+    """
+    Заменить секцию в HTML новым фрагментом
+
+    Если секции на странице нет, фрагмент вставляется перед </main>
+    или </body> (или дописывается в конец).
+    """
+    bounds = find_section(html, section_type)
+    if bounds is not None:
+        start, end = bounds
+        return html[:start] + fragment + html[end:]
+    return _insert_into_main(html, fragment)
+
+
+def _insert_into_main(html: str, fragment: str) -> str:
+    for closing in ("</main>", "</body>"):
+        index = html.lower().rfind(closing)
+        if index != -1:
+            return html[:index] + fragment + "\n" + html[index:]
+    return html + "\n" + fragment
+
+
+def css_markers(section_type: str) -> Tuple[str, str]:
+    return f"/* section:{section_type} */", f"/* /section:{section_type} */"
+
+
+def splice_section_css(css: str, section_type: str, rules: str) -> str:
+    """
+    Заменить блок стилей секции
+
+    Без маркеров блок дописывается в конец файла: более поздние правила
+    с той же специфичностью перекрывают старые.
+    """
+    begin, end = css_markers(section_type)
+    block = f"{begin}\n{rules.strip()}\n{end}"
+
+    start = css.find(begin)
+    if start != -1:
+        stop = css.find(end, start)
+        if stop != -1:
+            return css[:start] + block + css[stop + len(end) :]
+    return css.rstrip() + "\n\n" + block + "\n"
+
+
+def assemble_page(shell: str, fragments: List[str]) -> str:
+    """
+    Собрать страницу из каркаса и HTML-фрагментов секций (уже в нужном порядке)
+
+    Фрагменты встают на место SECTIONS_PLACEHOLDER; если модель его
+    потеряла — перед </main> или </body>.
+    """
+    body = "\n".join(fragments)
+    if SECTIONS_PLACEHOLDER in shell:
+        return shell.replace(SECTIONS_PLACEHOLDER, body, 1)
+    return _insert_into_main(shell, body)
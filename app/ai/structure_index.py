@@ -0,0 +1,227 @@
+"""
+Индекс похожих промптов для переиспользования структуры сайта.
+
+Docs:
+https://en.wikipedia.org/wiki/MinHash
+http://infolab.stanford.edu/~ullman/mmds/ch3n.pdf (LSH, раздел 3.4)
+"""
+
+import hashlib
+import random
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from app.core.config import settings
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_PRIME = (1 << 61) - 1
+# Грубый стемминг: "проекты", "проектов", "проектами" -> "проек"
+_STEM_LENGTH = 5
+
+
+def shingles(prompt: str) -> FrozenSet[str]:
+    """Множество признаков промпта: основы слов и пары соседних основ"""
+    stems = [
+        word[:_STEM_LENGTH]
+        for word in _WORD.findall(prompt.lower().replace("ё", "е"))
+        if len(word) > 2
+    ]
+    pairs = (f"{a} {b}" for a, b in zip(stems, stems[1:]))
+    return frozenset((*stems, *pairs))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """MinHash-сигнатуры: доля совпавших позиций оценивает сходство Жаккара"""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, features: FrozenSet[str]) -> Tuple[int, ...]:
+        hashes = [
+            int.from_bytes(
+                hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "big"
+            )
+            for f in features
+        ]
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self._params)
+
+
+@dataclass
+class _Entry:
+    prompt: str
+    features: FrozenSet[str]
+    signature: Tuple[int, ...]
+    structure: Dict[str, Any]
+    owner: Optional[int] = None
+    hits: int = 0
+
+
+@dataclass
+class StructureMatch:
+    prompt: str
+    structure: Dict[str, Any]
+    similarity: float
+
+
+class StructureIndex:
+    """
+    Индекс прошлых промптов и сгенерированных для них структур.
+
+    Кандидаты ищутся через LSH по MinHash-сигнатурам (полосы по rows
+    значений), затем сходство уточняется точным Жаккаром по признакам.
+    Выше reuse_threshold структура берётся готовой, выше seed_threshold —
+    подсказывается модели как пример. Вытеснение — LRU до max_size записей.
+    Хранится в памяти процесса.
+
+    Записи разделены по владельцу (owner, id пользователя): в структуре
+    тексты пользователя (название, описание, заголовки и содержимое
+    секций), и другому пользователю она не отдаётся ни готовой, ни
+    примером в промпте.
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        reuse_threshold: Optional[float] = None,
+        seed_threshold: Optional[float] = None,
+        num_perm: int = 128,
+        rows: int = 4,
+    ):
+        if num_perm % rows:
+            raise ValueError("num_perm must be divisible by rows")
+        self.max_size = max_size or settings.STRUCTURE_CACHE_MAX_SIZE
+        self.reuse_threshold = (
+            settings.STRUCTURE_CACHE_THRESHOLD
+            if reuse_threshold is None
+            else reuse_threshold
+        )
+        self.seed_threshold = (
+            settings.STRUCTURE_SEED_THRESHOLD if seed_threshold is None else seed_threshold
+        )
+        self.rows = rows
+        self.hasher = MinHasher(num_perm)
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # (владелец, номер полосы, значения полосы) -> ключи записей
+        self._buckets: Dict[Tuple[Any, ...], set] = {}
+        self.reused = 0
+        self.seeded = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _bands(self, signature: Tuple[int, ...], owner: Optional[int]):
+        for band, start in enumerate(range(0, len(signature), self.rows)):
+            yield owner, band, signature[start : start + self.rows]
+
+    def _key(self, features: FrozenSet[str], owner: Optional[int]) -> str:
+        return f"{owner}\x1e" + "\x1f".join(sorted(features))
+
+    def add(
+        self, prompt: str, structure: Dict[str, Any], owner: Optional[int] = None
+    ) -> None:
+        features = shingles(prompt)
+        if not features:
+            return
+        key = self._key(features, owner)
+        if key in self._entries:
+            self._entries[key].structure = structure
+            self._entries.move_to_end(key)
+            return
+
+        entry = _Entry(
+            prompt, features, self.hasher.signature(features), structure, owner
+        )
+        self._entries[key] = entry
+        for band in self._bands(entry.signature, owner):
+            self._buckets.setdefault(band, set()).add(key)
+
+        while len(self._entries) > self.max_size:
+            self._evict()
+
+    def _evict(self) -> None:
+        key, entry = self._entries.popitem(last=False)
+        for band in self._bands(entry.signature, entry.owner):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+        self.evictions += 1
+
+    def lookup(
+        self, prompt: str, owner: Optional[int] = None
+    ) -> Optional[StructureMatch]:
+        """
+        Самая похожая прошлая структура владельца со сходством не ниже
+        seed_threshold
+
+        Считает статистику: reused (можно взять готовой), seeded, misses.
+        """
+        features = shingles(prompt)
+        if not features or not self._entries:
+            self.misses += 1
+            return None
+
+        key = self._key(features, owner)
+        if key in self._entries:
+            candidates = {key}
+        else:
+            candidates = set()
+            for band in self._bands(self.hasher.signature(features), owner):
+                candidates |= self._buckets.get(band, set())
+
+        best_key, best = None, 0.0
+        for candidate in candidates:
+            similarity = jaccard(features, self._entries[candidate].features)
+            if similarity > best:
+                best_key, best = candidate, similarity
+
+        if best_key is None or best < self.seed_threshold:
+            self.misses += 1
+            return None
+
+        entry = self._entries[best_key]
+        self._entries.move_to_end(best_key)
+        entry.hits += 1
+        if best >= self.reuse_threshold:
+            self.reused += 1
+        else:
+            self.seeded += 1
+        return StructureMatch(entry.prompt, entry.structure, best)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.reused + self.seeded + self.misses
+        return {
+            "size": len(self._entries),
+            "reused": self.reused,
+            "seeded": self.seeded,
+            "misses": self.misses,
+            "reuse_rate": self.reused / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+def create_structure_index() -> Optional[StructureIndex]:
+    if not settings.STRUCTURE_CACHE_ENABLED:
+        return None
+    return StructureIndex()
+
+
+# Общий индекс процесса (None, если STRUCTURE_CACHE_ENABLED=false)
+structure_index = create_structure_index()
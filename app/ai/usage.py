@@ -0,0 +1,126 @@
+"""
+Учёт токенов LLM по стадиям генерации.
+
+UsageMeter копит usage ответов провайдера (без ответов из кэша) в памяти,
+пока идёт задание; в БД пакетом уходит ещё не записанная часть — вместе
+с чекпоинтом стадии и с итогом задания (app/repositories/usage_repo.py),
+а не коммитом на каждый вызов.
+
+Docs: https://docs.python.org/3/library/contextvars.html
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+
+@dataclass
+class StageUsage:
+    stage: str
+    agent: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    calls: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+class UsageMeter:
+    """
+    Токены одного задания по парам (стадия, агент).
+
+    Владелец (проект, пользователь, задание) запоминается при создании:
+    после rollback ORM-объекты задания нельзя читать без запроса к БД.
+    """
+
+    def __init__(
+        self,
+        project_id: UUID,
+        user_id: Optional[int] = None,
+        job_id: Optional[UUID] = None,
+    ):
+        self.project_id = project_id
+        self.user_id = user_id
+        self.job_id = job_id
+        self._stages: Dict[Tuple[str, str], StageUsage] = {}
+        # Уже записанное в БД (закоммиченное) — по тем же ключам
+        self._recorded: Dict[Tuple[str, str], StageUsage] = {}
+
+    def add(self, agent: str, stage: str, usage: Dict[str, Any]) -> None:
+        key = (stage, agent)
+        entry = self._stages.get(key)
+        if entry is None:
+            entry = self._stages[key] = StageUsage(stage, agent)
+        entry.prompt_tokens += int(usage.get("prompt_tokens") or 0)
+        entry.completion_tokens += int(usage.get("completion_tokens") or 0)
+        entry.calls += 1
+
+    def entries(self) -> List[StageUsage]:
+        return list(self._stages.values())
+
+    def unrecorded(self) -> "UsageMeter":
+        """Ещё не записанные токены: счётчик того же задания с разницей"""
+        delta = UsageMeter(self.project_id, self.user_id, self.job_id)
+        for key, entry in self._stages.items():
+            done = self._recorded.get(key) or StageUsage(entry.stage, entry.agent)
+            diff = StageUsage(
+                entry.stage,
+                entry.agent,
+                entry.prompt_tokens - done.prompt_tokens,
+                entry.completion_tokens - done.completion_tokens,
+                entry.calls - done.calls,
+            )
+            if diff.calls or diff.total_tokens:
+                delta._stages[key] = diff
+        return delta
+
+    def mark_recorded(self, delta: "UsageMeter") -> None:
+        """Отметить delta (из unrecorded()) записанным — после коммита"""
+        for key, entry in delta._stages.items():
+            done = self._recorded.setdefault(key, StageUsage(entry.stage, entry.agent))
+            done.prompt_tokens += entry.prompt_tokens
+            done.completion_tokens += entry.completion_tokens
+            done.calls += entry.calls
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(e.prompt_tokens for e in self._stages.values())
+
+    @property
+    def completion_tokens(self) -> int:
+        return sum(e.completion_tokens for e in self._stages.values())
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def calls(self) -> int:
+        return sum(e.calls for e in self._stages.values())
+
+    def by_stage(self) -> Dict[str, Dict[str, int]]:
+        """{stage: {"prompt": ..., "completion": ...}} — для projects.tokens_used"""
+        stages: Dict[str, Dict[str, int]] = {}
+        for entry in self._stages.values():
+            totals = stages.setdefault(entry.stage, {"prompt": 0, "completion": 0})
+            totals["prompt"] += entry.prompt_tokens
+            totals["completion"] += entry.completion_tokens
+        return stages
+
+
+# Счётчик текущего задания; наследуется задачами стадий
+usage_meter: ContextVar[Optional[UsageMeter]] = ContextVar("usage_meter", default=None)
+
+
+@contextmanager
+def usage_scope(meter: UsageMeter) -> Iterator[UsageMeter]:
+    """Все вызовы LLM внутри блока (и в задачах, созданных в нём) идут в meter"""
+    token = usage_meter.set(meter)
+    try:
+        yield meter
+    finally:
+        usage_meter.reset(token)
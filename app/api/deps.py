@@ -1,15 +1,15 @@
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
+from jose import JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.config import settings
 from app.core.database import get_db_session
+from app.core.security import decode_access_token
 from app.repositories.user_repo import UserRepository
 from app.models import User
+from app.services.user_cache import user_cache
 
 bearer_scheme = HTTPBearer(auto_error=True)
-ALGORITHM = "HS256"
 
 user_repo = UserRepository()
 
@@ -21,19 +21,22 @@ async def get_current_user(
     token = credentials.credentials
 
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[ALGORITHM],
-        )
+        payload = decode_access_token(token)
         email: str | None = payload.get("sub")
         if not email:
             raise HTTPException(status_code=401, detail="Invalid token payload")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = await user_repo.get_by_email(session, email)
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+    # Тёплый запрос обходится без похода в БД
+    user = await user_cache.get(session, email)
+    if user is None:
+        user = await user_repo.get_by_email(session, email)
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        await user_cache.set(user)
+
+    if not user.is_active:
+        raise HTTPException(status_code=401, detail="Inactive user")
 
     return user
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db_session
+from app.core.security import HashingBusyError
 from app.schemas.auth import RegisterIn, LoginIn, TokenOut
 from app.services.auth_service import AuthService
 from app.repositories.user_repo import UserRepository
@@ -12,6 +13,14 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 auth_service = AuthService(UserRepository())
 
 
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy, try again later",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=TokenOut)
 async def register(
     payload: RegisterIn,
@@ -24,6 +33,8 @@ async def register(
             payload.password,
         )
         return TokenOut(access_token=token)
+    except HashingBusyError:
+        raise _hashing_busy()
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -40,6 +51,8 @@ async def login(
             payload.password,
         )
         return TokenOut(access_token=token)
+    except HashingBusyError:
+        raise _hashing_busy()
     except ValueError:
         raise HTTPException(
             status_code=401,
@@ -1,13 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from typing import Dict, Any
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from typing import AsyncIterator, Dict, Any, List, Optional
 from uuid import UUID
-from pydantic import BaseModel
+import json
+import math
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.ai.schemas import SectionType
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.core.database import get_db_session
+from app.models import User
+from app.models.artifact import ArtifactKind
+from app.models.project import ProjectStatus
+from app.repositories.project_repo import ProjectRepository
+from app.services.admission import AdmissionRejected, admission_controller
 from app.services.generation_service import GenerationService
+from app.services.idempotency import IdempotencyService, request_hash
 import logging
 
 router = APIRouter(prefix="/generate", tags=["generation"])
 logger = logging.getLogger(__name__)
 
+generation_service = GenerationService()
+project_repo = ProjectRepository()
+idempotency_service = IdempotencyService()
+
 
 class GenerateRequest(BaseModel):
     prompt: str
@@ -15,15 +33,59 @@ class GenerateRequest(BaseModel):
     color_scheme: str = "тёмная"
 
 
+class RegenerateSectionsRequest(BaseModel):
+    sections: List[SectionType] = Field(..., min_length=1)
+    instructions: Optional[str] = None
+
+
+async def _require_owner(session: AsyncSession, project_id: UUID, user: User) -> None:
+    """404, если проекта нет или он чужой: чужой проект неотличим от несуществующего"""
+    if not await project_repo.is_owned(session, project_id, user.id):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+
+async def _admit(
+    session: AsyncSession,
+    user: User,
+    project_id: Optional[UUID] = None,
+    enqueue: bool = True,
+) -> None:
+    """Допуск генерации (AdmissionController.admit): отказ — 429 или 503"""
+    try:
+        await admission_controller.admit(session, user.id, project_id, enqueue)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+        )
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Форматирование события server-sent events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 @router.post("/start")
 async def start_generation(
     request: GenerateRequest,
-    background_tasks: BackgroundTasks,
-    service: GenerationService = Depends(),
+    session: AsyncSession = Depends(get_db_session),
+    user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(
+        None, alias="Idempotency-Key", min_length=1, max_length=255
+    ),
 ) -> Dict[str, Any]:
     """
     Запуск генерации сайта по промпту
 
+    Проект попадает в список пользователя (GET /projects). Число идущих
+    генераций, темп запросов и глубина очереди ограничены: при отказе —
+    429/503 с Retry-After.
+
+    С заголовком Idempotency-Key повтор запроса возвращает project_id
+    исходного и текущий статус ("replayed": true), не запуская генерацию
+    заново; тот же ключ с другим телом — 409.
+
     Пример запроса:
     {
         "prompt": "Создай сайт-портфолио с секциями: обо мне, проекты, контакты",
@@ -31,57 +93,341 @@ async def start_generation(
         "color_scheme": "тёмная"
     }
     """
-    try:
-        result = await service.start_generation(
-            user_prompt=request.prompt, project_name=request.project_name
+    payload_hash = request_hash(request.model_dump())
+
+    async def start() -> Dict[str, Any]:
+        await _admit(session, user)
+        return await generation_service.start_generation(
+            session,
+            user_prompt=request.prompt,
+            project_name=request.project_name,
+            color_scheme=request.color_scheme,
+            user_id=user.id,
+            idempotency_key=idempotency_key,
+            request_hash=payload_hash,
         )
 
-        # В реальном приложении здесь будет вызов фоновой задачи
-        # background_tasks.add_task(service.process_generation, result["project_id"])
+    try:
+        if idempotency_key is None:
+            result = await start()
+        else:
+            result = await idempotency_service.run(
+                session, user.id, idempotency_key, payload_hash, start
+            )
+
+        # Генерацию выполняет воркер очереди (python -m app.worker),
+        # API-процесс не ждёт LLM
 
         return {
             "success": True,
             **result,
-            "next_steps": "Используйте /generate/status/{project_id} для отслеживания",
+            "next_steps": (
+                "Подпишитесь на /generate/events/{project_id} (text/event-stream) "
+                "или запросите /generate/status/{project_id}"
+            ),
         }
+    except HTTPException:
+        raise
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Generation start failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/retry/{project_id}")
+async def retry_generation(
+    project_id: UUID,
+    session: AsyncSession = Depends(get_db_session),
+    user: User = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    Повтор упавшей генерации своего проекта: уже завершённые стадии
+    берутся из чекпоинта. Лимиты — как у /generate/start.
+    """
+    await _require_owner(session, project_id, user)
+    await _admit(session, user)
+    try:
+        result = await generation_service.retry_generation(session, project_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Project not found")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return {"success": True, **result}
+
+
+@router.post("/sections/{project_id}")
+async def regenerate_sections(
+    project_id: UUID,
+    request: RegenerateSectionsRequest,
+    session: AsyncSession = Depends(get_db_session),
+    user: User = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    Перегенерация отдельных секций своего готового сайта
+
+    Пример запроса:
+    {
+        "sections": ["hero", "contact"],
+        "instructions": "Сделай заголовок короче, добавь кнопку звонка"
+    }
+    """
+    await _require_owner(session, project_id, user)
+    try:
+        project = await generation_service.get_result(session, project_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    if project.status != ProjectStatus.READY:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Project is not ready: {project.status.value}",
+        )
+
+    artifacts = await generation_service.get_artifacts(
+        session, project_id, [ArtifactKind.STRUCTURE]
+    )
+    available = {
+        section["type"]
+        for section in artifacts.get("structure", {}).get("sections", [])
+    }
+    missing = [s.value for s in request.sections if s.value not in available]
+    if missing:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Sections not in project structure: {missing}",
+        )
+
+    # Правка идёт мимо очереди, но вызовы LLM — в тех же лимитах
+    await _admit(session, user, enqueue=False)
+
+    try:
+        result = await generation_service.regenerate_sections(
+            session,
+            project_id,
+            [s.value for s in request.sections],
+            request.instructions,
+        )
+    except Exception as e:
+        logger.error(f"Section regeneration failed: {e}")
+        raise HTTPException(status_code=502, detail=str(e))
+
+    return {"success": True, **result}
+
+
 @router.get("/status/{project_id}")
 async def get_generation_status(
-    project_id: UUID, service: GenerationService = Depends()
+    project_id: UUID,
+    session: AsyncSession = Depends(get_db_session),
+    user: User = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    Текущий статус генерации своего проекта
+
+    Для отслеживания используйте /generate/events/{project_id}, а не
+    опрос этого эндпоинта в цикле.
+    """
+    await _require_owner(session, project_id, user)
+    try:
+        return await generation_service.get_status(session, project_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+
+# Статусы проекта, после которых генерация больше не идёт
+TERMINAL_STATUSES = {ProjectStatus.READY.value, ProjectStatus.FAILED.value}
+
+
+@router.get("/events/{project_id}")
+async def generation_events(
+    project_id: UUID,
+    session: AsyncSession = Depends(get_db_session),
+    user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    События генерации своего проекта (text/event-stream)
+
+    Первое событие — status со снимком из БД, дальше — status (смена
+    статуса проекта или задания) и stage (стадия завершена) по мере
+    работы воркера. Поток закрывается после статуса ready или failed,
+    а также если шина событий потеряла соединение: переподключившийся
+    клиент получит свежий снимок. Открытый поток не держит соединение с БД.
+    """
+    await _require_owner(session, project_id, user)
+    # Подписка до снимка: событие между ними не потеряется
+    subscription = await generation_service.subscribe(project_id)
+    try:
+        snapshot = await generation_service.get_status(session, project_id)
+    except ValueError:
+        subscription.close()
+        raise HTTPException(status_code=404, detail="Project not found")
+    finally:
+        # Соединение возвращается в пул сразу, а не по окончании потока
+        await session.close()
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            yield _sse("status", snapshot)
+            if snapshot["status"] in TERMINAL_STATUSES:
+                return
+            while True:
+                event = await subscription.get(
+                    timeout=settings.GENERATION_EVENTS_KEEPALIVE
+                )
+                if event is None:
+                    if subscription.closed:
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                name = event.pop("event")
+                yield _sse(name, event)
+                if name == "status" and event["status"] in TERMINAL_STATUSES:
+                    return
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/result/{project_id}")
+async def get_generation_result(
+    project_id: UUID,
+    session: AsyncSession = Depends(get_db_session),
+    user: User = Depends(get_current_user),
 ) -> Dict[str, Any]:
-    """Получение статуса генерации"""
-    # Здесь будет логика получения статуса из БД
-    # Пока заглушка
+    """Получение результатов генерации своего проекта (готовых, из БД)"""
+    await _require_owner(session, project_id, user)
+    try:
+        project = await generation_service.get_result(session, project_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    if project.status != ProjectStatus.READY:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Project is not ready: {project.status.value}",
+        )
+
+    artifacts = await generation_service.get_artifacts(session, project_id)
+    html = artifacts.get("html", "")
+    css = artifacts.get("css", "")
     return {
+        "success": True,
         "project_id": str(project_id),
-        "status": "generating",
-        "message": "Генерация в процессе",
+        "html": html[:500] + "..." if len(html) > 500 else html,
+        "css": css[:500] + "..." if len(css) > 500 else css,
+        "has_javascript": bool(artifacts.get("javascript")),
+        "structure": artifacts.get("structure"),
     }
 
 
-@router.get("/result/{project_id}")
-async def get_generation_result(
-    project_id: UUID, service: GenerationService = Depends()
+@router.get("/artifacts/{project_id}/{kind}")
+async def get_artifact(
+    project_id: UUID,
+    kind: ArtifactKind,
+    version: Optional[int] = Query(None, ge=1),
+    session: AsyncSession = Depends(get_db_session),
+    user: User = Depends(get_current_user),
 ) -> Dict[str, Any]:
-    """Получение результатов генерации"""
+    """Полный код одного артефакта своего проекта (по умолчанию — последняя версия)"""
+    await _require_owner(session, project_id, user)
     try:
-        # В реальном приложении тут будет получение из БД
-        result = await service.generate_frontend(project_id)
+        artifact = await generation_service.get_artifact(
+            session, project_id, kind, version
+        )
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Artifact not found")
 
-        return {
-            "success": True,
-            "project_id": str(project_id),
-            "html": (
-                result.html[:500] + "..." if len(result.html) > 500 else result.html
-            ),
-            "css": result.css[:500] + "..." if len(result.css) > 500 else result.css,
-            "has_javascript": bool(result.javascript),
-            "structure": result.structure.dict(),
-        }
-    except Exception as e:
-        logger.error(f"Failed to get result: {e}")
-        raise HTTPException(status_code=404, detail="Project not found or not ready")
+    return {
+        "project_id": str(project_id),
+        "kind": kind.value,
+        "version": artifact.version,
+        "size": artifact.size,
+        "sha256": artifact.content_hash,
+        "created_at": artifact.created_at,
+        "content": await generation_service.read_artifact(artifact),
+    }
+
+
+ARTIFACT_MEDIA_TYPES = {
+    ArtifactKind.STRUCTURE: "application/json",
+    ArtifactKind.HTML: "text/html; charset=utf-8",
+    ArtifactKind.CSS: "text/css; charset=utf-8",
+    ArtifactKind.JAVASCRIPT: "text/javascript; charset=utf-8",
+    ArtifactKind.BACKEND: "text/x-python; charset=utf-8",
+}
+
+
+@router.get("/artifacts/{project_id}/{kind}/raw")
+async def get_artifact_raw(
+    project_id: UUID,
+    kind: ArtifactKind,
+    version: Optional[int] = Query(None, ge=1),
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_db_session),
+    user: User = Depends(get_current_user),
+) -> Response:
+    """
+    Код артефакта своего проекта как файл
+
+    ETag — SHA-256 содержимого: одинаковый код у разных проектов
+    кэшируется клиентом один раз, а при совпадении ETag блоб не читается.
+    """
+    await _require_owner(session, project_id, user)
+    try:
+        artifact = await generation_service.get_artifact(
+            session, project_id, kind, version
+        )
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    headers = {"Cache-Control": "private, no-cache"}
+    if artifact.content_hash:
+        headers["ETag"] = f'"{artifact.content_hash}"'
+        if if_none_match == headers["ETag"]:
+            return Response(status_code=304, headers=headers)
+
+    return Response(
+        content=await generation_service.read_artifact(artifact),
+        media_type=ARTIFACT_MEDIA_TYPES[kind],
+        headers=headers,
+    )
+
+
+@router.get("/stream/{project_id}")
+async def stream_generation(
+    project_id: UUID,
+    session: AsyncSession = Depends(get_db_session),
+    user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    Потоковая генерация своего проекта (text/event-stream)
+
+    События: start, token (фрагменты html/css/javascript по мере генерации;
+    при FRONTEND_HTML_MODE=sections — html:shell, html:<тип секции>),
+    stage (стадия завершена), done (итог) или error.
+    """
+    await _require_owner(session, project_id, user)
+    # Генерация этого проекта уже учтена при /start, остальные лимиты — те же
+    await _admit(session, user, project_id, enqueue=False)
+
+    async def events() -> AsyncIterator[str]:
+        # Первый байт уходит сразу, не дожидаясь ответа модели
+        yield _sse("start", {"project_id": str(project_id)})
+        try:
+            async for event in generation_service.stream_frontend(session, project_id):
+                yield _sse(event.pop("event"), event)
+        except Exception as e:
+            logger.error(f"Streaming generation failed: {e}")
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
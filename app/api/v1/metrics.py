@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db_session
+from app.core.metrics import CONTENT_TYPE, JOB_QUEUE_DEPTH, registry
+from app.models.job import QUEUED_JOB_STATUSES
+from app.repositories.job_repo import JobRepository
+
+router = APIRouter(tags=["metrics"])
+
+job_repo = JobRepository()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(session: AsyncSession = Depends(get_db_session)) -> Response:
+    """Метрики процесса API для Prometheus (глубина очереди — одним запросом)"""
+    counts = await job_repo.count_by_status(session, QUEUED_JOB_STATUSES)
+    for status in QUEUED_JOB_STATUSES:
+        JOB_QUEUE_DEPTH.labels(status.value).set(counts.get(status, 0))
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
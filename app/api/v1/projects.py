@@ -0,0 +1,46 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user
+from app.core.database import get_db_session
+from app.models import User
+from app.repositories.project_repo import ProjectRepository
+from app.schemas.project import ProjectOut, ProjectPageOut
+from app.services.project_service import ProjectService
+
+router = APIRouter(prefix="/projects", tags=["projects"])
+
+project_service = ProjectService(ProjectRepository())
+
+
+@router.get("", response_model=ProjectPageOut)
+async def list_projects(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """Проекты пользователя, новые первыми; ?cursor= — следующая страница"""
+    try:
+        page = await project_service.list_my(
+            session, user_id=user.id, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ProjectPageOut.model_validate(page)
+
+
+@router.get("/{project_id}", response_model=ProjectOut)
+async def get_project(
+    project_id: UUID,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+):
+    project = await project_service.get_my(
+        session, user_id=user.id, project_id=project_id
+    )
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project
@@ -1,11 +1,30 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.deps import get_current_user
+from app.core.database import get_db_session
+from app.repositories.usage_repo import UsageRepository
+from app.schemas.usage import UsageReportOut
 from app.schemas.user import UserOut
+from app.services.usage_service import UsageService
 from app.models import User
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+usage_service = UsageService(UsageRepository())
+
 
 @router.get("/me", response_model=UserOut)
 async def me(user: User = Depends(get_current_user)):
     return user
+
+
+@router.get("/me/usage", response_model=UsageReportOut)
+async def my_usage(
+    days: int = Query(30, ge=1, le=366),
+    top: int = Query(10, ge=1, le=100),
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """Расход токенов LLM за days дней: по дням, самые затратные проекты, стадии"""
+    report = await usage_service.report(session, user.id, days=days, top=top)
+    return UsageReportOut.model_validate(report)
@@ -0,0 +1,185 @@
+"""
+Docs:
+https://docs.python.org/3/library/collections.html#collections.OrderedDict
+https://redis.readthedocs.io/en/stable/examples/asyncio_examples.html
+"""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Ограниченный по размеру LRU-кэш с TTL в памяти процесса.
+
+    TTL задаётся на весь кэш или отдельно для записи (expires_at,
+    по time.monotonic()). Считает попадания и промахи.
+    Не потокобезопасен: рассчитан на один цикл событий.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[K, tuple[float, V]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K, default: Any = None) -> Any:
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            self.misses += 1
+            return default
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self,
+        key: K,
+        value: V,
+        ttl: Optional[float] = None,
+        expires_at: Optional[float] = None,
+    ) -> None:
+        if expires_at is None:
+            ttl = self.ttl if ttl is None else ttl
+            expires_at = time.monotonic() + ttl if ttl is not None else float("inf")
+
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class SharedCache(ABC):
+    """
+    Общий для процессов кэш (строковые ключи и значения).
+
+    Реализации: InMemorySharedCache (тесты, один процесс) и RedisSharedCache.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        pass
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    async def incr(self, key: str, amount: int, ttl: float) -> int:
+        """Атомарно прибавить amount к счётчику (новый живёт ttl секунд)"""
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemorySharedCache(SharedCache):
+    """Локальная замена общего кэша для тестов и запуска в одном процессе"""
+
+    def __init__(self, max_size: int = 100_000):
+        self._cache: TTLCache[str, str] = TTLCache(max_size=max_size)
+        self._lock = asyncio.Lock()
+
+    async def get(self, key: str) -> Optional[str]:
+        async with self._lock:
+            return self._cache.get(key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        async with self._lock:
+            self._cache.set(key, value, ttl=ttl)
+
+    async def delete(self, key: str) -> None:
+        async with self._lock:
+            self._cache.delete(key)
+
+    async def incr(self, key: str, amount: int, ttl: float) -> int:
+        async with self._lock:
+            value = int(self._cache.get(key) or 0) + amount
+            self._cache.set(key, str(value), ttl=ttl)
+            return value
+
+
+class RedisSharedCache(SharedCache):
+    """Общий кэш в Redis (нужен пакет redis, в зависимости не входит)"""
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError(
+                "RedisSharedCache requires the 'redis' package: pip install redis"
+            ) from e
+
+        self._redis = redis_asyncio.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await self._redis.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(key)
+
+    async def incr(self, key: str, amount: int, ttl: float) -> int:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.incrby(key, amount)
+            # NX: срок ставится только новому счётчику
+            pipe.pexpire(key, max(1, int(ttl * 1000)), nx=True)
+            value, _ = await pipe.execute()
+        return int(value)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def create_shared_cache(url: Optional[str]) -> Optional[SharedCache]:
+    """CACHE_URL: пусто — без общего кэша, memory:// — локальная замена, redis://..."""
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return InMemorySharedCache()
+    if url.startswith(("redis://", "rediss://")):
+        return RedisSharedCache(url)
+    raise ValueError(f"Unsupported CACHE_URL: {url}")
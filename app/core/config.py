@@ -16,5 +16,134 @@ class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL")
     DATABASE_URL_SYNC: str = os.getenv("DATABASE_URL_SYNC", "")
 
+    # DeepSeek API и пул HTTP-соединений к нему
+    DEEPSEEK_API_KEY: str | None = os.getenv("DEEPSEEK_API_KEY")
+    DEEPSEEK_BASE_URL: str = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com/v1")
+    DEEPSEEK_TIMEOUT: float = float(os.getenv("DEEPSEEK_TIMEOUT", "60"))
+    DEEPSEEK_POOL_LIMIT: int = int(os.getenv("DEEPSEEK_POOL_LIMIT", "100"))
+    DEEPSEEK_POOL_LIMIT_PER_HOST: int = int(
+        os.getenv("DEEPSEEK_POOL_LIMIT_PER_HOST", "20")
+    )
+    DEEPSEEK_KEEPALIVE_TIMEOUT: float = float(
+        os.getenv("DEEPSEEK_KEEPALIVE_TIMEOUT", "60")
+    )
+    DEEPSEEK_DNS_CACHE_TTL: int = int(os.getenv("DEEPSEEK_DNS_CACHE_TTL", "300"))
+
+    # Лимиты исходящих запросов к LLM (0 — без ограничения)
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    LLM_REQUESTS_PER_MINUTE: float = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+    LLM_TOKENS_PER_MINUTE: float = float(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+    LLM_RATE_BURST_SECONDS: float = float(os.getenv("LLM_RATE_BURST_SECONDS", "1"))
+    # memory — в процессе, database — общий для воркеров bucket в БД
+    LLM_RATE_LIMIT_STORE: str = os.getenv("LLM_RATE_LIMIT_STORE", "memory")
+
+    # Цена токенов LLM для отчётов расхода (USD за 1M токенов)
+    LLM_PRICE_PROMPT_PER_MTOK: float = float(
+        os.getenv("LLM_PRICE_PROMPT_PER_MTOK", "0.27")
+    )
+    LLM_PRICE_COMPLETION_PER_MTOK: float = float(
+        os.getenv("LLM_PRICE_COMPLETION_PER_MTOK", "1.10")
+    )
+
+    # Повторы запросов к LLM и бюджет времени на одну генерацию (сек, 0 — без срока)
+    LLM_RETRY_MAX_ATTEMPTS: int = int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "4"))
+    LLM_RETRY_BASE_DELAY: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+    LLM_RETRY_MAX_DELAY: float = float(os.getenv("LLM_RETRY_MAX_DELAY", "20"))
+    GENERATION_DEADLINE: float = float(os.getenv("GENERATION_DEADLINE", "300"))
+
+    # HTML одним вызовом (single) или каркас + вызов на каждую секцию (sections)
+    FRONTEND_HTML_MODE: str = os.getenv("FRONTEND_HTML_MODE", "single")
+
+    # Индекс похожих промптов: структура берётся готовой при сходстве (Жаккар)
+    # не ниже STRUCTURE_CACHE_THRESHOLD или подсказывается модели как пример
+    # при сходстве не ниже STRUCTURE_SEED_THRESHOLD
+    STRUCTURE_CACHE_ENABLED: bool = (
+        os.getenv("STRUCTURE_CACHE_ENABLED", "false").lower() == "true"
+    )
+    STRUCTURE_CACHE_THRESHOLD: float = float(
+        os.getenv("STRUCTURE_CACHE_THRESHOLD", "0.9")
+    )
+    STRUCTURE_SEED_THRESHOLD: float = float(os.getenv("STRUCTURE_SEED_THRESHOLD", "0.5"))
+    STRUCTURE_CACHE_MAX_SIZE: int = int(os.getenv("STRUCTURE_CACHE_MAX_SIZE", "5000"))
+
+    # Хранилище сгенерированного кода (блобы по SHA-256, сжатые):
+    # file:///path, s3://bucket/prefix (параметры ниже) или memory:// (тесты)
+    ARTIFACT_STORE_URL: str = os.getenv(
+        "ARTIFACT_STORE_URL", f"file://{BASE_DIR / 'data' / 'artifacts'}"
+    )
+    ARTIFACT_S3_ENDPOINT: str = os.getenv(
+        "ARTIFACT_S3_ENDPOINT", "https://s3.amazonaws.com"
+    )
+    ARTIFACT_S3_REGION: str = os.getenv("ARTIFACT_S3_REGION", "us-east-1")
+    ARTIFACT_S3_ACCESS_KEY: str = os.getenv("ARTIFACT_S3_ACCESS_KEY", "")
+    ARTIFACT_S3_SECRET_KEY: str = os.getenv("ARTIFACT_S3_SECRET_KEY", "")
+    ARTIFACT_S3_TIMEOUT: float = float(os.getenv("ARTIFACT_S3_TIMEOUT", "30"))
+    # zstd (пакет zstandard), gzip или auto — zstd, если установлен
+    ARTIFACT_COMPRESSION: str = os.getenv("ARTIFACT_COMPRESSION", "auto")
+    ARTIFACT_CACHE_MAX_SIZE: int = int(os.getenv("ARTIFACT_CACHE_MAX_SIZE", "256"))
+
+    # Пул для bcrypt: "thread" или "process"
+    PASSWORD_HASH_EXECUTOR: str = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+    PASSWORD_HASH_WORKERS: int = int(
+        os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1))
+    )
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = float(
+        os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "2.0")
+    )
+
+    # Кэши: CACHE_URL — общий кэш процессов (пусто, memory:// или redis://...)
+    CACHE_URL: str = os.getenv("CACHE_URL", "")
+    USER_CACHE_TTL: float = float(os.getenv("USER_CACHE_TTL", "60"))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+    JWT_CACHE_MAX_SIZE: int = int(os.getenv("JWT_CACHE_MAX_SIZE", "10000"))
+
+    # Кэш ответов DeepSeek: память + каталог на диске (LLM_CACHE_DIR, пусто — без диска)
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_TTL: float = float(os.getenv("LLM_CACHE_TTL", "86400"))
+    LLM_CACHE_MAX_SIZE: int = int(os.getenv("LLM_CACHE_MAX_SIZE", "512"))
+    LLM_CACHE_DIR: str = os.getenv("LLM_CACHE_DIR", "")
+    LLM_CACHE_MAX_BYTES: int = int(
+        os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024))
+    )
+
+    # Очередь заданий генерации (app/worker.py)
+    JOB_WORKER_CONCURRENCY: int = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+    JOB_LEASE_SECONDS: int = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+    JOB_HEARTBEAT_SECONDS: int = int(os.getenv("JOB_HEARTBEAT_SECONDS", "15"))
+    JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    # Порт /metrics воркера (0 — не открывать)
+    WORKER_METRICS_PORT: int = int(os.getenv("WORKER_METRICS_PORT", "0"))
+
+    # Допуск новых генераций (/generate/start; 0 — без ограничения):
+    # идущих генераций на пользователя, запросов пользователя за скользящее
+    # окно ADMISSION_RATE_WINDOW сек и заданий в очереди на весь сервис.
+    # Счётчики окна — в памяти процесса или в общем кэше (CACHE_URL)
+    ADMISSION_MAX_ACTIVE_PER_USER: int = int(
+        os.getenv("ADMISSION_MAX_ACTIVE_PER_USER", "3")
+    )
+    ADMISSION_RATE_LIMIT: int = int(os.getenv("ADMISSION_RATE_LIMIT", "10"))
+    ADMISSION_RATE_WINDOW: float = float(os.getenv("ADMISSION_RATE_WINDOW", "60"))
+    ADMISSION_MAX_QUEUE_DEPTH: int = int(os.getenv("ADMISSION_MAX_QUEUE_DEPTH", "500"))
+    # Глубина очереди перечитывается из БД не чаще раза в N сек
+    ADMISSION_QUEUE_DEPTH_TTL: float = float(
+        os.getenv("ADMISSION_QUEUE_DEPTH_TTL", "1.0")
+    )
+    # Retry-After при отказе по числу генераций или глубине очереди (сек)
+    ADMISSION_RETRY_AFTER: float = float(os.getenv("ADMISSION_RETRY_AFTER", "15"))
+
+    # Idempotency-Key для /generate/start: сколько сек повтор с тем же
+    # ключом получает ответ исходного запроса
+    IDEMPOTENCY_KEY_TTL: float = float(os.getenv("IDEMPOTENCY_KEY_TTL", "86400"))
+
+    # События генерации для подписчиков (/generate/events): memory — один
+    # процесс, postgres — LISTEN/NOTIFY между API и воркерами, auto — postgres,
+    # если DATABASE_URL на Postgres. Комментарий keep-alive в потоке — раз в N сек
+    GENERATION_EVENTS_BACKEND: str = os.getenv("GENERATION_EVENTS_BACKEND", "auto")
+    GENERATION_EVENTS_KEEPALIVE: float = float(
+        os.getenv("GENERATION_EVENTS_KEEPALIVE", "15")
+    )
+
 
 settings = Settings()
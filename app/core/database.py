@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from .config import settings
+from .metrics import instrument_engine
 
 
 engine = create_async_engine(
@@ -14,6 +15,7 @@ engine = create_async_engine(
     echo=settings.DEBUG,  # логирование SQL при DEBUG=true
     future=True,
 )
+instrument_engine(engine.sync_engine)
 
 
 # Фабрика сессий
@@ -0,0 +1,276 @@
+"""
+Pub/sub событий заданий генерации: смена статуса проекта и завершение стадий.
+
+Docs:
+https://www.postgresql.org/docs/current/sql-notify.html
+https://magicstack.github.io/asyncpg/current/api/index.html#asyncpg.connection.Connection.add_listener
+"""
+
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Set
+
+import asyncpg
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    Подписка на канал: очередь событий в памяти процесса.
+
+    Очередь ограничена: медленный подписчик теряет самые старые события,
+    а не держит память и публикацию. Подписку, которая могла пропустить
+    события (потеряно соединение шины), шина прерывает: closed = True.
+    """
+
+    def __init__(self, bus: "EventBus", channel: str, max_size: int = 100):
+        self.bus = bus
+        self.channel = channel
+        self._queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue(maxsize=max_size)
+        self.dropped = 0
+        self.closed = False
+
+    def _put(self, event: Dict[str, Any]) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(event)
+
+    def _abort(self) -> None:
+        """Прервать подписку: ожидающий get() сразу вернёт None"""
+        self.closed = True
+        self._put({})
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Следующее событие; None, если за timeout ничего не пришло
+        или подписка прервана (closed)
+        """
+        if self.closed:
+            return None
+        try:
+            event = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        return None if self.closed else event
+
+    def close(self) -> None:
+        self.bus._unsubscribe(self)
+
+
+class EventBus(ABC):
+    """
+    Шина событий с доставкой подписчикам этого процесса.
+
+    MemoryEventBus — публикация и подписчики в одном процессе (API
+    вместе с воркером, тесты); PostgresEventBus — между процессами
+    через LISTEN/NOTIFY. Подписчики не держат соединений с БД: на
+    процесс приходится одно слушающее соединение.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self.published = 0
+        self.delivered = 0
+
+    @abstractmethod
+    async def publish(self, channel: str, event: Dict[str, Any]) -> None:
+        pass
+
+    async def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(self, channel)
+        self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.channel)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.channel]
+
+    def _deliver(self, channel: str, event: Dict[str, Any]) -> None:
+        for subscription in self._subscribers.get(channel, ()):
+            subscription._put(event)
+            self.delivered += 1
+
+    def _abort_all(self) -> None:
+        """Прервать все подписки: подписчики переподпишутся и получат снимок"""
+        for subscriptions in list(self._subscribers.values()):
+            for subscription in list(subscriptions):
+                subscription._abort()
+                self._unsubscribe(subscription)
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "channels": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+        }
+
+
+class MemoryEventBus(EventBus):
+    """События в памяти процесса"""
+
+    async def publish(self, channel: str, event: Dict[str, Any]) -> None:
+        self.published += 1
+        self._deliver(channel, event)
+
+
+class PostgresEventBus(EventBus):
+    """
+    События через LISTEN/NOTIFY одного канала Postgres.
+
+    Канал подписки передаётся в теле уведомления, по нему события
+    раздаются локальным подписчикам. Соединения открываются лениво:
+    слушающее — при первой подписке, публикующее — при первой публикации.
+    Свои уведомления процесс получает так же, как чужие.
+
+    Уведомления, пришедшие без слушающего соединения, теряются. Поэтому
+    при его потере все подписки прерываются (клиент переподписывается и
+    получает снимок статуса из БД), а соединение сразу восстанавливается
+    в фоне с нарастающей паузой между попытками.
+    """
+
+    CHANNEL = "generation_events"
+    RECONNECT_DELAY = 0.5
+    RECONNECT_MAX_DELAY = 10.0
+    # pg_notify отклоняет уведомления от 8000 байт
+    MAX_PAYLOAD = 7999
+    MAX_TEXT = 1000
+    ESSENTIAL_FIELDS = ("event", "project_id", "status", "job_status", "stage")
+
+    def __init__(self, dsn: str):
+        super().__init__()
+        self.dsn = dsn
+        self._listener: Optional[asyncpg.Connection] = None
+        self._publisher: Optional[asyncpg.Connection] = None
+        self._listen_lock = asyncio.Lock()
+        self._publish_lock = asyncio.Lock()
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def publish(self, channel: str, event: Dict[str, Any]) -> None:
+        payload = self._payload(channel, event)
+        async with self._publish_lock:
+            if self._publisher is None or self._publisher.is_closed():
+                self._publisher = await asyncpg.connect(self.dsn)
+            await self._publisher.execute("SELECT pg_notify($1, $2)", self.CHANNEL, payload)
+        self.published += 1
+
+    def _payload(self, channel: str, event: Dict[str, Any]) -> str:
+        """
+        Тело уведомления в пределах MAX_PAYLOAD байт. Иначе pg_notify
+        отвергнет его и подписчики не узнают, например, о FAILED: длинные
+        строки (текст ошибки) укорачиваются, а если и это не помогло —
+        остаются только поля ESSENTIAL_FIELDS.
+        """
+
+        def dumps(data: Dict[str, Any]) -> str:
+            return json.dumps({"channel": channel, "event": data}, ensure_ascii=False)
+
+        def fits(payload: str) -> bool:
+            return len(payload.encode()) <= self.MAX_PAYLOAD
+
+        payload = dumps(event)
+        if fits(payload):
+            return payload
+
+        shortened = dict(event)
+        for key, value in event.items():
+            if isinstance(value, str) and len(value) > self.MAX_TEXT:
+                shortened[key] = value[: self.MAX_TEXT] + "…"
+        payload = dumps(shortened)
+        if fits(payload):
+            return payload
+
+        return dumps({k: v for k, v in event.items() if k in self.ESSENTIAL_FIELDS})
+
+    async def subscribe(self, channel: str) -> Subscription:
+        await self._listen()
+        return await super().subscribe(channel)
+
+    async def _listen(self) -> None:
+        async with self._listen_lock:
+            if self._listener is None or self._listener.is_closed():
+                self._listener = await asyncpg.connect(self.dsn)
+                self._listener.add_termination_listener(self._on_terminated)
+                await self._listener.add_listener(self.CHANNEL, self._on_notify)
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Malformed event notification: {payload[:200]!r}")
+            return
+        self._deliver(message["channel"], message["event"])
+
+    def _on_terminated(self, connection) -> None:
+        if connection is not self._listener:
+            return
+        logger.warning("Event listener connection lost")
+        self._listener = None
+        self._abort_all()
+        if not self._closed and (
+            self._reconnect_task is None or self._reconnect_task.done()
+        ):
+            self._reconnect_task = asyncio.get_running_loop().create_task(
+                self._reconnect()
+            )
+
+    async def _reconnect(self) -> None:
+        delay = self.RECONNECT_DELAY
+        while not self._closed:
+            try:
+                await self._listen()
+                logger.info("Event listener reconnected")
+                return
+            except Exception as e:
+                logger.warning(f"Event listener reconnect failed: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.RECONNECT_MAX_DELAY)
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            await asyncio.gather(self._reconnect_task, return_exceptions=True)
+        for connection in (self._listener, self._publisher):
+            if connection is not None and not connection.is_closed():
+                await connection.close()
+        self._listener = self._publisher = None
+
+
+def _asyncpg_dsn(url: str) -> str:
+    """postgresql+asyncpg://... -> postgresql://... (asyncpg не знает суффикса драйвера)"""
+    scheme, _, rest = url.partition("://")
+    return f"{scheme.split('+')[0]}://{rest}"
+
+
+def create_event_bus(backend: str) -> EventBus:
+    """
+    GENERATION_EVENTS_BACKEND: memory, postgres или auto (postgres,
+    если DATABASE_URL указывает на Postgres)
+    """
+    database_url = settings.DATABASE_URL or ""
+    if backend == "auto":
+        backend = "postgres" if database_url.startswith("postgres") else "memory"
+    if backend == "memory":
+        return MemoryEventBus()
+    if backend == "postgres":
+        return PostgresEventBus(_asyncpg_dsn(database_url))
+    raise ValueError(f"Unsupported GENERATION_EVENTS_BACKEND: {backend}")
+
+
+# Общая шина процесса (соединения закрываются в lifespan / воркере)
+event_bus = create_event_bus(settings.GENERATION_EVENTS_BACKEND)
@@ -0,0 +1,387 @@
+"""
+Метрики процесса в текстовом формате Prometheus: счётчики, gauge и гистограммы.
+
+Запись — словарь по меткам и bisect по границам корзин, без блокировок
+(один цикл событий). Сбор stats() кэшей и очередей — только при чтении
+/metrics.
+
+Docs:
+https://prometheus.io/docs/instrumenting/exposition_formats/
+https://docs.sqlalchemy.org/en/20/core/events.html
+https://asgi.readthedocs.io/en/latest/specs/www.html
+"""
+
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Границы корзин гистограмм длительности (сек)
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+JOB_BUCKETS = (1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def labels(self, *values: Any) -> Any:
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self) -> Any:
+        pass
+
+    @abstractmethod
+    def _samples(self) -> Iterable[Tuple[str, str, float]]:
+        pass
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for suffix, labels, value in self._samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self):
+        for values, child in self._children.items():
+            yield "_total", _format_labels(self.labelnames, values), child.value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def _samples(self):
+        for values, child in self._children.items():
+            yield "", _format_labels(self.labelnames, values), child.value
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self):
+        names = self.labelnames + ("le",)
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                yield "_bucket", _format_labels(
+                    names, values + (_format_value(bound),)
+                ), cumulative
+            labels = _format_labels(self.labelnames, values)
+            yield "_sum", labels, child.sum
+            yield "_count", labels, cumulative
+
+
+# Сборщик: вызывается при чтении /metrics и возвращает строки формата
+Collector = Callable[[], Iterable[str]]
+
+
+class Registry:
+    def __init__(self, prefix: str = "aiws_"):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+
+    def _register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter(self.prefix + name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self._register(Gauge(self.prefix + name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(
+            Histogram(self.prefix + name, documentation, labelnames, buckets)
+        )
+
+    def collector(self, collect: Collector) -> Collector:
+        self._collectors.append(collect)
+        return collect
+
+    def stats_collector(self, component: str, stats: Callable[[], Optional[Dict]]):
+        """Числовые значения stats() компонента как gauge <prefix><component>_<key>"""
+
+        def collect() -> Iterable[str]:
+            values = stats()
+            for key, value in (values or {}).items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{self.prefix}{component}_{key}"
+                yield f"# TYPE {name} gauge"
+                yield f"{name} {_format_value(value)}"
+
+        return self.collector(collect)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            lines.extend(collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests", "HTTP requests by route and status", ("method", "route", "status")
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency (until the response body is sent)",
+    ("method", "route"),
+)
+DB_ACQUIRE = registry.histogram(
+    "db_connection_acquire_seconds",
+    "Time for a session to get a pooled connection",
+)
+DB_QUERY = registry.histogram(
+    "db_query_duration_seconds", "SQL statement execution time", ("operation",)
+)
+LLM_LATENCY = registry.histogram(
+    "llm_call_duration_seconds",
+    "LLM call latency including retries and rate limiting",
+    ("agent", "stage"),
+    buckets=LLM_BUCKETS,
+)
+LLM_CALLS = registry.counter(
+    "llm_calls", "LLM calls by outcome", ("agent", "stage", "outcome")
+)
+LLM_TOKENS = registry.counter(
+    "llm_tokens", "Tokens billed by the provider", ("agent", "stage", "kind")
+)
+JOB_QUEUE_DEPTH = registry.gauge(
+    "job_queue_depth",
+    "Pending and running jobs by status (read on scrape)",
+    ("status",),
+)
+JOBS_RUNNING = registry.gauge("jobs_running", "Jobs executing in this worker")
+JOB_DURATION = registry.histogram(
+    "job_duration_seconds",
+    "Job execution time by type and final status",
+    ("job_type", "status"),
+    buckets=JOB_BUCKETS,
+)
+
+
+_SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    started = conn.info["query_started"].pop()
+    head = statement.lstrip()[:6].split(None, 1)
+    operation = head[0].upper() if head else "OTHER"
+    DB_QUERY.labels(operation if operation in _SQL_OPERATIONS else "OTHER").observe(
+        time.perf_counter() - started
+    )
+
+
+def _handle_error(exception_context):
+    stack = exception_context.connection and exception_context.connection.info.get(
+        "query_started"
+    )
+    if stack:
+        stack.pop()
+
+
+def _after_transaction_create(session, transaction):
+    if transaction.parent is None:
+        session.info["acquire_started"] = time.perf_counter()
+
+
+def _after_begin(session, transaction, connection):
+    started = session.info.pop("acquire_started", None)
+    if started is not None:
+        DB_ACQUIRE.observe(time.perf_counter() - started)
+
+
+_stats_registered = False
+
+
+def register_stats_collectors() -> None:
+    """
+    stats() общих компонентов процесса: кэши, лимитер LLM, хранилище
+    артефактов, шина событий. Счётчики внутри stats() отдаются как gauge.
+    """
+    global _stats_registered
+    if _stats_registered:
+        return
+    _stats_registered = True
+
+    from app.ai.client import deepseek_client
+    from app.ai.structure_index import structure_index
+    from app.core.events import event_bus
+    from app.core.storage import artifact_store
+    from app.services.admission import admission_controller
+    from app.services.user_cache import user_cache
+
+    registry.stats_collector(
+        "llm_cache", lambda: deepseek_client.cache and deepseek_client.cache.stats()
+    )
+    registry.stats_collector(
+        "llm_limiter",
+        lambda: deepseek_client.limiter and deepseek_client.limiter.stats(),
+    )
+    registry.stats_collector(
+        "structure_index", lambda: structure_index and structure_index.stats()
+    )
+    registry.stats_collector("artifact_store", artifact_store.stats)
+    registry.stats_collector("user_cache", user_cache.stats)
+    registry.stats_collector("generation_events", event_bus.stats)
+    registry.stats_collector("admission", admission_controller.stats)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Время SQL-запросов движка и получения соединения сессиями"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    if not event.contains(Session, "after_begin", _after_begin):
+        event.listen(Session, "after_transaction_create", _after_transaction_create)
+        event.listen(Session, "after_begin", _after_begin)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: число и длительность HTTP-запросов.
+
+    Метка route — шаблон пути (/generate/status/{project_id}), а не сам
+    путь, чтобы число рядов не зависело от идентификаторов в URL.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            HTTP_LATENCY.labels(method, path).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, path, str(status)).inc()
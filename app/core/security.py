@@ -2,12 +2,19 @@
 Docs:
 https://python-jose.readthedocs.io/en/latest/
 https://passlib.readthedocs.io/en/stable/
+https://docs.python.org/3/library/concurrent.futures.html
 """
 
+import asyncio
+import hashlib
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
 from passlib.context import CryptContext
 from jose import jwt
 
+from .cache import TTLCache
 from .config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -23,7 +30,108 @@ def verify_password(password: str, hashed: str) -> bool:
     return pwd_context.verify(password, hashed)
 
 
+class HashingBusyError(Exception):
+    """Пул хэширования паролей перегружен — запрос стоит повторить позже"""
+
+
+class PasswordHasher:
+    """
+    Выполняет bcrypt (100-300 мс CPU) вне цикла событий.
+
+    Работа уходит в ограниченный пул потоков или процессов. Одновременно
+    принимается не больше max_pending операций (в работе + в очереди);
+    если слот не освободился за queue_timeout секунд — HashingBusyError.
+    """
+
+    def __init__(
+        self,
+        kind: str | None = None,
+        workers: int | None = None,
+        max_pending: int | None = None,
+        queue_timeout: float | None = None,
+    ):
+        self.kind = kind or settings.PASSWORD_HASH_EXECUTOR
+        if self.kind not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {self.kind}")
+        self.workers = workers or settings.PASSWORD_HASH_WORKERS
+        self.max_pending = max_pending or settings.PASSWORD_HASH_MAX_PENDING
+        self.queue_timeout = (
+            settings.PASSWORD_HASH_QUEUE_TIMEOUT
+            if queue_timeout is None
+            else queue_timeout
+        )
+
+        self._executor: Executor | None = None
+        self._slots = asyncio.Semaphore(self.max_pending)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="bcrypt"
+                )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise HashingBusyError("Password hashing pool is saturated")
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(verify_password, password, hashed)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
+
+
 def create_access_token(subject: str, expires_minutes: int = 30) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=expires_minutes)
     payload = {"sub": subject, "exp": expire}
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=ALGORITHM)
+
+
+# Уже проверенные токены: SHA-256 токена -> claims, запись живёт до exp
+_verified_tokens: TTLCache[bytes, Dict[str, Any]] = TTLCache(
+    max_size=settings.JWT_CACHE_MAX_SIZE
+)
+
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Проверка подписи и разбор JWT (JWTError, если токен невалиден).
+
+    Повторный токен отдаётся из кэша без HMAC и разбора JSON, пока не
+    наступит его exp. Возвращаемый словарь общий — не изменять.
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+    claims = _verified_tokens.get(digest)
+    if claims is not None:
+        return claims
+
+    claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+
+    exp = claims.get("exp")
+    if isinstance(exp, (int, float)):
+        remaining = exp - time.time()
+        if remaining > 0:
+            _verified_tokens.set(
+                digest, claims, expires_at=time.monotonic() + remaining
+            )
+    return claims
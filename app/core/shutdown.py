@@ -0,0 +1,26 @@
+"""
+Освобождение ресурсов процесса (пулы, соединения, кэши) при остановке.
+
+Docs: https://fastapi.tiangolo.com/advanced/events/#lifespan
+"""
+
+import inspect
+import logging
+from typing import Any, Callable, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+async def close_all(resources: Iterable[Tuple[str, Callable[[], Any]]]) -> None:
+    """
+    Закрыть ресурсы по порядку; close() может быть синхронным.
+
+    Ошибка одного close() пишется в лог и не мешает закрыть остальные.
+    """
+    for name, close in resources:
+        try:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            logger.exception(f"Failed to close {name}")
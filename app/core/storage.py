@@ -0,0 +1,387 @@
+"""
+Хранилище сгенерированного кода: неизменяемые блобы по SHA-256 содержимого.
+
+Docs:
+https://docs.aws.amazon.com/AmazonS3/latest/API/sig-v4-header-based-auth.html
+https://docs.python.org/3/library/gzip.html
+https://python-zstandard.readthedocs.io/en/latest/
+"""
+
+import asyncio
+import gzip
+import hashlib
+import hmac
+import logging
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import quote, urlsplit
+
+import aiohttp
+from yarl import URL
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class BlobStore(ABC):
+    """
+    Хранилище байтов по ключу.
+
+    Реализации: MemoryBlobStore (тесты), LocalBlobStore (каталог на диске)
+    и S3BlobStore (S3-совместимое хранилище: AWS, MinIO, локальная замена).
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    async def put(self, key: str, data: bytes) -> None:
+        pass
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryBlobStore(BlobStore):
+    """Блобы в памяти процесса (тесты)"""
+
+    def __init__(self):
+        self.blobs: Dict[str, bytes] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.blobs.get(key)
+
+    async def put(self, key: str, data: bytes) -> None:
+        self.blobs[key] = data
+
+    async def exists(self, key: str) -> bool:
+        return key in self.blobs
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Блобы в каталоге: <root>/<key[:2]>/<key>
+
+    Запись атомарная (временный файл + os.replace); файловые операции
+    выполняются в потоке, чтобы не держать цикл событий.
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def _read(self, key: str) -> Optional[bytes]:
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def put(self, key: str, data: bytes) -> None:
+        await asyncio.to_thread(self._write, key, data)
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self._path(key).exists)
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+
+
+def sigv4_authorization(
+    method: str,
+    path: str,
+    headers: Dict[str, str],
+    payload_hash: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    now: datetime,
+) -> str:
+    """
+    Заголовок Authorization (AWS Signature V4, сервис s3)
+
+    headers — подписываемые заголовки (host, x-amz-date,
+    x-amz-content-sha256, ...), path — уже закодированный путь.
+    """
+    names = sorted(name.lower() for name in headers)
+    values = {name.lower(): value.strip() for name, value in headers.items()}
+    signed_headers = ";".join(names)
+    canonical_request = "\n".join(
+        [
+            method,
+            path,
+            "",
+            "".join(f"{name}:{values[name]}\n" for name in names),
+            signed_headers,
+            payload_hash,
+        ]
+    )
+
+    datestamp = now.strftime("%Y%m%d")
+    scope = f"{datestamp}/{region}/s3/aws4_request"
+    string_to_sign = "\n".join(
+        [
+            "AWS4-HMAC-SHA256",
+            now.strftime("%Y%m%dT%H%M%SZ"),
+            scope,
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        ]
+    )
+
+    key = _hmac(f"AWS4{secret_key}".encode("utf-8"), datestamp)
+    for part in (region, "s3", "aws4_request"):
+        key = _hmac(key, part)
+    signature = hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+    return (
+        f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, "
+        f"SignedHeaders={signed_headers}, Signature={signature}"
+    )
+
+
+class S3BlobStore(BlobStore):
+    """
+    Блобы в S3-совместимом хранилище (path-style: <endpoint>/<bucket>/<key>)
+
+    Запросы подписываются SigV4 и идут через общий aiohttp-пул, поэтому
+    подходит любой совместимый сервер — AWS, MinIO или локальная замена.
+    """
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        prefix: str = "",
+    ):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self._host = urlsplit(self.endpoint_url).netloc
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=settings.ARTIFACT_S3_TIMEOUT)
+            )
+        return self._session
+
+    async def _request(
+        self, method: str, key: str, data: bytes = b""
+    ) -> tuple[int, bytes]:
+        path = quote(f"/{self.bucket}/{self.prefix}{key}", safe="/-_.~")
+        payload_hash = hashlib.sha256(data).hexdigest()
+        now = datetime.now(timezone.utc)
+        headers = {
+            "host": self._host,
+            "x-amz-content-sha256": payload_hash,
+            "x-amz-date": now.strftime("%Y%m%dT%H%M%SZ"),
+        }
+        headers["Authorization"] = sigv4_authorization(
+            method,
+            path,
+            headers,
+            payload_hash,
+            self.access_key,
+            self.secret_key,
+            self.region,
+            now,
+        )
+
+        async with self._get_session().request(
+            method,
+            URL(self.endpoint_url + path, encoded=True),
+            headers=headers,
+            data=data if method == "PUT" else None,
+        ) as response:
+            body = await response.read()
+            if response.status >= 400 and response.status != 404:
+                raise RuntimeError(
+                    f"S3 {method} {key} failed: {response.status} {body[:200]!r}"
+                )
+            return response.status, body
+
+    async def get(self, key: str) -> Optional[bytes]:
+        status, body = await self._request("GET", key)
+        return None if status == 404 else body
+
+    async def put(self, key: str, data: bytes) -> None:
+        await self._request("PUT", key, data)
+
+    async def exists(self, key: str) -> bool:
+        status, _ = await self._request("HEAD", key)
+        return status != 404
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+def create_blob_store(url: str) -> BlobStore:
+    """ARTIFACT_STORE_URL: file:///path, memory:// или s3://bucket/prefix"""
+    parts = urlsplit(url)
+    if parts.scheme == "memory":
+        return MemoryBlobStore()
+    if parts.scheme == "file":
+        return LocalBlobStore(parts.netloc + parts.path)
+    if parts.scheme == "s3":
+        return S3BlobStore(
+            endpoint_url=settings.ARTIFACT_S3_ENDPOINT,
+            bucket=parts.netloc,
+            access_key=settings.ARTIFACT_S3_ACCESS_KEY,
+            secret_key=settings.ARTIFACT_S3_SECRET_KEY,
+            region=settings.ARTIFACT_S3_REGION,
+            prefix=parts.path,
+        )
+    raise ValueError(f"Unsupported ARTIFACT_STORE_URL: {url}")
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError(
+            "zstd compression requires the 'zstandard' package: pip install zstandard"
+        ) from e
+    return zstandard
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return _zstd().ZstdCompressor(level=10).compress(data)
+    if codec == "gzip":
+        # mtime=0: одинаковое содержимое — одинаковые байты блоба
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    raise ValueError(f"Unsupported compression codec: {codec}")
+
+
+def decompress(blob: bytes) -> bytes:
+    """Кодек определяется по сигнатуре блоба: в одном хранилище могут быть оба"""
+    if blob.startswith(_ZSTD_MAGIC):
+        return _zstd().ZstdDecompressor().decompress(blob)
+    if blob.startswith(_GZIP_MAGIC):
+        return gzip.decompress(blob)
+    raise ValueError("Unknown blob compression format")
+
+
+def default_codec() -> str:
+    """ARTIFACT_COMPRESSION: zstd, gzip или auto (zstd, если установлен zstandard)"""
+    codec = settings.ARTIFACT_COMPRESSION
+    if codec != "auto":
+        return codec
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return "gzip"
+    return "zstd"
+
+
+class CorruptBlobError(RuntimeError):
+    pass
+
+
+class ArtifactStore:
+    """
+    Адресация по содержимому поверх BlobStore.
+
+    Ключ — SHA-256 несжатого содержимого: одинаковый код (например,
+    стандартный CSS тёмной темы) хранится один раз для всех проектов.
+    Блобы сжаты и неизменяемы, поэтому прочитанное кэшируется в памяти
+    без инвалидации; при чтении хэш сверяется с ключом.
+    """
+
+    def __init__(
+        self,
+        blobs: BlobStore,
+        codec: Optional[str] = None,
+        cache_size: Optional[int] = None,
+    ):
+        self.blobs = blobs
+        self.codec = codec or default_codec()
+        self._cache: TTLCache[str, bytes] = TTLCache(
+            max_size=cache_size or settings.ARTIFACT_CACHE_MAX_SIZE
+        )
+        self.writes = 0
+        self.deduplicated = 0
+
+    @staticmethod
+    def key(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
+
+    async def put(self, content: bytes) -> str:
+        """Сохранить содержимое; вернуть его ключ (уже сохранённое не пишется)"""
+        key = self.key(content)
+        if self._cache.get(key) is not None or await self.blobs.exists(key):
+            self.deduplicated += 1
+            return key
+
+        blob = await asyncio.to_thread(compress, content, self.codec)
+        await self.blobs.put(key, blob)
+        self._cache.set(key, content)
+        self.writes += 1
+        return key
+
+    async def get(self, key: str) -> bytes:
+        content = self._cache.get(key)
+        if content is not None:
+            return content
+
+        blob = await self.blobs.get(key)
+        if blob is None:
+            raise KeyError(f"Artifact blob {key} not found")
+        content = await asyncio.to_thread(decompress, blob)
+        if self.key(content) != key:
+            raise CorruptBlobError(f"Artifact blob {key} is corrupted")
+
+        self._cache.set(key, content)
+        return content
+
+    async def close(self) -> None:
+        await self.blobs.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "writes": self.writes,
+            "deduplicated": self.deduplicated,
+            **{f"cache_{name}": value for name, value in self._cache.stats().items()},
+        }
+
+
+# Общее хранилище процесса (пул S3-соединений закрывается в lifespan / воркере)
+artifact_store = ArtifactStore(create_blob_store(settings.ARTIFACT_STORE_URL))
@@ -4,20 +4,54 @@ from .api.v1.health import router as health_router
 from .api.v1.auth import router as auth_router
 from .api.v1.users import router as users_router
 from .api.v1.generation import router as generation_router
+from .api.v1.projects import router as projects_router
+from .api.v1.metrics import router as metrics_router
+
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from .ai.client import deepseek_client
 from .core.config import settings
+from .core.security import password_hasher
+from .core.shutdown import close_all
+from .core.events import event_bus
+from .core.metrics import MetricsMiddleware, register_stats_collectors
+from .core.storage import artifact_store
+from .services.admission import admission_controller
+from .services.user_cache import user_cache
 from .core.logging import setup_logging
 from .api.v1 import health
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Пул HTTP-соединений к DeepSeek живёт столько же, сколько приложение
+    await deepseek_client.start()
+    try:
+        yield
+    finally:
+        await close_all(
+            [
+                ("deepseek_client", deepseek_client.close),
+                ("password_hasher", password_hasher.shutdown),
+                ("user_cache", user_cache.close),
+                ("admission_controller", admission_controller.close),
+                ("artifact_store", artifact_store.close),
+                ("event_bus", event_bus.close),
+            ]
+        )
+
+
 def create_app() -> FastAPI:
     setup_logging()
     app = FastAPI(
         title=settings.APP_NAME,
         debug=settings.DEBUG,
+        lifespan=lifespan,
     )
+    app.add_middleware(MetricsMiddleware)
+    register_stats_collectors()
     app.include_router(health.router)
 
     return app
@@ -29,5 +63,7 @@ app.include_router(health_router)
 app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(generation_router)
+app.include_router(projects_router)
+app.include_router(metrics_router)
 
 # uvicorn app.main:app --reload
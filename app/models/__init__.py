@@ -1,3 +1,8 @@
 from .base import Base
 from .user import User
 from .project import Project
+from .artifact import ArtifactKind, ProjectArtifact
+from .job import Job
+from .rate_limit import RateLimitBucket
+from .usage import LLMUsage, UserUsageDaily
+from .idempotency import IdempotencyKey
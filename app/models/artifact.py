@@ -0,0 +1,59 @@
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+from . import Base
+import enum
+
+
+class ArtifactKind(str, enum.Enum):
+    STRUCTURE = "structure"  # JSON структуры сайта
+    HTML = "html"
+    CSS = "css"
+    JAVASCRIPT = "javascript"
+    BACKEND = "backend"  # Python код бэкенда
+
+
+class ProjectArtifact(Base):
+    """
+    Сгенерированный код проекта, отдельно от узкой строки projects.
+
+    Каждое изменение — новая версия (project_id, kind, version);
+    актуальная — с наибольшим version. Списки и статусы проектов
+    эту таблицу не читают. Сам код — в хранилище блобов
+    (app/core/storage.py), строка хранит только ссылку content_hash.
+    """
+
+    __tablename__ = "project_artifacts"
+    __table_args__ = (
+        # Заодно индекс для выборки последней версии каждого вида
+        UniqueConstraint(
+            "project_id", "kind", "version", name="uq_project_artifacts_version"
+        ),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("projects.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    kind = Column(Enum(ArtifactKind), nullable=False)
+    version = Column(Integer, nullable=False)
+    # SHA-256 содержимого — ключ блоба в ArtifactStore
+    content_hash = Column(String(64), nullable=True)
+    # Код в самой строке: версии, записанные до хранилища блобов
+    # (переносятся командой python -m app.offload_artifacts)
+    content = Column(Text, nullable=True)
+    size = Column(Integer, nullable=False)  # Байт в UTF-8 до сжатия
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
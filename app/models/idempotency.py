@@ -0,0 +1,47 @@
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from . import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Ключ Idempotency-Key запроса /generate/start и его ответ.
+
+    Строка вставляется в одной транзакции с проектом и заданием:
+    уникальный индекс (user_id, key) не даёт повтору создать второй
+    проект, а в Postgres повтор ждёт на нём коммита первого запроса.
+    Истёкшие (expires_at) ключи удаляются понемногу при записи новых.
+    """
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        Index("uq_idempotency_keys_user_id_key", "user_id", "key", unique=True),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    key = Column(String(255), nullable=False)
+    # SHA-256 тела запроса: тот же ключ с другим телом — ошибка клиента
+    request_hash = Column(String(64), nullable=False)
+    project_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("projects.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    response = Column(JSON, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
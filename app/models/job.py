@@ -1,4 +1,16 @@
-from sqlalchemy import Column, Float, Integer, String, Text, JSON, DateTime, Enum, ForeignKey
+from sqlalchemy import (
+    Column,
+    Float,
+    Integer,
+    String,
+    Text,
+    JSON,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    SmallInteger,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -9,6 +21,7 @@ import enum
 
 class JobType(str, enum.Enum):
     FRONTEND_GENERATION = "frontend_generation"
+    SECTION_REGENERATION = "section_regeneration"
     DESIGN_GENERATION = "design_generation"
     BACKEND_GENERATION = "backend_generation"
     IMAGE_GENERATION = "image_generation"
@@ -26,11 +39,79 @@ class JobStatus(str, enum.Enum):
     CANCELLED = "cancelled"
 
 
+class JobPriority(int, enum.Enum):
+    """Класс приоритета: задания класса ниже берутся из очереди первыми"""
+
+    INTERACTIVE = 0  # Пользователь ждёт ответа: правка секции
+    STANDARD = 1  # Генерация сайта
+    BATCH = 2  # Сборка, деплой и прочая фоновая работа
+
+
+# Класс и оценка длительности задания (в условных единицах, генерация
+# сайта — 10) по типу: короткие задания получают меньшую метку очереди
+# и обгоняют длинные, поставленные в то же время
+JOB_PRIORITIES = {
+    JobType.SECTION_REGENERATION: JobPriority.INTERACTIVE,
+    JobType.CODE_REVIEW: JobPriority.STANDARD,
+    JobType.BUILD_ZIP: JobPriority.BATCH,
+    JobType.DEPLOY: JobPriority.BATCH,
+    JobType.GITHUB_CREATE: JobPriority.BATCH,
+}
+JOB_COSTS = {
+    JobType.FRONTEND_GENERATION: 10.0,
+    JobType.SECTION_REGENERATION: 1.0,
+    JobType.DESIGN_GENERATION: 3.0,
+    JobType.BACKEND_GENERATION: 10.0,
+    JobType.IMAGE_GENERATION: 3.0,
+    JobType.CODE_REVIEW: 3.0,
+    JobType.BUILD_ZIP: 1.0,
+    JobType.DEPLOY: 2.0,
+    JobType.GITHUB_CREATE: 1.0,
+}
+# Незавершённые задания: ждут в очереди или выполняются
+QUEUED_JOB_STATUSES = (JobStatus.PENDING, JobStatus.RUNNING)
+
+
+def fair_finish_tag(
+    virtual_time: float, last_tag: float, cost: float, weight: float = 1.0
+) -> float:
+    """
+    Метка взвешенной справедливой очереди (self-clocked fair queuing).
+
+    Задание пользователя встаёт после его предыдущего задания (last_tag),
+    но не раньше текущего виртуального времени очереди. Чем больше вес,
+    тем медленнее растут метки пользователя и тем большую долю воркеров
+    он получает.
+    """
+    return max(virtual_time, last_tag) + cost / weight
+
+
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        # Очередь выбирает задания по статусу, классу приоритета и метке
+        Index(
+            "ix_jobs_status_priority_virtual_finish",
+            "status",
+            "priority",
+            "virtual_finish",
+        ),
+        # Последняя метка ждущих и выполняемых заданий пользователя
+        Index(
+            "ix_jobs_user_id_status_priority_virtual_finish",
+            "user_id",
+            "status",
+            "priority",
+            "virtual_finish",
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False)
+    # Владелец проекта — по нему очередь делится между пользователями
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
     job_type = Column(Enum(JobType), nullable=False)
     status = Column(Enum(JobStatus), default=JobStatus.PENDING)
 
@@ -44,6 +125,18 @@ class Job(Base):
     tokens_used = Column(Integer, nullable=True)
     generation_time = Column(Float, nullable=True)  # В секундах
 
+    # Queue: аренда задания воркером (lease) и heartbeat
+    worker_id = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+
+    # Планирование: класс приоритета и метка справедливой очереди
+    # (fair_finish_tag); из PENDING берётся задание с меньшими (priority,
+    # virtual_finish)
+    priority = Column(SmallInteger, nullable=False, default=JobPriority.STANDARD)
+    virtual_finish = Column(Float, nullable=False, default=0.0)
+
     # Relationships
     # project = relationship("Project", back_populates="jobs")
 
@@ -1,4 +1,15 @@
-from sqlalchemy import Column, String, Text, JSON, DateTime, Enum, Boolean
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Text,
+    JSON,
+    DateTime,
+    Enum,
+    Boolean,
+    ForeignKey,
+    Index,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -18,19 +29,22 @@ class ProjectStatus(str, enum.Enum):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        # Список проектов пользователя: keyset-страницы по (created_at, id)
+        Index("ix_projects_user_id_created_at", "user_id", "created_at", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), nullable=True)
+    # Владелец; None — проект создан без авторизации
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
 
     # AI Generation Fields
     prompt = Column(Text, nullable=False)  # Оригинальный промпт пользователя
-    generated_structure = Column(JSON, nullable=True)  # JSON структуры сайта
-    generated_html = Column(Text, nullable=True)
-    generated_css = Column(Text, nullable=True)
-    generated_js = Column(Text, nullable=True)
-    generated_backend = Column(Text, nullable=True)  # Python код бэкенда
+    # Структура и код сайта — в project_artifacts (app/models/artifact.py)
     color_scheme = Column(String(100), nullable=True)
     ai_model_used = Column(String(100), nullable=True)  # deepseek, gpt-4 и т.д.
 
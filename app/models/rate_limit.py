@@ -0,0 +1,15 @@
+from sqlalchemy import Float, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class RateLimitBucket(Base):
+    """Состояние token bucket, общее для всех процессов (app/ai/rate_limit.py)"""
+
+    __tablename__ = "rate_limit_buckets"
+
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    # Unix-время последнего пересчёта (time.time())
+    updated_at: Mapped[float] = mapped_column(Float, nullable=False)
@@ -0,0 +1,70 @@
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from . import Base
+
+
+class LLMUsage(Base):
+    """
+    Токены LLM задания по стадиям: строка на (задание, стадия, агент).
+
+    Пишется пакетом по завершении задания (app/repositories/usage_repo.py).
+    Отчёты по дням читают свёртку user_usage_daily, эта таблица —
+    для разбивки по проектам и стадиям.
+    """
+
+    __tablename__ = "llm_usage"
+    __table_args__ = (
+        # Самые "дорогие" проекты пользователя за период
+        Index("ix_llm_usage_user_id_created_at", "user_id", "created_at"),
+        Index("ix_llm_usage_project_id", "project_id"),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    project_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("projects.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    job_id = Column(
+        UUID(as_uuid=True), ForeignKey("jobs.id", ondelete="SET NULL"), nullable=True
+    )
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    stage = Column(String(50), nullable=False)
+    agent = Column(String(100), nullable=False)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    calls = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class UserUsageDaily(Base):
+    """
+    Свёртка токенов пользователя по дням (UTC).
+
+    Обновляется upsert'ом вместе с записью llm_usage; квоты и
+    /users/me/usage читают её, не пересчитывая сырые строки.
+    """
+
+    __tablename__ = "user_usage_daily"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    day = Column(Date, primary_key=True)
+    prompt_tokens = Column(BigInteger, nullable=False, default=0)
+    completion_tokens = Column(BigInteger, nullable=False, default=0)
+    calls = Column(Integer, nullable=False, default=0)
+    jobs = Column(Integer, nullable=False, default=0)
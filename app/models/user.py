@@ -5,7 +5,7 @@ https://docs.sqlalchemy.org/en/20/orm/quickstart.html
 
 from datetime import datetime
 
-from sqlalchemy import String, Boolean, DateTime, func
+from sqlalchemy import String, Boolean, DateTime, Float, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -31,6 +31,13 @@ class User(Base):
         default=True,
         nullable=False,
     )
+    # Доля воркеров очереди генераций относительно других пользователей
+    queue_weight: Mapped[float] = mapped_column(
+        Float,
+        default=1.0,
+        server_default="1",
+        nullable=False,
+    )
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
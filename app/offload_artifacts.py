@@ -0,0 +1,42 @@
+"""
+Перенос кода старых версий артефактов из строк БД в хранилище блобов.
+
+    python -m app.offload_artifacts --batch 100
+
+Можно запускать на работающей системе и в несколько процессов:
+строки берутся под FOR UPDATE SKIP LOCKED.
+"""
+
+import argparse
+import asyncio
+import logging
+
+from .core.database import AsyncSessionLocal
+from .core.logging import setup_logging
+from .core.storage import artifact_store
+from .repositories.artifact_repo import ArtifactRepository
+
+logger = logging.getLogger(__name__)
+
+
+async def main(batch: int) -> None:
+    setup_logging()
+    artifacts = ArtifactRepository()
+    total = 0
+    try:
+        while True:
+            async with AsyncSessionLocal() as session:
+                moved = await artifacts.offload_inline(session, limit=batch)
+            if not moved:
+                break
+            total += moved
+            logger.info("Offloaded %d artifact versions", total)
+    finally:
+        await artifact_store.close()
+    logger.info("Done: %d artifact versions moved to the artifact store", total)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move inline artifact code to the store")
+    parser.add_argument("--batch", type=int, default=100)
+    asyncio.run(main(parser.parse_args().batch))
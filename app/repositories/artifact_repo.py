@@ -0,0 +1,170 @@
+import asyncio
+import json
+from typing import Any, Dict, Iterable
+from uuid import UUID
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.storage import ArtifactStore, artifact_store
+from app.models.artifact import ArtifactKind, ProjectArtifact
+
+
+def _dump(kind: ArtifactKind, value: Any) -> str:
+    if kind == ArtifactKind.STRUCTURE:
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _load(kind: ArtifactKind, content: str) -> Any:
+    if kind == ArtifactKind.STRUCTURE:
+        return json.loads(content)
+    return content
+
+
+class ArtifactRepository:
+    """
+    Версии сгенерированного кода проектов (project_artifacts)
+
+    Строки хранят ссылки (SHA-256) на блобы в ArtifactStore. Методы
+    записи не коммитят: новые версии сохраняются в одной транзакции
+    со статусом проекта и задания; блоб пишется до строки, поэтому
+    ссылка не бывает «висячей».
+    """
+
+    def __init__(self, store: ArtifactStore | None = None):
+        self.store = store or artifact_store
+
+    async def read(self, artifact: ProjectArtifact) -> str:
+        """Код версии (из хранилища или, для старых версий, из строки)"""
+        if artifact.content_hash is None:
+            return artifact.content
+        return (await self.store.get(artifact.content_hash)).decode("utf-8")
+
+    async def latest(
+        self,
+        session: AsyncSession,
+        project_id: UUID,
+        kinds: Iterable[ArtifactKind] | None = None,
+    ) -> Dict[ArtifactKind, ProjectArtifact]:
+        """Последние версии артефактов проекта (всех или только kinds)"""
+        versions = (
+            select(
+                ProjectArtifact.kind,
+                func.max(ProjectArtifact.version).label("version"),
+            )
+            .where(ProjectArtifact.project_id == project_id)
+            .group_by(ProjectArtifact.kind)
+        )
+        if kinds is not None:
+            versions = versions.where(ProjectArtifact.kind.in_(list(kinds)))
+        versions = versions.subquery()
+
+        res = await session.execute(
+            select(ProjectArtifact).join(
+                versions,
+                and_(
+                    ProjectArtifact.project_id == project_id,
+                    ProjectArtifact.kind == versions.c.kind,
+                    ProjectArtifact.version == versions.c.version,
+                ),
+            )
+        )
+        return {artifact.kind: artifact for artifact in res.scalars()}
+
+    async def load(
+        self,
+        session: AsyncSession,
+        project_id: UUID,
+        kinds: Iterable[ArtifactKind] | None = None,
+    ) -> Dict[str, Any]:
+        """{"html": ..., "structure": {...}} — последние версии"""
+        latest = await self.latest(session, project_id, kinds)
+        contents = await asyncio.gather(*(self.read(a) for a in latest.values()))
+        return {
+            kind.value: _load(kind, content)
+            for kind, content in zip(latest, contents)
+        }
+
+    async def get(
+        self,
+        session: AsyncSession,
+        project_id: UUID,
+        kind: ArtifactKind,
+        version: int | None = None,
+    ) -> ProjectArtifact | None:
+        """Версия артефакта (по умолчанию — последняя)"""
+        stmt = select(ProjectArtifact).where(
+            ProjectArtifact.project_id == project_id,
+            ProjectArtifact.kind == kind,
+        )
+        if version is None:
+            stmt = stmt.order_by(ProjectArtifact.version.desc()).limit(1)
+        else:
+            stmt = stmt.where(ProjectArtifact.version == version)
+        res = await session.execute(stmt)
+        return res.scalar_one_or_none()
+
+    async def save(
+        self,
+        session: AsyncSession,
+        project_id: UUID,
+        artifacts: Dict[ArtifactKind, Any],
+    ) -> Dict[ArtifactKind, int]:
+        """
+        Записать новые версии изменившихся артефактов (без commit)
+
+        Возвращает номер актуальной версии каждого из artifacts.
+        """
+        latest = await self.latest(session, project_id, artifacts.keys())
+        versions = {}
+        changed = []
+        for kind, value in artifacts.items():
+            content = _dump(kind, value).encode("utf-8")
+            content_hash = ArtifactStore.key(content)
+            current = latest.get(kind)
+            if current is not None and content_hash == (
+                current.content_hash
+                or ArtifactStore.key(current.content.encode("utf-8"))
+            ):
+                versions[kind] = current.version
+                continue
+
+            versions[kind] = current.version + 1 if current is not None else 1
+            changed.append((kind, content, content_hash))
+
+        await asyncio.gather(*(self.store.put(content) for _, content, _ in changed))
+        for kind, content, content_hash in changed:
+            session.add(
+                ProjectArtifact(
+                    project_id=project_id,
+                    kind=kind,
+                    version=versions[kind],
+                    content_hash=content_hash,
+                    size=len(content),
+                )
+            )
+
+        await session.flush()
+        return versions
+
+    async def offload_inline(self, session: AsyncSession, limit: int = 100) -> int:
+        """
+        Перенести код старых версий из строк в хранилище (с commit)
+
+        Возвращает число перенесённых версий; 0 — переносить больше нечего.
+        """
+        res = await session.execute(
+            select(ProjectArtifact)
+            .where(ProjectArtifact.content.is_not(None))
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        artifacts = list(res.scalars())
+        for artifact in artifacts:
+            artifact.content_hash = await self.store.put(
+                artifact.content.encode("utf-8")
+            )
+            artifact.content = None
+        await session.commit()
+        return len(artifacts)
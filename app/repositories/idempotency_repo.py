@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+from uuid import UUID
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.idempotency import IdempotencyKey
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class IdempotencyRepository:
+    """Ключи Idempotency-Key и сохранённые ответы (таблица idempotency_keys)"""
+
+    async def get(
+        self, session: AsyncSession, user_id: int, key: str
+    ) -> IdempotencyKey | None:
+        """Неистёкший ключ пользователя"""
+        res = await session.execute(
+            select(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.expires_at > _utcnow(),
+            )
+        )
+        return res.scalar_one_or_none()
+
+    async def add(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        key: str,
+        request_hash: str,
+        project_id: UUID,
+        response: Dict[str, Any],
+        ttl: float,
+    ) -> IdempotencyKey:
+        """
+        Запомнить ключ в текущей транзакции (коммит — за вызывающим).
+
+        Занятый ключ — IntegrityError на flush; в Postgres flush ждёт,
+        пока транзакция, вставившая тот же ключ, не завершится.
+        """
+        # Истёкший ключ с тем же значением освобождает место
+        await session.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.expires_at <= _utcnow(),
+            )
+        )
+        record = IdempotencyKey(
+            user_id=user_id,
+            key=key,
+            request_hash=request_hash,
+            project_id=project_id,
+            response=response,
+            expires_at=_utcnow() + timedelta(seconds=ttl),
+        )
+        session.add(record)
+        await session.flush()
+        return record
+
+    async def purge_expired(self, session: AsyncSession, limit: int = 100) -> int:
+        """Удалить до limit истёкших ключей (по индексу expires_at)"""
+        expired = (
+            select(IdempotencyKey.id)
+            .where(IdempotencyKey.expires_at <= _utcnow())
+            .limit(limit)
+        )
+        res = await session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.id.in_(expired))
+        )
+        await session.commit()
+        return res.rowcount
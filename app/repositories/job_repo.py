@@ -1,43 +1,314 @@
-from sqlalchemy import select
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import GenerationJob
+from app.models.job import (
+    JOB_COSTS,
+    JOB_PRIORITIES,
+    QUEUED_JOB_STATUSES,
+    Job,
+    JobPriority,
+    JobStatus,
+    JobType,
+    fair_finish_tag,
+)
+from app.models.user import User
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
 
 
 class JobRepository:
     async def create(
         self,
         session: AsyncSession,
-        project_id: int,
-    ) -> GenerationJob:
-        job = GenerationJob(project_id=project_id, status="pending")
-        session.add(job)
+        project_id: UUID,
+        job_type: JobType,
+        input_data: dict | None = None,
+    ) -> Job:
+        job = await self.enqueue(session, project_id, job_type, input_data)
         await session.commit()
         await session.refresh(job)
         return job
 
+    async def schedule(
+        self,
+        session: AsyncSession,
+        job_type: JobType,
+        user_id: int | None = None,
+        priority: JobPriority | None = None,
+    ) -> Tuple[JobPriority, float]:
+        """
+        Класс приоритета и метка справедливой очереди для нового задания.
+
+        У каждого класса своя очередь: виртуальное время — наибольшая
+        метка заданий класса, выполняемых воркерами (если их нет — наименьшая метка
+        ждущих, если нет и их — 0), последняя метка пользователя —
+        наибольшая среди его ждущих и выполняемых заданий класса, вес —
+        users.queue_weight. Завершённые задания в расчёт не входят:
+        история пользователя не сдвигает его новые задания. Всё читается
+        одним запросом по индексам.
+        """
+        if priority is None:
+            priority = JOB_PRIORITIES.get(job_type, JobPriority.STANDARD)
+
+        def tag_of(aggregate, *where):
+            return (
+                select(aggregate(Job.virtual_finish))
+                .where(Job.priority == priority, *where)
+                .scalar_subquery()
+            )
+
+        # Выполняемые воркером: задания, идущие мимо очереди (правка
+        # секций в API), без воркера и метки
+        running = tag_of(
+            func.max, Job.status == JobStatus.RUNNING, Job.worker_id.is_not(None)
+        )
+        head = tag_of(func.min, Job.status == JobStatus.PENDING)
+        last_tag = tag_of(
+            func.max,
+            Job.user_id == user_id,
+            Job.status.in_(QUEUED_JOB_STATUSES),
+        )
+        weight = select(User.queue_weight).where(User.id == user_id).scalar_subquery()
+        res = await session.execute(select(running, head, last_tag, weight))
+        running, head, last_tag, weight = res.one()
+
+        virtual_time = running if running is not None else head
+        tag = fair_finish_tag(
+            virtual_time or 0.0,
+            last_tag or 0.0,
+            JOB_COSTS.get(job_type, 1.0),
+            weight if weight and weight > 0 else 1.0,
+        )
+        return priority, tag
+
+    async def enqueue(
+        self,
+        session: AsyncSession,
+        project_id: UUID,
+        job_type: JobType,
+        input_data: dict | None = None,
+        user_id: int | None = None,
+        priority: JobPriority | None = None,
+    ) -> Job:
+        """Добавить PENDING-задание в сессию (коммит — за вызывающим)"""
+        priority, tag = await self.schedule(session, job_type, user_id, priority)
+        job = Job(
+            project_id=project_id,
+            user_id=user_id,
+            job_type=job_type,
+            status=JobStatus.PENDING,
+            input_data=input_data,
+            priority=priority,
+            virtual_finish=tag,
+        )
+        session.add(job)
+        return job
+
     async def get(
         self,
         session: AsyncSession,
-        job_id: int,
-    ) -> GenerationJob | None:
+        job_id: UUID,
+    ) -> Job | None:
+        res = await session.execute(select(Job).where(Job.id == job_id))
+        return res.scalar_one_or_none()
+
+    async def claim_next(
+        self,
+        session: AsyncSession,
+        worker_id: str,
+        lease_seconds: int,
+        max_attempts: int,
+        job_types: list[JobType] | None = None,
+    ) -> Job | None:
+        """
+        Забрать следующее задание из очереди.
+
+        Подходят новые задания и RUNNING-задания с истёкшей арендой
+        (воркер упал). Порядок — класс приоритета, затем метка
+        справедливой очереди: пачка заданий одного пользователя не
+        задерживает единичные задания остальных. SKIP LOCKED позволяет
+        нескольким воркерам забирать задания параллельно, не блокируя
+        друг друга.
+        """
+        now = _utcnow()
+        stmt = (
+            select(Job)
+            .where(
+                or_(
+                    Job.status == JobStatus.PENDING,
+                    and_(
+                        Job.status == JobStatus.RUNNING,
+                        Job.lease_expires_at < now,
+                    ),
+                ),
+                Job.attempts < max_attempts,
+            )
+            .order_by(Job.priority, Job.virtual_finish, Job.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if job_types:
+            stmt = stmt.where(Job.job_type.in_(job_types))
+
+        res = await session.execute(stmt)
+        job = res.scalar_one_or_none()
+        if job is None:
+            await session.commit()
+            return None
+
+        job.status = JobStatus.RUNNING
+        job.worker_id = worker_id
+        job.attempts = (job.attempts or 0) + 1
+        job.started_at = job.started_at or now
+        job.heartbeat_at = now
+        job.lease_expires_at = now + timedelta(seconds=lease_seconds)
+        await session.commit()
+        return job
+
+    async def claim(
+        self,
+        session: AsyncSession,
+        job_id: UUID,
+        worker_id: str,
+        lease_seconds: int,
+    ) -> bool:
+        """
+        Забрать конкретное PENDING-задание в аренду (потоковая генерация
+        в API). False — задание уже забрал другой исполнитель.
+        """
+        now = _utcnow()
         res = await session.execute(
-            select(GenerationJob).where(GenerationJob.id == job_id)
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatus.PENDING)
+            .values(
+                status=JobStatus.RUNNING,
+                worker_id=worker_id,
+                attempts=Job.attempts + 1,
+                started_at=func.coalesce(Job.started_at, now),
+                heartbeat_at=now,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+            )
         )
-        return res.scalar_one_or_none()
+        await session.commit()
+        return res.rowcount == 1
+
+    async def heartbeat(
+        self,
+        session: AsyncSession,
+        job_id: UUID,
+        worker_id: str,
+        lease_seconds: int,
+    ) -> bool:
+        """Продлить аренду. False — аренду забрал другой воркер."""
+        now = _utcnow()
+        res = await session.execute(
+            update(Job)
+            .where(
+                Job.id == job_id,
+                Job.worker_id == worker_id,
+                Job.status == JobStatus.RUNNING,
+            )
+            .values(
+                heartbeat_at=now,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+            )
+        )
+        await session.commit()
+        return res.rowcount == 1
 
-    async def set_status(
+    async def finish(
         self,
         session: AsyncSession,
-        job: GenerationJob,
-        status: str,
+        job_id: UUID,
+        worker_id: str,
+        status: JobStatus,
         error_message: str | None = None,
-        n8n_execution_id: str | None = None,
-    ) -> GenerationJob:
-        job.status = status
-        job.error_message = error_message
-        if n8n_execution_id:
-            job.n8n_execution_id = n8n_execution_id
+    ) -> bool:
+        """Завершить задание, если аренда всё ещё у этого воркера"""
+        res = await session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.worker_id == worker_id)
+            .values(
+                status=status,
+                error_message=error_message,
+                completed_at=_utcnow(),
+                lease_expires_at=None,
+            )
+        )
         await session.commit()
-        await session.refresh(job)
-        return job
+        return res.rowcount == 1
+
+    async def release(
+        self,
+        session: AsyncSession,
+        job_id: UUID,
+        worker_id: str,
+    ) -> None:
+        """Вернуть задание в очередь (штатная остановка воркера)"""
+        await session.execute(
+            update(Job)
+            .where(
+                Job.id == job_id,
+                Job.worker_id == worker_id,
+                Job.status == JobStatus.RUNNING,
+            )
+            .values(
+                status=JobStatus.PENDING,
+                worker_id=None,
+                lease_expires_at=None,
+                attempts=Job.attempts - 1,
+            )
+        )
+        await session.commit()
+
+    async def fail_exhausted(
+        self,
+        session: AsyncSession,
+        max_attempts: int,
+    ) -> int:
+        """Пометить FAILED задания, чья аренда истекла после последней попытки"""
+        res = await session.execute(
+            update(Job)
+            .where(
+                Job.status == JobStatus.RUNNING,
+                Job.lease_expires_at < _utcnow(),
+                Job.attempts >= max_attempts,
+            )
+            .values(
+                status=JobStatus.FAILED,
+                error_message="Lease expired: worker stopped responding",
+                completed_at=_utcnow(),
+                lease_expires_at=None,
+            )
+        )
+        await session.commit()
+        return res.rowcount
+
+    async def count_by_status(
+        self,
+        session: AsyncSession,
+        statuses: Iterable[JobStatus],
+    ) -> Dict[JobStatus, int]:
+        """
+        Число заданий в указанных статусах. Фильтр идёт по индексу
+        (status, created_at) — завершённые задания, которых большинство,
+        не читаются.
+        """
+        res = await session.execute(
+            select(Job.status, func.count())
+            .where(Job.status.in_(list(statuses)))
+            .group_by(Job.status)
+        )
+        return {status: count for status, count in res.all()}
+
+    async def count_pending(self, session: AsyncSession) -> int:
+        res = await session.execute(
+            select(func.count()).select_from(Job).where(Job.status == JobStatus.PENDING)
+        )
+        return res.scalar_one()
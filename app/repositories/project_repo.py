@@ -1,24 +1,70 @@
-from sqlalchemy import select
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import Row, func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import Project
+from app.models.project import ProjectStatus
+
+# Колонки строки списка: без промпта и описания, только то, что
+# показывает список проектов
+LIST_COLUMNS = (
+    Project.id,
+    Project.name,
+    Project.status,
+    Project.color_scheme,
+    Project.preview_url,
+    Project.deployed_url,
+    Project.created_at,
+    Project.completed_at,
+)
+
+
+def encode_cursor(created_at: datetime, project_id: UUID) -> str:
+    """Непрозрачный курсор: позиция последней строки страницы"""
+    raw = json.dumps([created_at.isoformat(), str(project_id)])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """ValueError, если курсор повреждён"""
+    try:
+        created_at, project_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.fromisoformat(created_at), UUID(project_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+@dataclass
+class ProjectPage:
+    items: list[Row]
+    next_cursor: str | None
 
 
 class ProjectRepository:
+    """
+    Проекты пользователя: узкие строки projects без сгенерированного кода
+    (он в project_artifacts, см. ArtifactRepository)
+    """
+
     async def create(
         self,
         session: AsyncSession,
         user_id: int,
-        title: str,
+        name: str,
         prompt: str,
-        tech_stack: str,
+        color_scheme: str | None = None,
     ) -> Project:
         p = Project(
             user_id=user_id,
-            title=title,
+            name=name,
             prompt=prompt,
-            tech_stack=tech_stack,
-            status="draft",
+            color_scheme=color_scheme,
+            status=ProjectStatus.PENDING,
         )
         session.add(p)
         await session.commit()
@@ -29,18 +75,39 @@ class ProjectRepository:
         self,
         session: AsyncSession,
         user_id: int,
-    ) -> list[Project]:
-        res = await session.execute(
-            select(Project)
+        limit: int = 20,
+        cursor: str | None = None,
+    ) -> ProjectPage:
+        """
+        Страница проектов, новые первыми (keyset по (created_at, id))
+
+        Следующая страница начинается строго после курсора предыдущей:
+        индекс ix_projects_user_id_created_at отдаёт её сразу, без
+        пропуска уже показанных строк, как при OFFSET.
+        """
+        stmt = (
+            select(*LIST_COLUMNS)
             .where(Project.user_id == user_id)
-            .order_by(Project.id.desc())
+            .order_by(Project.created_at.desc(), Project.id.desc())
+            .limit(limit + 1)
+        )
+        if cursor is not None:
+            stmt = stmt.where(
+                tuple_(Project.created_at, Project.id) < decode_cursor(cursor)
+            )
+
+        rows = list((await session.execute(stmt)).all())
+        if len(rows) <= limit:
+            return ProjectPage(items=rows, next_cursor=None)
+        last = rows[limit - 1]
+        return ProjectPage(
+            items=rows[:limit], next_cursor=encode_cursor(last.created_at, last.id)
         )
-        return list(res.scalars().all())
 
     async def get(
         self,
         session: AsyncSession,
-        project_id: int,
+        project_id: UUID,
         user_id: int,
     ) -> Project | None:
         res = await session.execute(
@@ -50,3 +117,28 @@ class ProjectRepository:
             )
         )
         return res.scalar_one_or_none()
+
+    async def is_owned(
+        self, session: AsyncSession, project_id: UUID, user_id: int
+    ) -> bool:
+        """Проект принадлежит пользователю (по первичному ключу, без колонок)"""
+        owner = await session.scalar(
+            select(Project.user_id).where(Project.id == project_id)
+        )
+        return owner is not None and owner == user_id
+
+    async def count_generating(
+        self, session: AsyncSession, user_id: int, exclude: UUID | None = None
+    ) -> int:
+        """Генерации пользователя, которые ещё идут (в очереди или у воркера)"""
+        query = (
+            select(func.count())
+            .select_from(Project)
+            .where(
+                Project.user_id == user_id,
+                Project.status == ProjectStatus.GENERATING,
+            )
+        )
+        if exclude is not None:
+            query = query.where(Project.id != exclude)
+        return await session.scalar(query)
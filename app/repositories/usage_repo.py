@@ -0,0 +1,156 @@
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.ai.usage import UsageMeter
+from app.models import Job, Project
+from app.models.usage import LLMUsage, UserUsageDaily
+
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class UsageRepository:
+    """
+    Токены LLM: строки по стадиям (llm_usage) и свёртка по дням (user_usage_daily)
+
+    record() не коммитит: учёт пишется в одной транзакции с чекпоинтом
+    стадии, с результатом задания или с его статусом FAILED.
+    """
+
+    async def record(self, session: AsyncSession, meter: UsageMeter) -> None:
+        """
+        Записать токены задания: один пакетный INSERT строк стадий, upsert
+        дневной свёртки пользователя, суммы в jobs.tokens_used и
+        projects.tokens_used
+
+        Задание пишется частями (meter.unrecorded()), суммы прибавляются.
+        """
+        entries = meter.entries()
+        if not entries:
+            return
+
+        await session.execute(
+            insert(LLMUsage),
+            [
+                {
+                    "project_id": meter.project_id,
+                    "job_id": meter.job_id,
+                    "user_id": meter.user_id,
+                    "stage": entry.stage,
+                    "agent": entry.agent,
+                    "prompt_tokens": entry.prompt_tokens,
+                    "completion_tokens": entry.completion_tokens,
+                    "calls": entry.calls,
+                }
+                for entry in entries
+            ],
+        )
+
+        # После rollback (задание упало) объекты перечитываются из БД
+        job = None
+        if meter.job_id is not None:
+            job = await session.get(Job, meter.job_id)
+
+        if meter.user_id is not None:
+            # Задание считается в свёртке один раз — при первой записи его
+            # токенов, даже если его продолжил другой исполнитель
+            first = job is None or job.tokens_used is None
+            await self._add_daily(session, meter, jobs=int(first))
+
+        project = await session.get(Project, meter.project_id)
+        if project is not None:
+            stages = {k: dict(v) for k, v in (project.tokens_used or {}).items()}
+            for stage, tokens in meter.by_stage().items():
+                totals = stages.setdefault(stage, {"prompt": 0, "completion": 0})
+                totals["prompt"] = totals.get("prompt", 0) + tokens["prompt"]
+                totals["completion"] = (
+                    totals.get("completion", 0) + tokens["completion"]
+                )
+            project.tokens_used = stages
+
+        if job is not None:
+            # Повторные попытки задания тоже оплачены — суммируем
+            job.tokens_used = (job.tokens_used or 0) + meter.total_tokens
+
+    async def _add_daily(
+        self, session: AsyncSession, meter: UsageMeter, jobs: int
+    ) -> None:
+        dialect = session.get_bind().dialect.name
+        upsert = _UPSERT_INSERTS.get(dialect)
+        if upsert is None:
+            raise RuntimeError(f"Usage rollup is not supported for {dialect}")
+
+        stmt = upsert(UserUsageDaily).values(
+            user_id=meter.user_id,
+            day=datetime.now(timezone.utc).date(),
+            prompt_tokens=meter.prompt_tokens,
+            completion_tokens=meter.completion_tokens,
+            calls=meter.calls,
+            jobs=jobs,
+        )
+        columns = ("prompt_tokens", "completion_tokens", "calls", "jobs")
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[UserUsageDaily.user_id, UserUsageDaily.day],
+                set_={
+                    name: getattr(UserUsageDaily, name) + getattr(stmt.excluded, name)
+                    for name in columns
+                },
+            )
+        )
+
+    async def daily(
+        self, session: AsyncSession, user_id: int, since: date
+    ) -> List[UserUsageDaily]:
+        """Свёртка пользователя по дням, начиная с since (по возрастанию дат)"""
+        res = await session.execute(
+            select(UserUsageDaily)
+            .where(UserUsageDaily.user_id == user_id, UserUsageDaily.day >= since)
+            .order_by(UserUsageDaily.day)
+        )
+        return list(res.scalars())
+
+    async def top_projects(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        since: datetime,
+        limit: int = 10,
+    ) -> List[Dict[str, Any]]:
+        """Проекты пользователя, потратившие больше всего токенов с since"""
+        tokens = func.sum(LLMUsage.prompt_tokens + LLMUsage.completion_tokens)
+        res = await session.execute(
+            select(
+                LLMUsage.project_id,
+                Project.name,
+                func.sum(LLMUsage.prompt_tokens).label("prompt_tokens"),
+                func.sum(LLMUsage.completion_tokens).label("completion_tokens"),
+                func.sum(LLMUsage.calls).label("calls"),
+            )
+            .join(Project, Project.id == LLMUsage.project_id)
+            .where(LLMUsage.user_id == user_id, LLMUsage.created_at >= since)
+            .group_by(LLMUsage.project_id, Project.name)
+            .order_by(tokens.desc())
+            .limit(limit)
+        )
+        return [dict(row._mapping) for row in res]
+
+    async def by_stage(
+        self, session: AsyncSession, user_id: int, since: datetime
+    ) -> List[Dict[str, Any]]:
+        """Токены пользователя по стадиям генерации с since"""
+        res = await session.execute(
+            select(
+                LLMUsage.stage,
+                func.sum(LLMUsage.prompt_tokens).label("prompt_tokens"),
+                func.sum(LLMUsage.completion_tokens).label("completion_tokens"),
+                func.sum(LLMUsage.calls).label("calls"),
+            )
+            .where(LLMUsage.user_id == user_id, LLMUsage.created_at >= since)
+            .group_by(LLMUsage.stage)
+            .order_by(LLMUsage.stage)
+        )
+        return [dict(row._mapping) for row in res]
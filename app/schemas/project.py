@@ -1,21 +1,34 @@
 from datetime import datetime
-from pydantic import BaseModel, Field, ConfigDict
+from uuid import UUID
 
-TECH_STACKS = {"static", "fullstack"}
+from pydantic import BaseModel, ConfigDict
 
+from app.models.project import ProjectStatus
 
-class ProjectCreate(BaseModel):
-    title: str = Field(min_length=1, max_length=200)
-    prompt: str = Field(min_length=10, max_length=5000)
-    tech_stack: str = Field(default="static", max_length=50)
+
+class ProjectListItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    name: str
+    status: ProjectStatus
+    color_scheme: str | None
+    preview_url: str | None
+    deployed_url: str | None
+    created_at: datetime
+    completed_at: datetime | None
 
 
-class ProjectOut(BaseModel):
+class ProjectPageOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
-    id: int
-    title: str
+    items: list[ProjectListItem]
+    # Передать в ?cursor= за следующей страницей; None — страниц больше нет
+    next_cursor: str | None
+
+
+class ProjectOut(ProjectListItem):
+    description: str | None
     prompt: str
-    tech_stack: str
-    status: str
-    created_at: datetime
+    is_public: bool | None
+    tokens_used: dict | None
@@ -0,0 +1,38 @@
+from datetime import date
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+
+
+class UsageTotals(BaseModel):
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    calls: int = 0
+    # USD по ценам LLM_PRICE_*_PER_MTOK
+    cost: float = 0.0
+
+
+class UsageDayOut(UsageTotals):
+    model_config = ConfigDict(from_attributes=True)
+
+    day: date
+    jobs: int
+
+
+class ProjectUsageOut(UsageTotals):
+    project_id: UUID
+    name: str
+
+
+class StageUsageOut(UsageTotals):
+    stage: str
+
+
+class UsageReportOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    since: date
+    totals: UsageTotals
+    days: list[UsageDayOut]
+    top_projects: list[ProjectUsageOut]
+    stages: list[StageUsageOut]
@@ -0,0 +1,241 @@
+"""
+Допуск новых генераций: перед постановкой задания в очередь.
+
+Проверки от дешёвой к дорогой: темп запросов пользователя (скользящее
+окно в памяти или общем кэше), глубина очереди (COUNT по индексу,
+кэшируется на ADMISSION_QUEUE_DEPTH_TTL), число идущих генераций
+пользователя (COUNT по его проектам). Отказ — AdmissionRejected
+со статусом 429/503 и Retry-After.
+
+Docs:
+https://blog.cloudflare.com/counting-things-a-lot-of-different-things/
+https://www.rfc-editor.org/rfc/rfc9110#field.retry-after
+"""
+
+import logging
+import time
+from typing import Callable, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import InMemorySharedCache, SharedCache, create_shared_cache
+from app.core.config import settings
+from app.repositories.job_repo import JobRepository
+from app.repositories.project_repo import ProjectRepository
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Генерация не допущена: HTTP-статус, причина и через сколько секунд повторить"""
+
+    def __init__(self, status_code: int, reason: str, retry_after: float, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class SlidingWindowCounter:
+    """
+    Не больше limit событий на ключ за последние window секунд.
+
+    Скользящее окно приближается двумя фиксированными: счётчик прошлого
+    окна берётся с весом непрошедшей его доли. Память — два числа на
+    ключ. Счётчики живут в SharedCache (общий для процессов) или, если
+    он не задан или недоступен, в памяти процесса. Время — time.time(),
+    чтобы окна совпадали у разных хостов.
+
+    Событие сначала учитывается атомарным incr, решение принимается по
+    его результату, отказ свой incr откатывает. Поэтому одновременные
+    запросы не проходят вместе сверх limit (прочитав один и тот же
+    счётчик); в худшем случае всплеск отказов на мгновение занижает лимит.
+    """
+
+    KEY_PREFIX = "admission:"
+
+    def __init__(
+        self,
+        limit: int,
+        window: float,
+        shared: Optional[SharedCache] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.limit = limit
+        self.window = window
+        self.shared = shared
+        self.local = InMemorySharedCache()
+        self.clock = clock
+
+    async def hit(self, key: str) -> Optional[float]:
+        """Учесть событие; если лимит исчерпан — не учитывать и вернуть паузу (сек)"""
+        if self.shared is not None:
+            try:
+                return await self._hit(self.shared, key)
+            except Exception as e:
+                logger.warning(f"Shared admission counters unavailable: {e}")
+        return await self._hit(self.local, key)
+
+    async def _hit(self, store: SharedCache, key: str) -> Optional[float]:
+        now = self.clock()
+        index, elapsed = divmod(now / self.window, 1)
+        current_key = f"{self.KEY_PREFIX}{key}:{int(index)}"
+        current = await store.incr(current_key, 1, ttl=2 * self.window)
+        previous = int(await store.get(f"{self.KEY_PREFIX}{key}:{int(index) - 1}") or 0)
+
+        if previous * (1 - elapsed) + current > self.limit:
+            await store.incr(current_key, -1, ttl=2 * self.window)
+            return self._retry_after(previous, current - 1, elapsed)
+        return None
+
+    def _retry_after(self, previous: int, current: int, elapsed: float) -> float:
+        """Через сколько секунд оценка с ещё одним событием уложится в limit"""
+        if current < self.limit:
+            # Достаточно, чтобы "выветрилась" часть прошлого окна
+            needed = 1 - (self.limit - current - 1) / previous
+            return (needed - elapsed) * self.window
+        # Текущее окно само станет прошлым и должно "выветриться"
+        needed = 1 - (self.limit - 1) / current
+        return (1 - elapsed + needed) * self.window
+
+
+class AdmissionController:
+    """
+    Лимиты на постановку генераций (0 — проверка выключена).
+
+    Число идущих генераций читается из БД: генерации завершает воркер
+    в другом процессе, и только БД знает их точное число. Одновременные
+    запросы одного пользователя могут превысить этот лимит на число
+    таких запросов — для защиты от флуда это допустимо, темп ограничивает
+    скользящее окно.
+    """
+
+    def __init__(
+        self,
+        max_active_per_user: Optional[int] = None,
+        rate_limit: Optional[int] = None,
+        rate_window: Optional[float] = None,
+        max_queue_depth: Optional[int] = None,
+        queue_depth_ttl: Optional[float] = None,
+        retry_after: Optional[float] = None,
+        shared: Optional[SharedCache] = None,
+        projects: Optional[ProjectRepository] = None,
+        jobs: Optional[JobRepository] = None,
+    ):
+        self.max_active_per_user = (
+            settings.ADMISSION_MAX_ACTIVE_PER_USER
+            if max_active_per_user is None
+            else max_active_per_user
+        )
+        self.rate = SlidingWindowCounter(
+            settings.ADMISSION_RATE_LIMIT if rate_limit is None else rate_limit,
+            rate_window or settings.ADMISSION_RATE_WINDOW,
+            shared,
+        )
+        self.max_queue_depth = (
+            settings.ADMISSION_MAX_QUEUE_DEPTH
+            if max_queue_depth is None
+            else max_queue_depth
+        )
+        self.queue_depth_ttl = (
+            settings.ADMISSION_QUEUE_DEPTH_TTL
+            if queue_depth_ttl is None
+            else queue_depth_ttl
+        )
+        self.retry_after = retry_after or settings.ADMISSION_RETRY_AFTER
+        self.shared = shared
+        self.projects = projects or ProjectRepository()
+        self.jobs = jobs or JobRepository()
+
+        self._queue_depth = 0
+        self._queue_depth_expires = 0.0
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {"rate": 0, "queue": 0, "active": 0}
+
+    async def admit(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        project_id: Optional[UUID] = None,
+        enqueue: bool = True,
+    ) -> None:
+        """
+        Пропустить генерацию пользователя или бросить AdmissionRejected
+
+        project_id — проект, генерация которого уже идёт и учтена (поток
+        /stream по нему), в число идущих не входит. enqueue=False — запрос
+        выполняется сразу, мимо очереди, и её глубина не проверяется.
+        """
+        try:
+            await self._check(session, user_id, project_id, enqueue)
+        except AdmissionRejected as e:
+            self.rejected[e.reason] += 1
+            logger.info(f"Generation of user {user_id} rejected: {e}")
+            raise
+        self.admitted += 1
+
+    async def _check(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        project_id: Optional[UUID],
+        enqueue: bool,
+    ) -> None:
+        if self.rate.limit:
+            delay = await self.rate.hit(f"user:{user_id}")
+            if delay is not None:
+                raise AdmissionRejected(
+                    429,
+                    "rate",
+                    delay,
+                    f"Too many generation requests: limit is {self.rate.limit} "
+                    f"per {self.rate.window:g}s",
+                )
+
+        if self.max_queue_depth and enqueue:
+            depth = await self.queue_depth(session)
+            if depth >= self.max_queue_depth:
+                raise AdmissionRejected(
+                    503,
+                    "queue",
+                    self.retry_after,
+                    "Generation queue is full, try again later",
+                )
+
+        if self.max_active_per_user:
+            active = await self.projects.count_generating(
+                session, user_id, exclude=project_id
+            )
+            if active >= self.max_active_per_user:
+                raise AdmissionRejected(
+                    429,
+                    "active",
+                    self.retry_after,
+                    f"Too many generations in progress: limit is "
+                    f"{self.max_active_per_user}",
+                )
+
+    async def queue_depth(self, session: AsyncSession) -> int:
+        """Заданий в очереди (PENDING); перечитывается раз в queue_depth_ttl"""
+        now = time.monotonic()
+        if now >= self._queue_depth_expires:
+            self._queue_depth = await self.jobs.count_pending(session)
+            self._queue_depth_expires = now + self.queue_depth_ttl
+        return self._queue_depth
+
+    async def close(self) -> None:
+        if self.shared is not None:
+            await self.shared.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "admitted": self.admitted,
+            **{f"rejected_{reason}": count for reason, count in self.rejected.items()},
+            "queue_depth": self._queue_depth,
+        }
+
+
+admission_controller = AdmissionController(
+    shared=create_shared_cache(settings.CACHE_URL)
+)
@@ -1,8 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import (
-    hash_password,
-    verify_password,
+    password_hasher,
     create_access_token,
 )
 from app.repositories.user_repo import UserRepository
@@ -29,7 +28,7 @@ class AuthService:
         if existing:
             raise ValueError("Email already registered")
 
-        hashed = hash_password(password)
+        hashed = await password_hasher.hash(password)
         user = await self.user_repo.create(
             session,
             email=email,
@@ -47,7 +46,9 @@ class AuthService:
         self._validate_bcrypt_password(password)
 
         user = await self.user_repo.get_by_email(session, email)
-        if not user or not verify_password(password, user.hashed_password):
+        if not user or not await password_hasher.verify(
+            password, user.hashed_password
+        ):
             raise ValueError("Invalid credentials")
 
         return create_access_token(subject=user.email)
@@ -1,135 +1,674 @@
-from typing import Dict, Any, Optional
+import asyncio
+import os
+import socket
+from typing import AsyncIterator, Dict, Any, Iterable, List, Optional, Tuple
 from uuid import UUID
 import logging
+from sqlalchemy import and_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.ai.agents.frontend_agent import FrontendAgent
-from app.ai.schemas import GeneratedFrontend
-from app.db.session import SessionLocal
+from app.ai.agents.stages import StageCheckpoint
+from app.ai.schemas import GeneratedFrontend, WebsiteStructure
+from app.ai.sections import splice_section_css, splice_section_html
+from app.ai.usage import UsageMeter, usage_scope
+from app.core.events import EventBus, Subscription, event_bus
+from app.models.artifact import ArtifactKind, ProjectArtifact
 from app.models.project import Project, ProjectStatus
-from app.models.job import Job, JobType, JobStatus
-from datetime import datetime
+from app.core.config import settings
+from app.models.job import Job, JobPriority, JobType, JobStatus
+from app.repositories.artifact_repo import ArtifactRepository
+from app.repositories.idempotency_repo import IdempotencyRepository
+from app.repositories.job_repo import JobRepository
+from app.repositories.usage_repo import UsageRepository
+from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
 
 class GenerationService:
-    """Сервис для управления процессом генерации"""
+    """
+    Сервис для управления процессом генерации
 
-    def __init__(self):
-        self.frontend_agent = FrontendAgent()
+    Сессия БД передаётся в каждый метод: в API — из get_db_session
+    (одна на запрос), в воркере — своя на каждое задание.
+    Сгенерированный код хранится версиями в project_artifacts.
+    Смены статуса и завершённые стадии публикуются в шину событий
+    (канал проекта) после коммита — их получают подписчики /generate/events.
+    Токены LLM задания копятся в UsageMeter и пишутся в той же транзакции,
+    что и результат (или статус FAILED).
+    """
+
+    def __init__(
+        self,
+        frontend_agent: Optional[FrontendAgent] = None,
+        artifacts: Optional[ArtifactRepository] = None,
+        events: Optional[EventBus] = None,
+        usage: Optional[UsageRepository] = None,
+        jobs: Optional[JobRepository] = None,
+        idempotency: Optional[IdempotencyRepository] = None,
+    ):
+        self.frontend_agent = frontend_agent or FrontendAgent()
+        self.artifacts = artifacts or ArtifactRepository()
+        self.events = events if events is not None else event_bus
+        self.usage = usage or UsageRepository()
+        self.jobs = jobs or JobRepository()
+        self.idempotency = idempotency or IdempotencyRepository()
+        # Исполнитель потоковой генерации в аренде заданий
+        self.worker_id = f"stream:{socket.gethostname()}:{os.getpid()}"
+
+    @staticmethod
+    def channel(project_id: UUID) -> str:
+        return f"project:{project_id}"
+
+    async def subscribe(self, project_id: UUID) -> Subscription:
+        """Подписка на события проекта (закрыть через subscription.close())"""
+        return await self.events.subscribe(self.channel(project_id))
+
+    async def _publish(self, project_id: UUID, event: str, **data: Any) -> None:
+        # Сбой доставки событий не должен ронять генерацию
+        try:
+            await self.events.publish(
+                self.channel(project_id),
+                {"event": event, "project_id": str(project_id), **data},
+            )
+        except Exception as e:
+            logger.warning(f"Failed to publish {event} event for {project_id}: {e}")
 
     async def start_generation(
-        self, user_prompt: str, project_name: str, user_id: Optional[UUID] = None
+        self,
+        session: AsyncSession,
+        user_prompt: str,
+        project_name: str,
+        color_scheme: Optional[str] = None,
+        user_id: Optional[int] = None,
+        idempotency_key: Optional[str] = None,
+        request_hash: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Запуск процесса генерации сайта
 
+        С idempotency_key ответ запоминается в той же транзакции, что
+        проект и задание; занятый ключ — IntegrityError (см.
+        app/services/idempotency.py).
+
         Returns:
             Dict с project_id и initial status
         """
-        db = SessionLocal()
         try:
             # 1. Создаем проект
             project = Project(
                 name=project_name,
                 description="Автоматически сгенерированный сайт",
                 prompt=user_prompt,
+                color_scheme=color_scheme,
                 user_id=user_id,
                 status=ProjectStatus.GENERATING,
             )
-            db.add(project)
-            db.flush()  # Получаем ID
+            session.add(project)
+            await session.flush()  # Получаем ID
 
-            # 2. Создаем задание для фронтенда
-            frontend_job = Job(
-                project_id=project.id,
-                job_type=JobType.FRONTEND_GENERATION,
-                status=JobStatus.PENDING,
+            # 2. Ставим задание для фронтенда в очередь (класс и метка
+            # справедливой очереди пользователя)
+            frontend_job = await self.jobs.enqueue(
+                session,
+                project.id,
+                JobType.FRONTEND_GENERATION,
                 input_data={"user_prompt": user_prompt},
+                user_id=user_id,
             )
-            db.add(frontend_job)
+            response = {
+                "project_id": str(project.id),
+                "status": "generating",
+                "message": "Генерация начата",
+            }
 
-            db.commit()
+            # 3. Ключ повтора — в той же транзакции: повтор не создаст
+            # второй проект
+            if idempotency_key is not None:
+                await self.idempotency.add(
+                    session,
+                    user_id,
+                    idempotency_key,
+                    request_hash,
+                    project.id,
+                    response,
+                    settings.IDEMPOTENCY_KEY_TTL,
+                )
+
+            await session.commit()
 
             logger.info(
                 f"Created project {project.id} with frontend job {frontend_job.id}"
             )
+            await self._publish(
+                project.id, "status", status="generating", job_status="pending"
+            )
 
-            # 3. Запускаем асинхронную генерацию
-            # В реальном приложении тут будет вызов Celery/Background task
-            # Для простоты делаем синхронно в этом примере
+            # 4. Задание в статусе PENDING подхватит воркер очереди (app/worker.py)
 
-            return {
-                "project_id": str(project.id),
-                "status": "generating",
-                "message": "Генерация начата",
-            }
+            return response
 
         except Exception as e:
-            db.rollback()
+            await session.rollback()
             logger.error(f"Failed to start generation: {e}")
             raise
-        finally:
-            db.close()
 
-    async def generate_frontend(self, project_id: UUID) -> GeneratedFrontend:
-        """Генерация фронтенд части"""
-        db = SessionLocal()
-        try:
-            # Получаем проект
-            project = db.query(Project).filter(Project.id == project_id).first()
-            if not project:
-                raise ValueError(f"Project {project_id} not found")
-
-            # Находим соответствующее задание
-            job = (
-                db.query(Job)
-                .filter(
-                    Job.project_id == project_id,
+    async def get_result(self, session: AsyncSession, project_id: UUID) -> Project:
+        """Проект (статус и метаданные; генерацию выполняет воркер)"""
+        project = await session.get(Project, project_id)
+        if not project:
+            raise ValueError(f"Project {project_id} not found")
+        return project
+
+    async def get_status(
+        self, session: AsyncSession, project_id: UUID
+    ) -> Dict[str, Any]:
+        """Снимок статуса: проект, задание генерации и завершённые стадии"""
+        res = await session.execute(
+            select(Project.status, Job.status, Job.error_message, Job.output_data)
+            .outerjoin(
+                Job,
+                and_(
+                    Job.project_id == Project.id,
                     Job.job_type == JobType.FRONTEND_GENERATION,
-                )
-                .first()
+                ),
             )
+            .where(Project.id == project_id)
+            .limit(1)
+        )
+        row = res.first()
+        if row is None:
+            raise ValueError(f"Project {project_id} not found")
 
-            if job:
-                job.status = JobStatus.RUNNING
-                job.started_at = datetime.utcnow()
-                db.commit()
+        status, job_status, error, output = row
+        return {
+            "project_id": str(project_id),
+            "status": status.value,
+            "job_status": job_status.value if job_status else None,
+            "stages": sorted(((output or {}).get("stages") or {}).keys()),
+            "error": error,
+        }
 
-            # Генерация фронтенда
-            result = await self.frontend_agent.generate(
-                {"user_prompt": project.prompt, "color_scheme": project.color_scheme}
+    async def get_artifacts(
+        self,
+        session: AsyncSession,
+        project_id: UUID,
+        kinds: Optional[Iterable[ArtifactKind]] = None,
+    ) -> Dict[str, Any]:
+        """Последние версии сгенерированного кода: {"html": ..., "structure": {...}}"""
+        return await self.artifacts.load(session, project_id, kinds)
+
+    async def get_artifact(
+        self,
+        session: AsyncSession,
+        project_id: UUID,
+        kind: ArtifactKind,
+        version: Optional[int] = None,
+    ) -> ProjectArtifact:
+        """Одна версия артефакта (по умолчанию — последняя)"""
+        artifact = await self.artifacts.get(session, project_id, kind, version)
+        if artifact is None:
+            raise ValueError(f"Artifact {kind.value} of project {project_id} not found")
+        return artifact
+
+    async def read_artifact(self, artifact: ProjectArtifact) -> str:
+        """Код версии из хранилища артефактов"""
+        return await self.artifacts.read(artifact)
+
+    async def retry_generation(
+        self, session: AsyncSession, project_id: UUID
+    ) -> Dict[str, Any]:
+        """
+        Повторный запуск упавшей генерации
+
+        Задание возвращается в очередь с новой меткой, как только что
+        поставленное; стадии, результаты которых сохранены в чекпоинте,
+        не будут выполняться (и оплачиваться) заново.
+        """
+        project = await session.get(Project, project_id)
+        if not project:
+            raise ValueError(f"Project {project_id} not found")
+        if project.status != ProjectStatus.FAILED:
+            raise RuntimeError(f"Project is not failed: {project.status.value}")
+
+        priority, tag = await self.jobs.schedule(
+            session, JobType.FRONTEND_GENERATION, project.user_id
+        )
+
+        res = await session.execute(
+            update(Job)
+            .where(
+                Job.project_id == project_id,
+                Job.job_type == JobType.FRONTEND_GENERATION,
             )
+            .values(
+                status=JobStatus.PENDING,
+                error_message=None,
+                worker_id=None,
+                lease_expires_at=None,
+                attempts=0,
+                user_id=project.user_id,
+                priority=priority,
+                virtual_finish=tag,
+            )
+        )
+        if res.rowcount != 1:
+            await session.rollback()
+            raise ValueError(f"Frontend job for project {project_id} not found")
 
-            # Обновляем проект
-            project.generated_html = result["html"]
-            project.generated_css = result["css"]
-            project.generated_js = result["javascript"]
-            project.generated_structure = result["structure"]
-            project.status = ProjectStatus.READY
-            project.completed_at = datetime.utcnow()
+        project.status = ProjectStatus.GENERATING
+        await session.commit()
 
-            # Обновляем задание
-            if job:
-                job.status = JobStatus.COMPLETED
-                job.completed_at = datetime.utcnow()
-                job.output_data = {"success": True}
-                job.tokens_used = 1000  # В реальности из response
+        completed = await self._completed_stages(session, project_id)
+        logger.info(f"Project {project_id} requeued, checkpointed stages: {completed}")
+        await self._publish(
+            project_id,
+            "status",
+            status="generating",
+            job_status="pending",
+            resumed_stages=completed,
+        )
+        return {
+            "project_id": str(project_id),
+            "status": "generating",
+            "resumed_stages": completed,
+        }
 
-            db.commit()
+    async def regenerate_sections(
+        self,
+        session: AsyncSession,
+        project_id: UUID,
+        section_types: List[str],
+        instructions: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Перегенерация выбранных секций готового сайта
+
+        Новые HTML-фрагменты и CSS-правила вставляются на место старых
+        по якорям секций; остальная страница не меняется.
+        """
+        project = await session.get(Project, project_id)
+        if not project:
+            raise ValueError(f"Project {project_id} not found")
+        if project.status != ProjectStatus.READY:
+            raise RuntimeError(f"Project is not ready: {project.status.value}")
+
+        section_types = list(dict.fromkeys(section_types))
+        current = await self.artifacts.load(
+            session, project_id, [ArtifactKind.STRUCTURE]
+        )
+        structure = WebsiteStructure(**current[ArtifactKind.STRUCTURE.value])
+
+        # Правка выполняется сразу, минуя очередь: метки справедливой
+        # очереди у задания нет, и виртуальное время оно не сдвигает
+        job = Job(
+            project_id=project.id,
+            user_id=project.user_id,
+            job_type=JobType.SECTION_REGENERATION,
+            status=JobStatus.RUNNING,
+            input_data={"sections": section_types, "instructions": instructions},
+            started_at=datetime.now(timezone.utc),
+            priority=JobPriority.INTERACTIVE,
+        )
+        session.add(job)
+        await session.commit()
+        meter = self._meter(project, job)
+
+        try:
+            with usage_scope(meter):
+                result = await self.frontend_agent.regenerate_sections(
+                    structure, section_types, project.color_scheme, instructions
+                )
+
+            # Склеиваем с актуальной версией: параллельная правка ждёт
+            # блокировки строки проекта и не потеряется
+            await session.refresh(project, with_for_update=True)
+            page = await self.artifacts.load(
+                session, project_id, [ArtifactKind.HTML, ArtifactKind.CSS]
+            )
+            html = page.get(ArtifactKind.HTML.value, "")
+            css = page.get(ArtifactKind.CSS.value, "")
+            for section_type in section_types:
+                html = splice_section_html(
+                    html, section_type, result["html"][section_type]
+                )
+                css = splice_section_css(css, section_type, result["css"][section_type])
+            await self.artifacts.save(
+                session, project_id, {ArtifactKind.HTML: html, ArtifactKind.CSS: css}
+            )
+
+            job.status = JobStatus.COMPLETED
+            job.completed_at = datetime.now(timezone.utc)
+            job.output_data = {"success": True, "sections": section_types}
+            await self._commit_usage(session, meter)
+
+        except Exception as e:
+            await self._mark_failed(session, None, job, e, meter)
+            raise
+
+        await self._publish(project_id, "sections", sections=section_types)
+
+        return {
+            "project_id": str(project_id),
+            "sections": section_types,
+            "tokens_used": meter.total_tokens,
+        }
+
+    async def generate_frontend(
+        self, session: AsyncSession, project_id: UUID
+    ) -> GeneratedFrontend:
+        """Генерация фронтенд части (продолжает с последнего чекпоинта)"""
+        project = job = meter = None
+        try:
+            project, job = await self._start_frontend_job(session, project_id)
+            meter = self._meter(project, job)
+
+            # Генерация фронтенда
+            with usage_scope(meter):
+                result = await self.frontend_agent.generate(
+                    {
+                        "user_prompt": project.prompt,
+                        "color_scheme": project.color_scheme,
+                        "user_id": project.user_id,
+                    },
+                    self._checkpoint(session, job, meter),
+                )
+
+            await self._apply_frontend_result(session, project, job, result)
+            await self._commit_usage(session, meter)
+            await self._publish_ready(project.id)
 
             return GeneratedFrontend(**result)
 
         except Exception as e:
-            # Обновляем статус при ошибке
-            if "project" in locals() and project:
-                project.status = ProjectStatus.FAILED
+            await self._mark_failed(session, project, job, e, meter)
+            raise
 
-            if "job" in locals() and job:
-                job.status = JobStatus.FAILED
-                job.error_message = str(e)
+    async def stream_frontend(
+        self, session: AsyncSession, project_id: UUID
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Генерация фронтенд части с потоковой выдачей событий агента
+        (token / stage / done). Результат сохраняется так же, как в generate_frontend.
+        """
+        # Задание выполняется здесь, поэтому воркер не должен его забрать.
+        # Если его уже забрали, статусы не трогаем.
+        project, job = await self._start_frontend_job(
+            session, project_id, require_pending=True
+        )
+        meter = self._meter(project, job)
+        # Чекпоинты стадий и продление аренды коммитят одну сессию — по очереди
+        lock = asyncio.Lock()
+        lease_lost = asyncio.Event()
+        job_id = job.id if job else None
+        lease = (
+            asyncio.create_task(self._keep_lease(session, job_id, lock, lease_lost))
+            if job
+            else None
+        )
+        events = None
+        try:
+            # Задача генерации создаётся на первом шаге итератора и берёт
+            # счётчик токенов из контекста; между событиями он не нужен
+            with usage_scope(meter):
+                events = self.frontend_agent.stream(
+                    {
+                        "user_prompt": project.prompt,
+                        "color_scheme": project.color_scheme,
+                        "user_id": project.user_id,
+                    },
+                    self._checkpoint(session, job, meter, lock),
+                )
+                event = await anext(events, None)
+
+            while event is not None:
+                if lease_lost.is_set():
+                    # Аренду перебрал воркер — задание теперь его
+                    logger.warning(f"Stream for {project_id}: job lease lost")
+                    await events.aclose()
+                    await session.rollback()
+                    return
+                if event["event"] == "done":
+                    await self._stop_lease(lease)
+                    result = event["result"]
+                    await self._apply_frontend_result(session, project, job, result)
+                    await self._commit_usage(session, meter)
+                    await self._publish_ready(project.id)
+                    event = {
+                        "event": "done",
+                        "project_id": str(project_id),
+                        "structure": result["structure"],
+                        "stage_timings": result["stage_timings"],
+                    }
+                yield event
+                event = await anext(events, None)
 
-            db.commit()
-            logger.error(f"Failed to generate frontend: {e}")
+        except (asyncio.CancelledError, GeneratorExit):
+            # Клиент отключился: генерацию доделает воркер очереди, а уже
+            # потраченные токены учитываем сейчас. Сначала останавливаем
+            # генерацию — её стадии коммитят чекпоинты в эту же сессию,
+            # и задание нельзя отдавать воркеру, пока они идут
+            await self._stop_lease(lease)
+            if events is not None:
+                await events.aclose()
+            await session.rollback()
+            await self._commit_usage(session, meter)
+            if job_id:
+                await self.jobs.release(session, job_id, self.worker_id)
+            raise
+        except Exception as e:
+            await self._stop_lease(lease)
+            if events is not None:
+                await events.aclose()
+            await self._mark_failed(session, project, job, e, meter)
             raise
         finally:
-            db.close()
+            await self._stop_lease(lease)
+
+    async def _keep_lease(
+        self,
+        session: AsyncSession,
+        job_id: UUID,
+        lock: asyncio.Lock,
+        lost: asyncio.Event,
+    ) -> None:
+        """Продление аренды потокового задания, пока идёт генерация"""
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_SECONDS)
+            async with lock:
+                try:
+                    alive = await self.jobs.heartbeat(
+                        session, job_id, self.worker_id, settings.JOB_LEASE_SECONDS
+                    )
+                except Exception as e:
+                    # Временная ошибка БД: аренда ещё действует, пробуем снова
+                    logger.warning(f"Heartbeat for job {job_id} failed: {e}")
+                    await session.rollback()
+                    continue
+
+            if not alive:
+                lost.set()
+                return
+
+    @staticmethod
+    async def _stop_lease(lease: Optional[asyncio.Task]) -> None:
+        if lease is None or lease.done():
+            return
+        lease.cancel()
+        try:
+            await lease
+        except asyncio.CancelledError:
+            pass
+
+    async def _start_frontend_job(
+        self, session: AsyncSession, project_id: UUID, require_pending: bool = False
+    ) -> Tuple[Project, Optional[Job]]:
+        # Получаем проект
+        project = await session.get(Project, project_id)
+        if not project:
+            raise ValueError(f"Project {project_id} not found")
+
+        # Находим соответствующее задание
+        res = await session.execute(
+            select(Job)
+            .where(
+                Job.project_id == project_id,
+                Job.job_type == JobType.FRONTEND_GENERATION,
+            )
+            .limit(1)
+        )
+        job = res.scalar_one_or_none()
+
+        if job and require_pending:
+            # Из PENDING задание забирает только один исполнитель — с арендой,
+            # как у воркера: если процесс API упадёт, воркер её переберёт
+            claimed = await self.jobs.claim(
+                session, job.id, self.worker_id, settings.JOB_LEASE_SECONDS
+            )
+            if not claimed:
+                raise ValueError(
+                    f"Frontend job for project {project_id} is already taken"
+                )
+            await session.refresh(job)
+        elif job and job.status != JobStatus.RUNNING:
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.now(timezone.utc)
+            await session.commit()
+
+        await self._publish(
+            project_id,
+            "status",
+            status=project.status.value,
+            job_status="running" if job else None,
+        )
+        return project, job
+
+    def _checkpoint(
+        self,
+        session: AsyncSession,
+        job: Optional[Job],
+        meter: Optional[UsageMeter] = None,
+        lock: Optional[asyncio.Lock] = None,
+    ) -> Optional[StageCheckpoint]:
+        """
+        Чекпоинты стадий в job.output_data["stages"]
+
+        Результат стадии коммитится сразу после её завершения вместе с уже
+        потраченными токенами, поэтому переживает и ошибку генерации,
+        и падение воркера.
+        """
+        if job is None:
+            return None
+
+        stages: Dict[str, Any] = dict((job.output_data or {}).get("stages") or {})
+        lock = lock or asyncio.Lock()
+
+        async def save(stage: str, result: Any) -> None:
+            # Параллельные стадии делят одну сессию — сохраняем по очереди
+            async with lock:
+                stages[stage] = result
+                job.output_data = {**(job.output_data or {}), "stages": dict(stages)}
+                await self._commit_usage(session, meter)
+            await self._publish(job.project_id, "stage", stage=stage)
+
+        return StageCheckpoint(completed=dict(stages), save=save)
+
+    @staticmethod
+    async def _completed_stages(session: AsyncSession, project_id: UUID) -> list:
+        output = await session.scalar(
+            select(Job.output_data).where(
+                Job.project_id == project_id,
+                Job.job_type == JobType.FRONTEND_GENERATION,
+            )
+        )
+        return sorted(((output or {}).get("stages") or {}).keys())
+
+    async def _apply_frontend_result(
+        self,
+        session: AsyncSession,
+        project: Project,
+        job: Optional[Job],
+        result: Dict[str, Any],
+    ) -> None:
+        # Новые версии кода — в одной транзакции со статусом проекта
+        await self.artifacts.save(
+            session,
+            project.id,
+            {
+                ArtifactKind.STRUCTURE: result["structure"],
+                ArtifactKind.HTML: result["html"],
+                ArtifactKind.CSS: result["css"],
+                ArtifactKind.JAVASCRIPT: result["javascript"],
+            },
+        )
+
+        # Обновляем проект
+        project.status = ProjectStatus.READY
+        project.completed_at = datetime.now(timezone.utc)
+
+        # Обновляем задание
+        if job:
+            job.status = JobStatus.COMPLETED
+            job.completed_at = datetime.now(timezone.utc)
+            # Чекпоинты остаются: из них берутся стадии при перегенерации частей
+            job.output_data = {
+                **(job.output_data or {}),
+                "success": True,
+                "stage_timings": result["stage_timings"],
+            }
+
+    @staticmethod
+    def _meter(project: Project, job: Optional[Job]) -> UsageMeter:
+        return UsageMeter(project.id, project.user_id, job.id if job else None)
+
+    async def _commit_usage(
+        self, session: AsyncSession, meter: Optional[UsageMeter]
+    ) -> None:
+        """
+        Коммит вместе с ещё не записанными токенами meter
+
+        Записанными они считаются только после коммита: если он не удался,
+        токены войдут в следующую запись (например, со статусом FAILED).
+        """
+        usage = meter.unrecorded() if meter is not None else None
+        if usage is not None:
+            await self.usage.record(session, usage)
+        await session.commit()
+        if usage is not None:
+            meter.mark_recorded(usage)
+
+    async def _publish_ready(self, project_id: UUID) -> None:
+        await self._publish(
+            project_id, "status", status="ready", job_status="completed"
+        )
+
+    async def _mark_failed(
+        self,
+        session: AsyncSession,
+        project: Optional[Project],
+        job: Optional[Job],
+        error: Exception,
+        meter: Optional[UsageMeter] = None,
+    ) -> None:
+        # Незавершённые изменения не должны попасть в БД вместе со статусом
+        await session.rollback()
+
+        # Обновляем статус при ошибке
+        if project:
+            project.status = ProjectStatus.FAILED
+
+        if job:
+            job.status = JobStatus.FAILED
+            job.error_message = str(error)
+
+        # Токены упавшего задания тоже оплачены
+        await self._commit_usage(session, meter)
+        logger.error(f"Failed to generate frontend: {error}")
+        if project:
+            await self._publish(
+                project.id,
+                "status",
+                status="failed",
+                job_status="failed" if job else None,
+                error=str(error),
+            )
@@ -0,0 +1,110 @@
+"""
+Idempotency-Key для /generate/start: повтор запроса (клиент не дождался
+ответа) не создаёт второй проект и не запускает второй платный конвейер.
+
+Ключ с ответом пишется в одной транзакции с проектом и заданием
+(GenerationService.start_generation) и живёт IDEMPOTENCY_KEY_TTL сек.
+Повтор с тем же ключом получает project_id исходного запроса и текущий
+статус проекта. Повторы, пришедшие, пока первый запрос выполняется,
+ждут его: в процессе — на его future, между процессами — на уникальном
+индексе (user_id, key).
+
+Docs:
+https://datatracker.ietf.org/doc/draft-ietf-httpapi-idempotency-key-header/
+https://docs.stripe.com/api/idempotent_requests
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.project import Project
+from app.repositories.idempotency_repo import IdempotencyRepository
+
+logger = logging.getLogger(__name__)
+
+
+def request_hash(payload: Dict[str, Any]) -> str:
+    """SHA-256 тела запроса: повтор с тем же ключом должен совпасть с ним"""
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class IdempotencyService:
+    def __init__(self, repo: Optional[IdempotencyRepository] = None):
+        self.repo = repo or IdempotencyRepository()
+        self._in_flight: Dict[Tuple[int, str], asyncio.Future] = {}
+
+    async def run(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        key: str,
+        payload_hash: str,
+        start: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """
+        Выполнить start() один раз на ключ пользователя.
+
+        start() сам записывает ключ (в транзакции с проектом). Повтор
+        возвращает сохранённый ответ; если первый запрос упал, повтор
+        выполняет start() заново. RuntimeError — ключ уже использован
+        с другим телом запроса.
+        """
+        flight = (user_id, key)
+        # Future регистрируется без await после проверки: из одновременных
+        # повторов в процессе выполняется один, остальные ждут его
+        while (future := self._in_flight.get(flight)) is not None:
+            await asyncio.wait([future])
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[flight] = future
+        try:
+            replay = await self.replay(session, user_id, key, payload_hash)
+            if replay is not None:
+                return replay
+            try:
+                result = await start()
+            except IntegrityError:
+                # Тот же ключ успел записать другой процесс
+                replay = await self.replay(session, user_id, key, payload_hash)
+                if replay is None:
+                    raise
+                return replay
+        finally:
+            del self._in_flight[flight]
+            future.set_result(None)
+
+        try:
+            await self.repo.purge_expired(session)
+        except Exception as e:
+            await session.rollback()
+            logger.warning(f"Failed to purge expired idempotency keys: {e}")
+        return result
+
+    async def replay(
+        self, session: AsyncSession, user_id: int, key: str, payload_hash: str
+    ) -> Optional[Dict[str, Any]]:
+        """Ответ исходного запроса с текущим статусом проекта или None"""
+        record = await self.repo.get(session, user_id, key)
+        if record is None:
+            return None
+        if record.request_hash != payload_hash:
+            raise RuntimeError(
+                "Idempotency-Key has already been used with a different request"
+            )
+
+        response = dict(record.response or {})
+        if record.project_id is not None:
+            status = await session.scalar(
+                select(Project.status).where(Project.id == record.project_id)
+            )
+            if status is not None:
+                response["status"] = status.value
+        logger.info(f"Replayed /generate/start for key {key} of user {user_id}")
+        return {**response, "replayed": True}
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import JOB_DURATION, JOB_QUEUE_DEPTH, JOBS_RUNNING
+from app.models.job import QUEUED_JOB_STATUSES, Job, JobStatus, JobType
+from app.repositories.job_repo import JobRepository
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Job], Awaitable[Any]]
+
+
+class JobWorker:
+    """
+    Воркер очереди заданий (таблица jobs)
+
+    Забирает задания через SELECT ... FOR UPDATE SKIP LOCKED и выполняет
+    до concurrency штук одновременно. Пока задание выполняется, воркер
+    продлевает аренду (heartbeat); если процесс упадёт, аренда истечёт
+    и задание заберёт другой воркер.
+    """
+
+    def __init__(
+        self,
+        handlers: Dict[JobType, JobHandler],
+        concurrency: Optional[int] = None,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        worker_id: Optional[str] = None,
+        lease_seconds: Optional[int] = None,
+        heartbeat_seconds: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        self.handlers = handlers
+        self.concurrency = concurrency or settings.JOB_WORKER_CONCURRENCY
+        self.session_factory = session_factory
+        self.worker_id = (
+            worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        )
+        self.lease_seconds = lease_seconds or settings.JOB_LEASE_SECONDS
+        self.heartbeat_seconds = heartbeat_seconds or settings.JOB_HEARTBEAT_SECONDS
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL
+        self.max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+
+        self.repo = JobRepository()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._running: Dict[UUID, asyncio.Task] = {}
+        self._stopping = asyncio.Event()
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    def stop(self) -> None:
+        """Перестать забирать задания; run() дождётся текущих"""
+        self._stopping.set()
+
+    async def run(self) -> None:
+        logger.info(
+            f"Worker {self.worker_id} started (concurrency={self.concurrency})"
+        )
+        while not self._stopping.is_set():
+            await self._slots.acquire()
+            if self._stopping.is_set():
+                self._slots.release()
+                break
+
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} failed to claim job: {e}")
+                job = None
+
+            if job is None:
+                self._slots.release()
+                await self._idle(self.poll_interval)
+                continue
+
+            task = asyncio.create_task(self._process(job), name=f"job:{job.id}")
+            self._running[job.id] = task
+            task.add_done_callback(lambda _, job_id=job.id: self._on_done(job_id))
+
+        await self._drain()
+        logger.info(f"Worker {self.worker_id} stopped")
+
+    def _on_done(self, job_id: UUID) -> None:
+        self._running.pop(job_id, None)
+        self._slots.release()
+
+    async def _idle(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _drain(self) -> None:
+        """Дождаться текущих заданий; не успевшие — вернуть в очередь"""
+        tasks = list(self._running.values())
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=self.lease_seconds)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def update_queue_depth(self) -> None:
+        """Gauge job_queue_depth по статусам (вызывается при чтении метрик)"""
+        async with self.session_factory() as session:
+            counts = await self.repo.count_by_status(session, QUEUED_JOB_STATUSES)
+        for status in QUEUED_JOB_STATUSES:
+            JOB_QUEUE_DEPTH.labels(status.value).set(counts.get(status, 0))
+
+    async def _claim(self) -> Optional[Job]:
+        async with self.session_factory() as session:
+            job = await self.repo.claim_next(
+                session,
+                worker_id=self.worker_id,
+                lease_seconds=self.lease_seconds,
+                max_attempts=self.max_attempts,
+                job_types=list(self.handlers),
+            )
+            if job is None:
+                failed = await self.repo.fail_exhausted(session, self.max_attempts)
+                if failed:
+                    logger.warning(f"Marked {failed} abandoned job(s) as failed")
+            return job
+
+    async def _heartbeat(self, job_id: UUID, work: asyncio.Task, lost: asyncio.Event):
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                async with self.session_factory() as session:
+                    alive = await self.repo.heartbeat(
+                        session, job_id, self.worker_id, self.lease_seconds
+                    )
+                    job = None if alive else await self.repo.get(session, job_id)
+            except Exception as e:
+                # Временная ошибка БД: аренда ещё действует, пробуем снова
+                logger.warning(f"Heartbeat for job {job_id} failed: {e}")
+                continue
+
+            if alive:
+                continue
+            if job is not None and job.worker_id == self.worker_id:
+                # Задание всё ещё наше, но уже не RUNNING: обработчик сам
+                # закоммитил итоговый статус — продлевать больше нечего
+                return
+            lost.set()
+            work.cancel()
+            return
+
+    async def _process(self, job: Job) -> None:
+        logger.info(
+            f"Worker {self.worker_id} picked job {job.id} "
+            f"({job.job_type.value}, attempt {job.attempts})"
+        )
+        lease_lost = asyncio.Event()
+        started = time.perf_counter()
+        JOBS_RUNNING.inc()
+        work = asyncio.create_task(self.handlers[job.job_type](job))
+        heartbeat = asyncio.create_task(self._heartbeat(job.id, work, lease_lost))
+
+        status, error = JobStatus.COMPLETED, None
+        try:
+            await work
+        except asyncio.CancelledError:
+            if lease_lost.is_set():
+                logger.warning(f"Job {job.id}: lease lost, abandoning")
+                return
+            # Остановка воркера: задание вернётся в очередь
+            async with self.session_factory() as session:
+                await self.repo.release(session, job.id, self.worker_id)
+            raise
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            status, error = JobStatus.FAILED, str(e)
+        finally:
+            heartbeat.cancel()
+            JOBS_RUNNING.dec()
+
+        JOB_DURATION.labels(job.job_type.value, status.value).observe(
+            time.perf_counter() - started
+        )
+        async with self.session_factory() as session:
+            await self.repo.finish(session, job.id, self.worker_id, status, error)
+        logger.info(f"Job {job.id} finished with status {status.value}")
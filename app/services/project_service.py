@@ -1,5 +1,7 @@
+from uuid import UUID
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.repositories.project_repo import ProjectRepository
+from app.repositories.project_repo import ProjectPage, ProjectRepository
 from app.models import Project
 
 
@@ -11,33 +13,37 @@ class ProjectService:
         self,
         session: AsyncSession,
         user_id: int,
-        title: str,
+        name: str,
         prompt: str,
-        tech_stack: str,
+        color_scheme: str | None = None,
     ) -> Project:
         return await self.repo.create(
             session,
             user_id=user_id,
-            title=title,
+            name=name,
             prompt=prompt,
-            tech_stack=tech_stack,
+            color_scheme=color_scheme,
         )
 
     async def list_my(
         self,
         session: AsyncSession,
         user_id: int,
-    ) -> list[Project]:
+        limit: int = 20,
+        cursor: str | None = None,
+    ) -> ProjectPage:
         return await self.repo.list_by_user(
             session,
             user_id=user_id,
+            limit=limit,
+            cursor=cursor,
         )
 
     async def get_my(
         self,
         session: AsyncSession,
         user_id: int,
-        project_id: int,
+        project_id: UUID,
     ) -> Project | None:
         return await self.repo.get(
             session,
@@ -0,0 +1,80 @@
+from datetime import datetime, time, timedelta, timezone
+from typing import Any, Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.repositories.usage_repo import UsageRepository
+
+
+def usage_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    """Стоимость токенов в USD по ценам из настроек"""
+    return round(
+        (
+            prompt_tokens * settings.LLM_PRICE_PROMPT_PER_MTOK
+            + completion_tokens * settings.LLM_PRICE_COMPLETION_PER_MTOK
+        )
+        / 1_000_000,
+        6,
+    )
+
+
+def _with_cost(row: Dict[str, Any]) -> Dict[str, Any]:
+    prompt = int(row.get("prompt_tokens") or 0)
+    completion = int(row.get("completion_tokens") or 0)
+    return {
+        **row,
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "calls": int(row.get("calls") or 0),
+        "cost": usage_cost(prompt, completion),
+    }
+
+
+class UsageService:
+    def __init__(self, repo: UsageRepository):
+        self.repo = repo
+
+    async def report(
+        self, session: AsyncSession, user_id: int, days: int = 30, top: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Расход токенов пользователя за последние days дней (UTC, включая
+        сегодня): по дням — из свёртки, проекты и стадии — из llm_usage
+        """
+        since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+        since_at = datetime.combine(since, time.min, tzinfo=timezone.utc)
+
+        daily = [
+            _with_cost(
+                {
+                    "day": row.day,
+                    "jobs": row.jobs,
+                    "prompt_tokens": row.prompt_tokens,
+                    "completion_tokens": row.completion_tokens,
+                    "calls": row.calls,
+                }
+            )
+            for row in await self.repo.daily(session, user_id, since)
+        ]
+        totals = _with_cost(
+            {
+                key: sum(day[key] for day in daily)
+                for key in ("prompt_tokens", "completion_tokens", "calls")
+            }
+        )
+        return {
+            "since": since,
+            "totals": totals,
+            "days": daily,
+            "top_projects": [
+                _with_cost(row)
+                for row in await self.repo.top_projects(
+                    session, user_id, since_at, top
+                )
+            ],
+            "stages": [
+                _with_cost(row)
+                for row in await self.repo.by_stage(session, user_id, since_at)
+            ],
+        }
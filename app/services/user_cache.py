@@ -0,0 +1,181 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import (
+    ORMExecuteState,
+    Session,
+    make_transient_to_detached,
+    object_session,
+)
+
+from app.core.cache import SharedCache, TTLCache, create_shared_cache
+from app.core.config import settings
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+# Только то, что нужно запросу после аутентификации: хэш пароля в кэш
+# (и в общий кэш) не попадает, у объекта из кэша он не загружен
+_COLUMNS = ("id", "email", "is_active", "created_at")
+
+
+class UserCache:
+    """
+    Кэш аутентифицированных пользователей по subject токена (email).
+
+    Два уровня: LRU с TTL в памяти процесса и, опционально, общий кэш
+    (SharedCache) для нескольких процессов. Из кэша возвращается
+    объект User, присоединённый к сессии запроса без запроса к БД.
+    """
+
+    KEY_PREFIX = "user:"
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        max_size: Optional[int] = None,
+        shared: Optional[SharedCache] = None,
+    ):
+        self.ttl = settings.USER_CACHE_TTL if ttl is None else ttl
+        self.local: TTLCache[str, Dict[str, Any]] = TTLCache(
+            max_size=max_size or settings.USER_CACHE_MAX_SIZE, ttl=self.ttl
+        )
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, email: str) -> str:
+        return f"{self.KEY_PREFIX}{email}"
+
+    async def get(self, session: AsyncSession, email: str) -> Optional[User]:
+        data = self.local.get(email)
+
+        if data is None and self.shared is not None:
+            try:
+                raw = await self.shared.get(self._key(email))
+            except Exception as e:
+                logger.warning(f"Shared user cache unavailable: {e}")
+                raw = None
+            if raw is not None:
+                data = _loads(raw)
+                self.local.set(email, data)
+
+        if data is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        user = User(**data)
+        make_transient_to_detached(user)
+        return await session.merge(user, load=False)
+
+    async def set(self, user: User) -> None:
+        data = {key: getattr(user, key) for key in _COLUMNS}
+        self.local.set(user.email, data)
+
+        if self.shared is not None:
+            try:
+                await self.shared.set(self._key(user.email), _dumps(data), self.ttl)
+            except Exception as e:
+                logger.warning(f"Shared user cache unavailable: {e}")
+
+    async def invalidate(self, email: str) -> None:
+        """Сбросить пользователя во всех уровнях (смена данных, деактивация)"""
+        self.local.delete(email)
+        if self.shared is not None:
+            await self.shared.delete(self._key(email))
+
+    def invalidate_soon(self, email: str) -> None:
+        """Синхронный вариант для хуков ORM: локально сразу, в общем кэше — задачей"""
+        self.local.delete(email)
+        if self.shared is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        loop.create_task(self.shared.delete(self._key(email)))
+
+    def clear(self) -> None:
+        self.local.clear()
+
+    async def close(self) -> None:
+        if self.shared is not None:
+            await self.shared.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self.local),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.local.evictions,
+        }
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    return json.dumps(
+        {k: v.isoformat() if isinstance(v, datetime) else v for k, v in data.items()}
+    )
+
+
+def _loads(raw: str) -> Dict[str, Any]:
+    data = json.loads(raw)
+    for key in ("created_at",):
+        if data.get(key):
+            data[key] = datetime.fromisoformat(data[key])
+    return data
+
+
+user_cache = UserCache(shared=create_shared_cache(settings.CACHE_URL))
+
+
+_PENDING_KEY = "user_cache_invalidate"
+
+
+def _pending(session: Session) -> Set[str]:
+    return session.info.setdefault(_PENDING_KEY, set())
+
+
+# Сбрасываем кэш только после коммита: при сбросе на flush параллельный
+# запрос успел бы снова закэшировать ещё не изменённую строку
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _collect_changed_user(mapper, connection, target: User) -> None:
+    session = object_session(target)
+    if session is None:
+        return
+    # И текущий, и прежний email (если его поменяли)
+    history = inspect(target).attrs.email.history
+    _pending(session).update(
+        email for email in {target.email, *(history.deleted or ())} if email
+    )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_changed_users(state: ORMExecuteState) -> None:
+    # update(User) / delete(User) минуют события маппера: email
+    # затронутых строк выбираем тем же условием до выполнения запроса
+    if not (state.is_update or state.is_delete):
+        return
+    if not any(mapper.class_ is User for mapper in state.all_mappers):
+        return
+    emails = select(User.email)
+    if state.statement.whereclause is not None:
+        emails = emails.where(state.statement.whereclause)
+    _pending(state.session).update(state.session.execute(emails).scalars())
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    for email in session.info.pop(_PENDING_KEY, ()):
+        user_cache.invalidate_soon(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_users(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
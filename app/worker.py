@@ -0,0 +1,103 @@
+"""
+Воркер очереди заданий генерации (отдельный процесс от API).
+
+    python -m app.worker --concurrency 8 --metrics-port 9101
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+
+from aiohttp import web
+
+from .ai.client import deepseek_client
+from .core.config import settings
+from .core.database import AsyncSessionLocal
+from .core.events import event_bus
+from .core.logging import setup_logging
+from .core.metrics import CONTENT_TYPE, register_stats_collectors, registry
+from .core.shutdown import close_all
+from .core.storage import artifact_store
+from .models.job import Job, JobType
+from .services.generation_service import GenerationService
+from .services.job_worker import JobWorker
+
+logger = logging.getLogger(__name__)
+
+
+def build_worker(concurrency: int | None = None) -> JobWorker:
+    service = GenerationService()
+
+    async def frontend_generation(job: Job) -> None:
+        # Своя сессия на каждое задание
+        async with AsyncSessionLocal() as session:
+            await service.generate_frontend(session, job.project_id)
+
+    return JobWorker(
+        handlers={JobType.FRONTEND_GENERATION: frontend_generation},
+        concurrency=concurrency,
+    )
+
+
+async def start_metrics_server(worker: JobWorker, port: int) -> web.AppRunner:
+    """/metrics воркера: задания, вызовы LLM и запросы к БД этого процесса"""
+
+    async def metrics(request: web.Request) -> web.Response:
+        await worker.update_queue_depth()
+        return web.Response(
+            body=registry.render().encode("utf-8"),
+            headers={"Content-Type": CONTENT_TYPE},
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port).start()
+    logger.info(f"Worker metrics on :{port}/metrics")
+    return runner
+
+
+async def main(concurrency: int, metrics_port: int) -> None:
+    setup_logging()
+    worker = build_worker(concurrency)
+    register_stats_collectors()
+    metrics_runner = None
+    if metrics_port:
+        metrics_runner = await start_metrics_server(worker, metrics_port)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    await deepseek_client.start()
+    try:
+        await worker.run()
+    finally:
+        resources = [
+            ("deepseek_client", deepseek_client.close),
+            ("artifact_store", artifact_store.close),
+            ("event_bus", event_bus.close),
+        ]
+        if metrics_runner is not None:
+            resources.insert(0, ("metrics_server", metrics_runner.cleanup))
+        await close_all(resources)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generation job worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.JOB_WORKER_CONCURRENCY,
+        help="сколько заданий выполнять одновременно в этом процессе",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=settings.WORKER_METRICS_PORT,
+        help="порт /metrics для Prometheus (0 — не открывать)",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.metrics_port))
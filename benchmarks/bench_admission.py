@@ -0,0 +1,152 @@
+"""
+Бенчмарк: всплеск генераций от одного клиента и ожидание остальных.
+
+Один "абьюзер" ставит --abuse-rate генераций в секунду, --tenants
+обычных пользователей — по одной раз в --interval сек. Воркеры
+(--workers, генерация длится --job-seconds) разбирают очередь. Печатает
+ожидание в очереди (от постановки до взятия воркером) для обычных
+пользователей и абьюзера, сколько запросов допущено и отклонено —
+без допуска и с лимитами AdmissionController.
+
+    python -m benchmarks.bench_admission --seconds 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from collections import Counter
+from uuid import UUID
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.events import MemoryEventBus
+from app.models import Base, Project, User
+from app.models.job import JobStatus
+from app.models.project import ProjectStatus
+from app.repositories.job_repo import JobRepository
+from app.services.admission import AdmissionController, AdmissionRejected
+from app.services.generation_service import GenerationService
+
+
+def _percentiles(samples: list) -> str:
+    if not samples:
+        return "n=    0"
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return (
+        f"n={len(ordered):5d}  p50={statistics.median(ordered):6.2f} s  "
+        f"p99={p99:6.2f} s"
+    )
+
+
+async def run(args, admission: AdmissionController) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with session_factory() as session:
+        users = [
+            User(email=f"u{i}@example.com", hashed_password="-")
+            for i in range(args.tenants + 1)
+        ]
+        session.add_all(users)
+        await session.commit()
+    abuser, tenants = users[0].id, [u.id for u in users[1:]]
+
+    service = GenerationService(events=MemoryEventBus())
+    jobs = JobRepository()
+    submitted: dict[UUID, tuple[int, float]] = {}
+    waits: dict[str, list] = {"tenant": [], "abuser": []}
+    outcomes: Counter = Counter()
+    deadline = time.perf_counter() + args.seconds
+    # В SQLite нет SKIP LOCKED: воркеры забирают задания по очереди
+    claim_lock = asyncio.Lock()
+
+    async def submit(user_id: int) -> None:
+        kind = "abuser" if user_id == abuser else "tenant"
+        async with session_factory() as session:
+            try:
+                await admission.admit(session, user_id)
+            except AdmissionRejected as e:
+                outcomes[f"{kind} rejected ({e.status_code})"] += 1
+                return
+            started = await service.start_generation(
+                session, "портфолио", "p", user_id=user_id
+            )
+        outcomes[f"{kind} admitted"] += 1
+        submitted[UUID(started["project_id"])] = (user_id, time.perf_counter())
+
+    async def client(user_id: int, rate: float) -> None:
+        while time.perf_counter() < deadline:
+            asyncio.create_task(submit(user_id))
+            await asyncio.sleep(1 / rate)
+
+    async def worker(n: int) -> None:
+        while time.perf_counter() < deadline + args.job_seconds:
+            async with claim_lock, session_factory() as session:
+                job = await jobs.claim_next(session, f"w{n}", 60, 3)
+            if job is None:
+                await asyncio.sleep(0.01)
+                continue
+            user_id, queued_at = submitted[job.project_id]
+            kind = "abuser" if user_id == abuser else "tenant"
+            waits[kind].append(time.perf_counter() - queued_at)
+            await asyncio.sleep(args.job_seconds)
+            async with session_factory() as session:
+                await session.execute(
+                    update(Project)
+                    .where(Project.id == job.project_id)
+                    .values(status=ProjectStatus.READY)
+                )
+                await jobs.finish(session, job.id, f"w{n}", JobStatus.COMPLETED)
+
+    await asyncio.gather(
+        client(abuser, args.abuse_rate),
+        *(client(t, 1 / args.interval) for t in tenants),
+        *(worker(n) for n in range(args.workers)),
+    )
+    await engine.dispose()
+
+    for kind in ("tenant", "abuser"):
+        print(f"  {kind:<7} queue wait  {_percentiles(waits[kind])}")
+    print("  " + ", ".join(f"{k}: {v}" for k, v in sorted(outcomes.items())))
+
+
+async def main(args: argparse.Namespace) -> None:
+    print("admission off")
+    await run(
+        args,
+        AdmissionController(max_active_per_user=0, rate_limit=0, max_queue_depth=0),
+    )
+    print(
+        f"admission on (active<={args.max_active}, "
+        f"{args.rate_limit}/{args.rate_window:g}s, queue<={args.max_queue})"
+    )
+    await run(
+        args,
+        AdmissionController(
+            max_active_per_user=args.max_active,
+            rate_limit=args.rate_limit,
+            rate_window=args.rate_window,
+            max_queue_depth=args.max_queue,
+        ),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--tenants", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=2.0)
+    parser.add_argument("--abuse-rate", type=float, default=50.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--job-seconds", type=float, default=0.5)
+    parser.add_argument("--max-active", type=int, default=3)
+    parser.add_argument("--rate-limit", type=int, default=10)
+    parser.add_argument("--rate-window", type=float, default=60)
+    parser.add_argument("--max-queue", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
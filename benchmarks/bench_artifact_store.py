@@ -0,0 +1,117 @@
+"""
+Бенчмарк: объём хранилища артефактов — дедупликация и сжатие.
+
+Синтетические проекты: HTML у каждого свой, CSS и JS выбираются из
+нескольких типовых вариантов (тема оформления, стандартный скрипт меню),
+как это бывает у сгенерированных сайтов. Печатает исходный объём кода,
+объём после дедупликации и после сжатия, а также время put/get.
+
+    python -m benchmarks.bench_artifact_store --projects 1000 --themes 8
+    python -m benchmarks.bench_artifact_store --codec zstd
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from app.core.storage import ArtifactStore, MemoryBlobStore, default_codec
+
+SECTIONS = ["hero", "about", "services", "projects", "pricing", "faq", "contacts"]
+WORDS = (
+    "мы делаем сайты быстро качественно недорого команда опыт клиенты "
+    "проекты отзывы цены связаться портфолио услуги дизайн разработка"
+).split()
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def html(rng: random.Random, i: int) -> str:
+    sections = rng.sample(SECTIONS, rng.randint(3, len(SECTIONS)))
+    body = "\n".join(
+        f'<section id="{name}" class="section-{name}">\n'
+        f"  <h2>{_text(rng, 4)}</h2>\n"
+        + "".join(f"  <p>{_text(rng, 40)}</p>\n" for _ in range(rng.randint(2, 6)))
+        + "</section>"
+        for name in sections
+    )
+    return (
+        f'<!DOCTYPE html>\n<html lang="ru">\n<head><title>Проект {i}</title>'
+        f'<link rel="stylesheet" href="style.css"></head>\n<body>\n<main>\n{body}\n'
+        "</main>\n<script src=\"app.js\"></script>\n</body>\n</html>\n"
+    )
+
+
+def css(theme: int) -> str:
+    rng = random.Random(theme)
+    color = lambda: "#%06x" % rng.randrange(0x1000000)  # noqa: E731
+    rules = [f"body {{ margin: 0; background: {color()}; color: {color()}; }}"]
+    for name in SECTIONS:
+        rules.append(f"/* section:{name} */")
+        rules.append(
+            f".section-{name} {{ padding: {rng.randint(2, 6)}rem; "
+            f"background: {color()}; border-radius: {rng.randint(0, 16)}px; }}"
+        )
+        rules.append(f".section-{name} h2 {{ font-size: {rng.randint(2, 4)}rem; }}")
+    return "\n".join(rules * 4) + "\n"
+
+
+def javascript(variant: int) -> str:
+    return (
+        f"// menu v{variant}\n"
+        "document.querySelectorAll('a[href^=\"#\"]').forEach((link) => {\n"
+        "  link.addEventListener('click', (event) => {\n"
+        "    event.preventDefault();\n"
+        "    document.querySelector(link.getAttribute('href'))"
+        f".scrollIntoView({{ behavior: '{'smooth' if variant % 2 else 'auto'}' }});\n"
+        "  });\n"
+        "});\n"
+    ) * 3
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    blobs = MemoryBlobStore()
+    store = ArtifactStore(blobs, codec=args.codec, cache_size=1)
+
+    raw = 0
+    keys = []
+    started = time.perf_counter()
+    for i in range(args.projects):
+        for content in (
+            html(rng, i),
+            css(rng.randrange(args.themes)),
+            javascript(rng.randrange(args.scripts)),
+        ):
+            data = content.encode("utf-8")
+            raw += len(data)
+            keys.append(await store.put(data))
+    put_time = time.perf_counter() - started
+
+    unique = len(set(keys))
+    started = time.perf_counter()
+    for key in set(keys):
+        await ArtifactStore(blobs, codec=args.codec).get(key)
+    get_time = time.perf_counter() - started
+
+    stored = sum(len(blob) for blob in blobs.blobs.values())
+    print(
+        f"codec={store.codec} projects={args.projects} artifacts={len(keys)} "
+        f"unique={unique}"
+    )
+    print(f"raw           {raw / 1e6:8.2f} MB")
+    print(f"stored        {stored / 1e6:8.2f} MB  ({raw / stored:5.1f}x smaller)")
+    print(f"put           {put_time / len(keys) * 1e6:8.1f} us/artifact")
+    print(f"get (cold)    {get_time / unique * 1e6:8.1f} us/blob")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, default=1000)
+    parser.add_argument("--themes", type=int, default=8, help="вариантов CSS")
+    parser.add_argument("--scripts", type=int, default=4, help="вариантов JS")
+    parser.add_argument("--codec", default=default_codec(), choices=["gzip", "zstd"])
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,93 @@
+"""
+Бенчмарк: пул соединений DeepSeekClient против новой сессии на каждый вызов.
+
+Одна генерация фронтенда = 4 вызова LLM (structure, html, css, js).
+Запуск из корня репозитория:
+
+    python -m benchmarks.bench_client_pool --generations 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+from app.ai.client import DeepSeekClient
+from tests.fake_deepseek import FakeDeepSeekServer
+
+CALLS_PER_GENERATION = 4
+
+
+async def _call_with_fresh_session(base_url: str) -> None:
+    """Поведение до пула: новый ClientSession (DNS + TCP + TLS) на каждый вызов"""
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            f"{base_url}/chat/completions",
+            headers={"Authorization": "Bearer bench"},
+            json={"messages": [{"role": "user", "content": "hi"}]},
+        ) as response:
+            await response.json()
+
+
+async def bench_fresh_sessions(base_url: str, generations: int) -> list[float]:
+    timings = []
+    for _ in range(generations):
+        started = time.perf_counter()
+        for _ in range(CALLS_PER_GENERATION):
+            await _call_with_fresh_session(base_url)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def bench_pooled(base_url: str, generations: int) -> list[float]:
+    client = DeepSeekClient(api_key="bench", base_url=base_url)
+    await client.start()
+    timings = []
+    try:
+        for _ in range(generations):
+            started = time.perf_counter()
+            for _ in range(CALLS_PER_GENERATION):
+                await client.generate_completion(prompt="hi")
+            timings.append(time.perf_counter() - started)
+    finally:
+        await client.close()
+    return timings
+
+
+def _report(name: str, timings: list[float], connections: int) -> float:
+    mean_ms = statistics.mean(timings) * 1000
+    p95_ms = sorted(timings)[int(len(timings) * 0.95) - 1] * 1000
+    print(
+        f"{name:<16} mean={mean_ms:7.2f} ms/generation  "
+        f"p95={p95_ms:7.2f} ms  tcp_connections={connections}"
+    )
+    return mean_ms
+
+
+async def main(generations: int, latency: float) -> None:
+    async with FakeDeepSeekServer(latency=latency) as server:
+        fresh = await bench_fresh_sessions(server.base_url, generations)
+        fresh_connections = server.connections
+
+    async with FakeDeepSeekServer(latency=latency) as server:
+        pooled = await bench_pooled(server.base_url, generations)
+        pooled_connections = server.connections
+
+    fresh_ms = _report("fresh session", fresh, fresh_connections)
+    pooled_ms = _report("pooled session", pooled, pooled_connections)
+    print(f"connection setup saved: {fresh_ms - pooled_ms:.2f} ms/generation")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--generations", type=int, default=200)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="искусственная задержка ответа фейкового сервера, сек",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.generations, args.latency))
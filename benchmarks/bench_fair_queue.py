@@ -0,0 +1,138 @@
+"""
+Бенчмарк: ожидание в очереди заданий — FIFO против классов приоритета
+и взвешенной справедливой очереди.
+
+Дискретно-событийная модель в виртуальном времени (без БД и LLM):
+--workers воркеров, генерация сайта длится ~--job-seconds, правка секции
+в 10 раз меньше (JOB_COSTS). В момент 0 один пользователь ставит --burst
+генераций, --tenants остальных ставят генерации и правки секций
+(пуассоновский поток, раз в --interval сек). Порядок взятия — как в
+JobRepository.claim_next: по created_at (FIFO) или по (priority,
+virtual_finish) с метками fair_finish_tag. Печатает перцентили ожидания
+от постановки до взятия воркером.
+
+    python -m benchmarks.bench_fair_queue --workers 8 --burst 50
+"""
+
+import argparse
+import heapq
+import random
+import statistics
+from collections import defaultdict
+
+from app.models.job import (
+    JOB_COSTS,
+    JOB_PRIORITIES,
+    JobPriority,
+    JobType,
+    fair_finish_tag,
+)
+
+
+def _percentiles(samples: list) -> str:
+    if not samples:
+        return "n=    0"
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+    return (
+        f"n={len(ordered):5d}  p50={statistics.median(ordered):7.1f} s  "
+        f"p95={pct(0.95):7.1f} s  p99={pct(0.99):7.1f} s"
+    )
+
+
+def _arrivals(args) -> list:
+    """(время постановки, пользователь, тип задания) — одинаковые для обеих политик"""
+    rng = random.Random(args.seed)
+    jobs = [(0.0, "burst", JobType.FRONTEND_GENERATION) for _ in range(args.burst)]
+    for tenant in range(args.tenants):
+        at = rng.expovariate(1 / args.interval)
+        while at < args.seconds:
+            job_type = (
+                JobType.SECTION_REGENERATION
+                if rng.random() < args.section_share
+                else JobType.FRONTEND_GENERATION
+            )
+            jobs.append((at, f"tenant{tenant}", job_type))
+            at += rng.expovariate(1 / args.interval)
+    return sorted(jobs, key=lambda job: job[0])
+
+
+def _virtual_time(running: list, pending: list, priority: int) -> float:
+    """Как JobRepository.schedule: метки выполняемых, иначе ждущих заданий класса"""
+    tags = [tag for _, p, tag, _ in running if p == priority]
+    if tags:
+        return max(tags)
+    tags = [job[-1] for job in pending if job[-2] == priority]
+    return min(tags, default=0.0)
+
+
+def simulate(args, arrivals: list, fair: bool) -> dict:
+    rng = random.Random(args.seed + 1)
+    scale = args.job_seconds / JOB_COSTS[JobType.FRONTEND_GENERATION]
+    weights = defaultdict(lambda: 1.0, {"burst": args.burst_weight})
+
+    pending: list = []  # куча (ключ порядка, постановка, ..., класс, метка)
+    running: list = []  # куча (время окончания, класс, метка, пользователь)
+    active: dict = defaultdict(list)  # (пользователь, класс) -> метки его заданий
+    waits: dict = defaultdict(list)
+    next_arrival, now = 0, 0.0
+
+    while next_arrival < len(arrivals) or pending or running:
+        # Свободный воркер берёт следующее задание
+        if pending and len(running) < args.workers:
+            _, at, user, job_type, priority, tag = heapq.heappop(pending)
+            if job_type == JobType.SECTION_REGENERATION:
+                kind = "section edits"
+            else:
+                kind = "burst" if user == "burst" else "tenant generations"
+            waits[kind].append(now - at)
+            duration = JOB_COSTS[job_type] * scale * rng.uniform(0.5, 1.5)
+            heapq.heappush(running, (now + duration, priority, tag, user))
+            continue
+
+        # Следующее событие: завершение задания или постановка нового
+        done_at = running[0][0] if running else float("inf")
+        if next_arrival == len(arrivals) or done_at <= arrivals[next_arrival][0]:
+            now, priority, tag, user = heapq.heappop(running)
+            active[(user, priority)].remove(tag)
+            continue
+
+        now, user, job_type = arrivals[next_arrival]
+        priority = JOB_PRIORITIES.get(job_type, JobPriority.STANDARD)
+        tag = fair_finish_tag(
+            _virtual_time(running, pending, priority),
+            max(active[(user, priority)], default=0.0),
+            JOB_COSTS[job_type],
+            weights[user],
+        )
+        active[(user, priority)].append(tag)
+        key = (priority, tag, next_arrival) if fair else (next_arrival,)
+        heapq.heappush(pending, (key, now, user, job_type, priority, tag))
+        next_arrival += 1
+    return waits
+
+
+def main(args: argparse.Namespace) -> None:
+    arrivals = _arrivals(args)
+    for name, fair in (("FIFO (created_at)", False), ("priority + WFQ", True)):
+        print(name)
+        waits = simulate(args, arrivals, fair)
+        for kind in ("tenant generations", "section edits", "burst"):
+            print(f"  {kind:<19} wait  {_percentiles(waits[kind])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--burst-weight", type=float, default=1.0)
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=300.0)
+    parser.add_argument("--section-share", type=float, default=0.3)
+    parser.add_argument("--job-seconds", type=float, default=60.0)
+    parser.add_argument("--seconds", type=float, default=1800.0)
+    parser.add_argument("--seed", type=int, default=1)
+    main(parser.parse_args())
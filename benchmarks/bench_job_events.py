@@ -0,0 +1,105 @@
+"""
+Бенчмарк: N открытых вкладок следят за генерацией одного проекта.
+
+"poll" — каждая вкладка раз в --interval сек запрашивает статус из БД
+(как клиенты опрашивали /generate/status). "push" — вкладки подписаны
+на шину событий, воркер публикует --events событий. Печатает число
+запросов к БД, процессорное время и задержку доставки события всем
+подписчикам.
+
+    python -m benchmarks.bench_job_events --tabs 1000 --seconds 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.events import MemoryEventBus
+from app.models import Base, Project
+from app.models.project import ProjectStatus
+from app.services.generation_service import GenerationService
+
+
+async def poll(args, session_factory, service, project_id) -> None:
+    async def tab() -> None:
+        deadline = time.perf_counter() + args.seconds
+        while time.perf_counter() < deadline:
+            async with session_factory() as session:
+                await service.get_status(session, project_id)
+            await asyncio.sleep(args.interval)
+
+    await asyncio.gather(*(tab() for _ in range(args.tabs)))
+
+
+async def push(args, service, project_id) -> list:
+    subscriptions = [await service.subscribe(project_id) for _ in range(args.tabs)]
+    latencies = []
+
+    async def tab(subscription) -> None:
+        for _ in range(args.events):
+            event = await subscription.get()
+            latencies.append(time.perf_counter() - event["sent_at"])
+        subscription.close()
+
+    tabs = [asyncio.create_task(tab(s)) for s in subscriptions]
+    for i in range(args.events):
+        await asyncio.sleep(args.seconds / args.events)
+        await service._publish(
+            project_id, "stage", stage=f"s{i}", sent_at=time.perf_counter()
+        )
+    await asyncio.gather(*tabs)
+    return latencies
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    queries = 0
+
+    def count(*_):
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+
+    async with session_factory() as session:
+        project = Project(name="p", prompt="портфолио", status=ProjectStatus.GENERATING)
+        session.add(project)
+        await session.commit()
+
+    service = GenerationService(events=MemoryEventBus())
+
+    queries, started, cpu = 0, time.perf_counter(), time.process_time()
+    await poll(args, session_factory, service, project.id)
+    print(
+        f"poll  tabs={args.tabs}  db queries={queries:7d}  "
+        f"cpu={time.process_time() - cpu:6.2f} s  wall={time.perf_counter() - started:6.2f} s"
+    )
+
+    queries, started, cpu = 0, time.perf_counter(), time.process_time()
+    latencies = await push(args, service, project.id)
+    print(
+        f"push  tabs={args.tabs}  db queries={queries:7d}  "
+        f"cpu={time.process_time() - cpu:6.2f} s  wall={time.perf_counter() - started:6.2f} s  "
+        f"delivery p50={statistics.median(latencies) * 1000:.2f} ms "
+        f"max={max(latencies) * 1000:.2f} ms"
+    )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tabs", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--interval", type=float, default=1.0, help="период опроса")
+    parser.add_argument("--events", type=int, default=10, help="событий за прогон")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,126 @@
+"""
+Бенчмарк: разбор JSON из «грязных» ответов модели.
+
+Сравнивает прежний разбор (json.loads, затем жадный re.search(r"\\{.*\\}"))
+с app.ai.json_extract: в dict (extract_json) и сразу в модель
+(validate_json -> WebsiteStructure.model_validate_json).
+Корпус — чистый JSON, markdown-обёртки, пояснения до и после ответа
+(в том числе с фигурными скобками), пример перед ответом, обрезанный ответ.
+
+    python -m benchmarks.bench_json_extract --samples 500
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.ai.json_extract import JSON_BACKEND, extract_json, validate_json
+from app.ai.schemas import WebsiteStructure
+
+SECTION_TYPES = ["hero", "about", "projects", "services", "testimonials", "contact"]
+
+PROSE = (
+    "Структура учитывает пожелания пользователя и целевую аудиторию. "
+    "Для шаблонов используйте плейсхолдеры вида {name} и {email}. "
+)
+
+
+def _structure(rng: random.Random) -> str:
+    sections = [
+        {
+            "type": section_type,
+            "title": f"Секция {section_type}",
+            "description": "Описание с символами { } и \"кавычками\" " * rng.randint(1, 6),
+            "order": order,
+        }
+        for order, section_type in enumerate(rng.sample(SECTION_TYPES, 4), 1)
+    ]
+    return json.dumps(
+        {
+            "name": "Сайт",
+            "description": "Описание сайта",
+            "sections": sections,
+            "features": ["адаптивность", "тёмная тема"],
+            "target_audience": "клиенты",
+        },
+        ensure_ascii=False,
+        indent=rng.choice([None, 2]),
+    )
+
+
+def messy_corpus(samples: int, seed: int) -> Dict[str, List[str]]:
+    rng = random.Random(seed)
+    shapes: Dict[str, Callable[[str], str]] = {
+        "clean": lambda p: p,
+        "code fence": lambda p: f"```json\n{p}\n```",
+        "prose before": lambda p: f"Вот структура сайта:\n\n{p}",
+        "prose after": lambda p: f"{p}\n\n{PROSE * rng.randint(1, 40)}",
+        "fence + prose": lambda p: (
+            f"Ответ:\n```json\n{p}\n```\n{PROSE * rng.randint(1, 40)}"
+        ),
+        "example first": lambda p: (
+            f'Пример секции: {{"type": "hero", "order": 1}}\nСтруктура:\n{p}'
+        ),
+        # Ответ обрезан по max_tokens: разобрать нельзя, важно быстро сдаться
+        "truncated": lambda p: p[: len(p) * 2 // 3],
+    }
+    return {
+        name: [shape(_structure(rng)) for _ in range(samples)]
+        for name, shape in shapes.items()
+    }
+
+
+def legacy_extract(text: str) -> Any:
+    """Прежний DeepSeekClient.generate_structured"""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        match = re.search(r"\{.*\}", text, re.DOTALL)
+        if match:
+            return json.loads(match.group())
+        raise
+
+
+def run(parse: Callable[[str], Any], texts: List[str]) -> Tuple[float, float]:
+    """(доля разобранных в WebsiteStructure, микросекунд на ответ)"""
+    ok = 0
+    started = time.perf_counter()
+    for text in texts:
+        try:
+            result = parse(text)
+            if not isinstance(result, WebsiteStructure):
+                WebsiteStructure(**result)
+            ok += 1
+        except ValueError:
+            pass
+    elapsed = time.perf_counter() - started
+    return ok / len(texts), elapsed / len(texts) * 1e6
+
+
+PARSERS: Dict[str, Callable[[str], Any]] = {
+    "greedy regex (old)": legacy_extract,
+    "extract_json": extract_json,
+    "validate_json": lambda text: validate_json(WebsiteStructure, text),
+}
+
+
+def main(args: argparse.Namespace) -> None:
+    corpus = messy_corpus(args.samples, args.seed)
+    print(f"{args.samples} responses per shape, json backend: {JSON_BACKEND}")
+    print(f"{'shape':<15}" + "".join(f"{name:>28}" for name in PARSERS))
+    for shape, texts in corpus.items():
+        cells = []
+        for parse in PARSERS.values():
+            parsed, micros = run(parse, texts)
+            cells.append(f"{parsed:6.1%} {micros:8.1f}us")
+        print(f"{shape:<15}" + "".join(f"{cell:>28}" for cell in cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    main(parser.parse_args())
@@ -0,0 +1,93 @@
+"""
+Микробенчмарк: цена аутентификации запроса с кэшем проверенных JWT и без него.
+
+uncached — jwt.decode на каждый запрос (HMAC + base64 + JSON),
+cached — decode_access_token для повторяющегося токена (SHA-256 + словарь).
+Отдельно меряется get_current_user целиком с кэшем пользователей.
+
+    python -m benchmarks.bench_jwt_cache --iterations 100000
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+
+from fastapi.security import HTTPAuthorizationCredentials  # noqa: E402
+from jose import jwt  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.api import deps  # noqa: E402
+from app.core import security  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.models import Base, User  # noqa: E402
+from app.services.user_cache import user_cache  # noqa: E402
+
+EMAIL = "bench@example.com"
+
+
+def _per_call_us(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def bench_decode(token: str, iterations: int) -> None:
+    def uncached():
+        jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
+
+    def cached():
+        security.decode_access_token(token)
+
+    base = _per_call_us(uncached, iterations)
+    fast = _per_call_us(cached, iterations)
+    print(f"{'decode uncached':<28}{base:>10.2f} us/op")
+    print(f"{'decode cached':<28}{fast:>10.2f} us/op   x{base / fast:.1f}")
+
+
+async def bench_dependency(token: str, iterations: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with session_factory() as session:
+        session.add(User(email=EMAIL, hashed_password="x"))
+        await session.commit()
+
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    async def run(label: str, clear_tokens: bool) -> float:
+        async with session_factory() as session:
+            started = time.perf_counter()
+            for _ in range(iterations):
+                if clear_tokens:
+                    security._verified_tokens.clear()
+                await deps.get_current_user(credentials, session)
+            per_call = (time.perf_counter() - started) / iterations * 1e6
+        print(f"{label:<28}{per_call:>10.2f} us/op")
+        return per_call
+
+    base = await run("get_current_user uncached", clear_tokens=True)
+    fast = await run("get_current_user cached", clear_tokens=False)
+    print(f"{'':<28}{'':>10}         x{base / fast:.1f}")
+
+    user_cache.clear()
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=50_000)
+    args = parser.parse_args()
+
+    token = security.create_access_token(EMAIL)
+    bench_decode(token, args.iterations)
+    asyncio.run(bench_dependency(token, args.iterations // 10))
+
+
+if __name__ == "__main__":
+    main()
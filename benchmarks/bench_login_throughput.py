@@ -0,0 +1,140 @@
+"""
+Бенчмарк: пропускная способность /auth/login и задержка /health.
+
+Сравнивает bcrypt в цикле событий (как было) с пулом PasswordHasher
+разного размера. Логины идут через ASGI-приложение поверх временной
+SQLite-базы, параллельно каждые 10 мс опрашивается /health.
+
+    python -m benchmarks.bench_login_throughput --logins 64
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+import app.services.auth_service as auth_service_module  # noqa: E402
+from app.core.database import get_db_session  # noqa: E402
+from app.core.security import PasswordHasher, hash_password, verify_password  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Base  # noqa: E402
+
+EMAIL = "bench@example.com"
+PASSWORD = "strongpass123"
+
+
+class InlineHasher:
+    """Поведение до пула: bcrypt прямо в цикле событий"""
+
+    async def hash(self, password: str) -> str:
+        return hash_password(password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return verify_password(password, hashed)
+
+    def shutdown(self) -> None:
+        pass
+
+
+def _pct(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000
+
+
+async def run_round(
+    client: AsyncClient, logins: int
+) -> tuple[float, list[float], float]:
+    health: list[float] = []
+    finished_at: list[float] = []
+    stop = asyncio.Event()
+
+    async def probe_health():
+        while not stop.is_set():
+            started = time.perf_counter()
+            await client.get("/health")
+            finished_at.append(time.perf_counter())
+            health.append(finished_at[-1] - started)
+            await asyncio.sleep(0.01)
+
+    prober = asyncio.create_task(probe_health())
+    started = time.perf_counter()
+    responses = await asyncio.gather(
+        *(
+            client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+            for _ in range(logins)
+        )
+    )
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await prober
+
+    failed = [r.status_code for r in responses if r.status_code != 200]
+    if failed:
+        print(f"  warning: {len(failed)} logins failed with {set(failed)}")
+
+    # Самая длинная пауза между ответами /health: сколько цикл событий простоял
+    stall = max((b - a for a, b in zip(finished_at, finished_at[1:])), default=0.0)
+    return logins / elapsed, health, stall
+
+
+async def main(logins: int, max_workers: int, kind: str) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp}/bench.db", poolclass=NullPool
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+        async def override_get_db_session():
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db_session] = override_get_db_session
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://bench", timeout=600
+        ) as client:
+            await client.post("/auth/register", json={"email": EMAIL, "password": PASSWORD})
+
+            worker_counts = [1]
+            while worker_counts[-1] * 2 <= max_workers:
+                worker_counts.append(worker_counts[-1] * 2)
+
+            hashers = [("inline (event loop)", InlineHasher())] + [
+                (
+                    f"{kind} pool x{n}",
+                    PasswordHasher(kind=kind, workers=n, max_pending=logins),
+                )
+                for n in worker_counts
+            ]
+
+            print(f"{logins} concurrent logins, cpu_count={os.cpu_count()}")
+            for name, hasher in hashers:
+                auth_service_module.password_hasher = hasher
+                throughput, health, stall = await run_round(client, logins)
+                hasher.shutdown()
+                print(
+                    f"{name:<22} {throughput:7.1f} logins/s   /health "
+                    f"p50={_pct(health, 0.5):7.2f} ms  p99={_pct(health, 0.99):7.2f} ms"
+                    f"  max stall={stall * 1000:8.2f} ms"
+                )
+
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--kind", choices=("thread", "process"), default="thread")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.max_workers, args.kind))
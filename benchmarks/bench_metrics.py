@@ -0,0 +1,71 @@
+"""
+Бенчмарк: стоимость записи метрик на горячем пути.
+
+Печатает время одной записи (счётчик, гистограмма с метками) и добавку
+MetricsMiddleware к запросу к пустому ASGI-приложению.
+
+    python -m benchmarks.bench_metrics --ops 1000000
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.core.metrics import MetricsMiddleware, Registry
+
+
+def per_op(fn, ops: int) -> float:
+    started = time.perf_counter()
+    for _ in range(ops):
+        fn()
+    return (time.perf_counter() - started) / ops * 1e9
+
+
+async def empty_app(scope, receive, send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def per_request(app, requests: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/health"}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / requests * 1e9
+
+
+async def main(args: argparse.Namespace) -> None:
+    registry = Registry(prefix="bench_")
+    counter = registry.counter("calls", "", ("agent", "stage", "outcome"))
+    histogram = registry.histogram("latency_seconds", "", ("method", "route"))
+
+    results = {
+        "counter.labels().inc()": per_op(
+            lambda: counter.labels("FrontendAgent", "html", "ok").inc(), args.ops
+        ),
+        "histogram.labels().observe()": per_op(
+            lambda: histogram.labels("GET", "/projects").observe(0.0123), args.ops
+        ),
+        "time.perf_counter() x2": per_op(
+            lambda: time.perf_counter() - time.perf_counter(), args.ops
+        ),
+    }
+    bare = await per_request(empty_app, args.ops // 10)
+    wrapped = await per_request(MetricsMiddleware(empty_app), args.ops // 10)
+    results["middleware overhead / request"] = wrapped - bare
+
+    for label, ns in results.items():
+        print(f"{label:<32} {ns:8.0f} ns")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ops", type=int, default=1_000_000)
+    asyncio.run(main(parser.parse_args()))
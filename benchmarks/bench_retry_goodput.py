@@ -0,0 +1,91 @@
+"""
+Бенчмарк: goodput генераций при сбоях провайдера с повторами и без.
+
+Фейковый DeepSeek отвечает ошибкой (429/5xx) на долю запросов error_rate.
+Одна генерация = 4 последовательных вызова LLM (structure, html, css, js):
+без повторов любой сбой губит генерацию и уже оплаченные вызовы.
+
+    python -m benchmarks.bench_retry_goodput --generations 200 --error-rate 0.2
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from app.ai.client import DeepSeekClient
+from app.ai.retry import RetryPolicy
+from tests.fake_deepseek import FakeDeepSeekServer
+
+CALLS_PER_GENERATION = 4
+
+
+async def _generation(client: DeepSeekClient) -> bool:
+    try:
+        for _ in range(CALLS_PER_GENERATION):
+            await client.generate_completion(prompt="hi", use_cache=False)
+    except Exception:
+        return False
+    return True
+
+
+async def run(
+    label: str,
+    retry: RetryPolicy | None,
+    generations: int,
+    concurrency: int,
+    error_rate: float,
+    latency: float,
+) -> None:
+    async with FakeDeepSeekServer(
+        error_rate=error_rate, latency=latency, seed=42
+    ) as server:
+        client = DeepSeekClient(api_key="bench", base_url=server.base_url, retry=retry)
+        slots = asyncio.Semaphore(concurrency)
+
+        async def one() -> bool:
+            async with slots:
+                return await _generation(client)
+
+        started = time.perf_counter()
+        try:
+            outcomes = await asyncio.gather(*(one() for _ in range(generations)))
+        finally:
+            await client.close()
+        elapsed = time.perf_counter() - started
+
+    ok = sum(outcomes)
+    print(
+        f"{label:<10} success={ok / generations:6.1%}  "
+        f"goodput={ok / elapsed:7.1f} gen/s  "
+        f"calls={len(server.requests):5d}  failed_calls={server.errors:4d}  "
+        f"wall={elapsed:5.2f}s"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    common = dict(
+        generations=args.generations,
+        concurrency=args.concurrency,
+        error_rate=args.error_rate,
+        latency=args.latency,
+    )
+    await run("no retry", None, **common)
+    await run(
+        "retry",
+        RetryPolicy(max_attempts=args.attempts, base_delay=args.base_delay),
+        **common,
+    )
+
+
+if __name__ == "__main__":
+    # Каждый сбой логируется клиентом — в выводе бенчмарка это шум
+    logging.disable(logging.CRITICAL)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--generations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--attempts", type=int, default=5)
+    parser.add_argument("--base-delay", type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
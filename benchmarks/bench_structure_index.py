@@ -0,0 +1,122 @@
+"""
+Бенчмарк: доля переиспользованных структур и их качество в зависимости от порога.
+
+Реплей промптов идёт по порядку: для каждого сначала lookup, затем в индекс
+добавляется «эталонная» структура промпта (как после вызова LLM).
+Качество переиспользования — сходство Жаккара множеств секций взятой
+структуры и эталонной; 1.0 — секции совпали полностью.
+
+Промпты — синтетические (тип сайта × секции × формулировка) или из файла
+JSON Lines с полями prompt и sections:
+
+    python -m benchmarks.bench_structure_index --prompts 2000
+    python -m benchmarks.bench_structure_index --replay prompts.jsonl
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import List, Tuple
+
+from app.ai.structure_index import StructureIndex
+
+SITES = [
+    "сайт-портфолио фотографа",
+    "сайт-портфолио веб-разработчика",
+    "лендинг кофейни",
+    "сайт стоматологической клиники",
+    "лендинг онлайн-курса по python",
+    "сайт фитнес-клуба",
+    "сайт свадебного агентства",
+    "лендинг мобильного приложения",
+    "сайт юридической компании",
+    "блог о путешествиях",
+]
+
+SECTIONS = {
+    "about": "обо мне",
+    "projects": "проекты",
+    "services": "услуги",
+    "testimonials": "отзывы",
+    "pricing": "цены",
+    "gallery": "галерея",
+    "team": "команда",
+    "faq": "частые вопросы",
+    "contact": "контакты",
+}
+
+TEMPLATES = [
+    "Создай {site} с секциями: {sections}",
+    "Нужен {site}. Секции: {sections}",
+    "Сделай {site}, на странице должны быть {sections}",
+    "Хочу {site} — {sections}",
+]
+
+
+def synthetic_replay(count: int, seed: int) -> List[Tuple[str, frozenset]]:
+    rng = random.Random(seed)
+    names = list(SECTIONS)
+    replay = []
+    for _ in range(count):
+        site = rng.choice(SITES)
+        chosen = rng.sample(names, rng.randint(2, 4))
+        prompt = rng.choice(TEMPLATES).format(
+            site=site, sections=", ".join(SECTIONS[name] for name in chosen)
+        )
+        replay.append((prompt, frozenset(["hero", *chosen])))
+    return replay
+
+
+def load_replay(path: str) -> List[Tuple[str, frozenset]]:
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(row["prompt"], frozenset(row["sections"])) for row in rows]
+
+
+def run(replay: List[Tuple[str, frozenset]], threshold: float, max_size: int) -> None:
+    index = StructureIndex(
+        max_size=max_size, reuse_threshold=threshold, seed_threshold=threshold
+    )
+    qualities = []
+    started = time.perf_counter()
+    for prompt, truth in replay:
+        match = index.lookup(prompt)
+        if match is not None:
+            reused = frozenset(match.structure["sections"])
+            qualities.append(len(reused & truth) / len(reused | truth))
+        index.add(prompt, {"sections": sorted(truth)})
+    elapsed = time.perf_counter() - started
+
+    exact = sum(q == 1.0 for q in qualities)
+    mean = sum(qualities) / len(qualities) if qualities else 0.0
+    print(
+        f"threshold={threshold:.2f}  reuse={len(qualities) / len(replay):6.1%}  "
+        f"quality={mean:5.3f}  exact={exact / max(1, len(qualities)):6.1%}  "
+        f"per-prompt={elapsed / len(replay) * 1000:5.2f}ms"
+    )
+
+
+def main(args: argparse.Namespace) -> None:
+    if args.replay:
+        replay = load_replay(args.replay)
+    else:
+        replay = synthetic_replay(args.prompts, args.seed)
+    print(f"{len(replay)} prompts, index max_size={args.max_size}")
+    for threshold in args.thresholds:
+        run(replay, threshold, args.max_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prompts", type=int, default=2000)
+    parser.add_argument("--replay", help="JSON Lines: {prompt, sections}")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-size", type=int, default=5000)
+    parser.add_argument(
+        "--thresholds",
+        type=float,
+        nargs="+",
+        default=[0.4, 0.5, 0.6, 0.7, 0.8, 0.9],
+    )
+    main(parser.parse_args())
@@ -0,0 +1,126 @@
+"""
+Нагрузочный тест: задержка API при сотнях генераций в очереди.
+
+Генерации выполняет воркер, поэтому /health и /generate/start должны
+отвечать так же быстро, как без нагрузки. Окружение:
+
+    python -m tests.fake_deepseek --port 8765 --latency 2
+    ADMISSION_MAX_ACTIVE_PER_USER=0 ADMISSION_RATE_LIMIT=0 ADMISSION_MAX_QUEUE_DEPTH=0 \\
+        uvicorn app.main:app --workers 1
+    DEEPSEEK_BASE_URL=http://127.0.0.1:8765/v1 DEEPSEEK_API_KEY=x \\
+        python -m app.worker --concurrency 50
+    python -m benchmarks.load_job_queue --api http://127.0.0.1:8000 --jobs 500
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+def _percentiles(samples: list[float]) -> str:
+    if not samples:
+        return "no samples"
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000
+
+    return (
+        f"n={len(ordered):5d}  p50={pct(0.50):7.2f} ms  "
+        f"p95={pct(0.95):7.2f} ms  p99={pct(0.99):7.2f} ms  "
+        f"max={ordered[-1] * 1000:7.2f} ms"
+    )
+
+
+async def sample_health(
+    client: httpx.AsyncClient, stop: asyncio.Event, interval: float
+) -> list[float]:
+    samples = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/health")
+        response.raise_for_status()
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def start_generation(client: httpx.AsyncClient, i: int) -> float:
+    started = time.perf_counter()
+    response = await client.post(
+        "/generate/start",
+        json={"prompt": f"Сайт-портфолио #{i}", "project_name": f"load-{i}"},
+    )
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def register(client: httpx.AsyncClient) -> None:
+    """Генерации запускает пользователь: токен — в заголовки клиента"""
+    response = await client.post(
+        "/auth/register",
+        json={
+            "email": f"load-{uuid.uuid4().hex[:10]}@example.com",
+            "password": "strongpass123",
+        },
+    )
+    response.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+
+async def main(api: str, jobs: int, concurrency: int, duration: float) -> None:
+    async with httpx.AsyncClient(base_url=api, timeout=30) as client:
+        await register(client)
+
+        # 1. Базовая задержка без нагрузки
+        stop = asyncio.Event()
+        baseline_task = asyncio.create_task(sample_health(client, stop, 0.05))
+        await asyncio.sleep(min(duration, 5))
+        stop.set()
+        baseline = await baseline_task
+
+        # 2. Ставим jobs генераций и меряем /health, пока воркер их выполняет
+        stop = asyncio.Event()
+        loaded_task = asyncio.create_task(sample_health(client, stop, 0.05))
+
+        limit = asyncio.Semaphore(concurrency)
+
+        async def submit(i: int) -> float:
+            async with limit:
+                return await start_generation(client, i)
+
+        submitted = time.perf_counter()
+        start_latencies = await asyncio.gather(*(submit(i) for i in range(jobs)))
+        submit_time = time.perf_counter() - submitted
+
+        await asyncio.sleep(duration)
+        stop.set()
+        loaded = await loaded_task
+
+    print(f"/health idle          {_percentiles(baseline)}")
+    print(f"/health under load    {_percentiles(loaded)}")
+    print(f"/generate/start       {_percentiles(start_latencies)}")
+    print(
+        f"submitted {jobs} generations in {submit_time:.2f}s "
+        f"({jobs / submit_time:.0f}/s), mean start latency "
+        f"{statistics.mean(start_latencies) * 1000:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--api", default="http://127.0.0.1:8000")
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=30.0,
+        help="сколько секунд мерить /health после постановки заданий",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.api, args.jobs, args.concurrency, args.duration))
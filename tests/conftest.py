@@ -1,5 +1,13 @@
-import pytest_asyncio
+import os
+
+# Код артефактов и события генерации в тестах — в памяти процесса
+os.environ.setdefault("ARTIFACT_STORE_URL", "memory://")
+os.environ.setdefault("GENERATION_EVENTS_BACKEND", "memory")
+
+import pytest  # noqa: E402
+import pytest_asyncio  # noqa: E402
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy.pool import NullPool
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
@@ -7,12 +15,22 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from app.main import app
+from app.api.v1 import generation
 from app.core.database import get_db_session
 from app.models import Base
+from app.services.admission import AdmissionController
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 
+@pytest.fixture(autouse=True)
+def admission(monkeypatch) -> AdmissionController:
+    """Свои счётчики допуска генераций у каждого теста (id пользователей повторяются)"""
+    controller = AdmissionController()
+    monkeypatch.setattr(generation, "admission_controller", controller)
+    return controller
+
+
 @pytest_asyncio.fixture(scope="function")
 async def db_session() -> AsyncSession:
     engine = create_async_engine(TEST_DATABASE_URL, echo=False)
@@ -28,6 +46,43 @@ async def db_session() -> AsyncSession:
     await engine.dispose()
 
 
+@pytest_asyncio.fixture(scope="function")
+async def session_factory(tmp_path):
+    """
+    Фабрика сессий для кода, открывающего свои сессии (воркер, очередь).
+    Файловая БД: у каждой сессии своё соединение и своя транзакция.
+    """
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'test.db'}",
+        echo=False,
+        poolclass=NullPool,
+    )
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    yield async_sessionmaker(engine, expire_on_commit=False)
+
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture(scope="function")
+async def api(session_factory):
+    """Клиент API, где каждый запрос получает свою сессию (как в проде)"""
+
+    async def override_get_db_session():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db_session] = override_get_db_session
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test",
+    ) as ac:
+        yield ac
+    app.dependency_overrides.clear()
+
+
 @pytest_asyncio.fixture(scope="function")
 async def client(db_session: AsyncSession):
     async def override_get_db_session():
@@ -0,0 +1,197 @@
+"""
+Локальный фейковый DeepSeek API для тестов и бенчмарков.
+
+Docs: https://docs.aiohttp.org/en/stable/web_lowlevel.html
+"""
+
+import asyncio
+import json
+import random
+from typing import Any, Callable, Dict, List, Optional
+
+from aiohttp import web
+
+
+class FakeDeepSeekServer:
+    """
+    Поднимает /v1/chat/completions на 127.0.0.1 со случайным портом.
+
+    Считает запросы и уникальные TCP-соединения, чтобы тесты могли
+    проверить переиспользование пула, и максимум одновременных запросов.
+    statuses — коды ответов для первых запросов (например [429, 429]),
+    retry_after — заголовок Retry-After для ответов с ошибкой.
+    error_rate — доля случайных сбоев (коды из error_statuses), seed — для
+    воспроизводимости.
+    """
+
+    def __init__(
+        self,
+        content: str | Callable[[Dict[str, Any]], str] = "ok",
+        latency: float = 0.0,
+        model: str = "deepseek-coder-33b-instruct",
+        chunk_size: int = 8,
+        chunk_delay: float = 0.0,
+        port: int = 0,
+        statuses: Optional[List[int]] = None,
+        retry_after: Optional[str] = None,
+        error_rate: float = 0.0,
+        error_statuses: tuple[int, ...] = (429, 500, 502, 503),
+        seed: Optional[int] = None,
+    ):
+        self.content = content
+        self.latency = latency
+        self.model = model
+        # Настройки потокового ответа (stream=true)
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+
+        self.statuses = list(statuses or [])
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self._rng = random.Random(seed)
+        self.errors = 0
+
+        self.requests: List[Dict[str, Any]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._connections: set[tuple] = set()
+        self._runner: Optional[web.AppRunner] = None
+        self.port = port
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    @property
+    def connections(self) -> int:
+        return len(self._connections)
+
+    async def start(self) -> "FakeDeepSeekServer":
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._chat_completions)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeDeepSeekServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def _render(self, payload: Dict[str, Any]) -> str:
+        if callable(self.content):
+            return self.content(payload)
+        return self.content
+
+    async def _chat_completions(self, request: web.Request) -> web.StreamResponse:
+        # Порт клиента уникален для каждого TCP-соединения
+        self._connections.add(request.transport.get_extra_info("peername"))
+        payload = await request.json()
+        self.requests.append(payload)
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+        status = 200
+        if self.statuses:
+            status = self.statuses.pop(0)
+        elif self.error_rate and self._rng.random() < self.error_rate:
+            status = self._rng.choice(self.error_statuses)
+        if status != 200:
+            self.errors += 1
+            headers = {"Retry-After": self.retry_after} if self.retry_after else {}
+            return web.json_response(
+                {"error": {"message": "fake error"}}, status=status, headers=headers
+            )
+
+        content = self._render(payload)
+        if payload.get("stream"):
+            return await self._stream(request, payload, content)
+
+        return web.json_response(
+            {
+                "model": self.model,
+                "choices": [{"message": {"role": "assistant", "content": content}}],
+                "usage": self._usage(payload, content),
+            }
+        )
+
+    @staticmethod
+    def _usage(payload: Dict[str, Any], content: str) -> Dict[str, int]:
+        prompt_tokens = len(str(payload.get("messages", ""))) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    async def _stream(
+        self, request: web.Request, payload: Dict[str, Any], content: str
+    ) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        async def send(data: str) -> None:
+            await response.write(f"data: {data}\n\n".encode("utf-8"))
+
+        for i in range(0, len(content), self.chunk_size):
+            delta = content[i : i + self.chunk_size]
+            await send(
+                json.dumps(
+                    {
+                        "model": self.model,
+                        "choices": [{"index": 0, "delta": {"content": delta}}],
+                    }
+                )
+            )
+            if self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+
+        await send(
+            json.dumps(
+                {
+                    "model": self.model,
+                    "choices": [],
+                    "usage": self._usage(payload, content),
+                }
+            )
+        )
+        await send("[DONE]")
+        await response.write_eof()
+        return response
+
+
+async def _serve_forever(port: int, latency: float, error_rate: float) -> None:
+    server = await FakeDeepSeekServer(
+        content="<div>ok</div>", latency=latency, port=port, error_rate=error_rate
+    ).start()
+    print(f"Fake DeepSeek listening on {server.base_url}")
+    await asyncio.Event().wait()
+
+if __name__ == "__main__":
+    # python -m tests.fake_deepseek --port 8765 --latency 2
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fake DeepSeek API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(_serve_forever(args.port, args.latency, args.error_rate))
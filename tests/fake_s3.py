@@ -0,0 +1,88 @@
+"""
+Локальное S3-совместимое хранилище для тестов и бенчмарков.
+
+Docs: https://docs.aws.amazon.com/AmazonS3/latest/API/API_PutObject.html
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+
+class FakeS3Server:
+    """
+    GET/PUT/HEAD объектов path-style (/<bucket>/<key>) на 127.0.0.1.
+
+    Подпись не проверяется, но запросы без SigV4-заголовков отклоняются;
+    requests — журнал (метод, путь) для проверки дедупликации.
+    """
+
+    def __init__(self, port: int = 0):
+        self.objects: Dict[str, bytes] = {}
+        self.requests: List[Tuple[str, str]] = []
+        self._runner: Optional[web.AppRunner] = None
+        self.port = port
+
+    @property
+    def endpoint_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def count(self, method: str) -> int:
+        return sum(1 for m, _ in self.requests if m == method)
+
+    async def start(self) -> "FakeS3Server":
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_route("*", "/{path:.+}", self._object)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeS3Server":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _object(self, request: web.Request) -> web.Response:
+        path = request.path
+        self.requests.append((request.method, path))
+        authorization = request.headers.get("Authorization", "")
+        if not authorization.startswith("AWS4-HMAC-SHA256 ") or (
+            "x-amz-content-sha256" not in request.headers
+        ):
+            return web.Response(status=403, text="AccessDenied")
+
+        if request.method == "PUT":
+            self.objects[path] = await request.read()
+            return web.Response(status=200)
+        if path not in self.objects:
+            return web.Response(status=404, text="NoSuchKey")
+        if request.method == "HEAD":
+            return web.Response(status=200)
+        if request.method == "GET":
+            return web.Response(body=self.objects[path])
+        return web.Response(status=405)
+
+
+if __name__ == "__main__":
+    # python -m tests.fake_s3 --port 9000
+    import argparse
+
+    async def _serve_forever(port: int) -> None:
+        server = await FakeS3Server(port=port).start()
+        print(f"Fake S3 listening on {server.endpoint_url}")
+        await asyncio.Event().wait()
+
+    parser = argparse.ArgumentParser(description="Fake S3 API")
+    parser.add_argument("--port", type=int, default=9000)
+    asyncio.run(_serve_forever(parser.parse_args().port))
@@ -0,0 +1,200 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import update
+
+from app.core.cache import InMemorySharedCache
+from app.models import Project
+from app.models.artifact import ArtifactKind
+from app.models.project import ProjectStatus
+from app.repositories.artifact_repo import ArtifactRepository
+from app.services.admission import AdmissionRejected, SlidingWindowCounter
+from tests.test_frontend_agent import STRUCTURE
+from tests.test_projects import _register
+
+
+async def _start(api, headers, name: str = "p"):
+    return await api.post(
+        "/generate/start",
+        json={"prompt": "Сайт-портфолио", "project_name": name},
+        headers=headers,
+    )
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_counts_the_previous_window_partially():
+    now = 100.0
+    counter = SlidingWindowCounter(limit=4, window=10, clock=lambda: now)
+
+    for _ in range(4):
+        assert await counter.hit("u") is None
+    # Окно [100, 110) полное: ждать, пока оно не станет прошлым и
+    # не "выветрится" на четверть
+    assert await counter.hit("u") == pytest.approx(12.5)
+    assert await counter.hit("other") is None
+
+    now = 115.0  # половина прошлого окна ещё считается: 4 * 0.5 = 2
+    assert await counter.hit("u") is None
+    assert await counter.hit("u") is None
+    assert await counter.hit("u") == pytest.approx(2.5)
+
+    now = 117.5
+    assert await counter.hit("u") is None
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_is_shared_between_processes():
+    shared = InMemorySharedCache()
+    first, second = (
+        SlidingWindowCounter(limit=3, window=60, shared=shared) for _ in range(2)
+    )
+
+    assert await first.hit("u") is None
+    assert await second.hit("u") is None
+    assert await first.hit("u") is None
+    assert await second.hit("u") is not None
+
+
+class _RemoteCache(InMemorySharedCache):
+    """Общий кэш с сетевой задержкой: между запросами переключаются задачи"""
+
+    async def get(self, key):
+        await asyncio.sleep(0)
+        return await super().get(key)
+
+    async def incr(self, key, amount, ttl):
+        await asyncio.sleep(0)
+        return await super().incr(key, amount, ttl)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_hits_do_not_overshoot_the_limit():
+    shared = _RemoteCache()
+    counters = [
+        SlidingWindowCounter(limit=5, window=60, shared=shared) for _ in range(4)
+    ]
+
+    delays = await asyncio.gather(*(counters[i % 4].hit("u") for i in range(20)))
+
+    assert sum(delay is None for delay in delays) == 5
+    # Отказы свои события откатили: счётчик окна равен числу допущенных
+    index = int(counters[0].clock() // 60)
+    assert await shared.get(f"{SlidingWindowCounter.KEY_PREFIX}u:{index}") == "5"
+
+
+@pytest.mark.asyncio
+async def test_start_requires_authentication(api):
+    r = await api.post(
+        "/generate/start", json={"prompt": "Сайт-портфолио", "project_name": "p"}
+    )
+    assert r.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_concurrent_generations_are_limited_per_user(
+    api, session_factory, admission
+):
+    admission.max_active_per_user = 2
+    _, heavy = await _register(api)
+    _, light = await _register(api)
+
+    assert (await _start(api, heavy)).status_code == 200
+    assert (await _start(api, heavy)).status_code == 200
+    r = await _start(api, heavy)
+    assert r.status_code == 429
+    assert int(r.headers["retry-after"]) == admission.retry_after
+    assert "in progress" in r.json()["detail"]
+
+    # Лимит — на пользователя, остальных он не задевает
+    assert (await _start(api, light)).status_code == 200
+
+    # Генерация завершилась — место освободилось
+    project_id = (await api.get("/projects", headers=heavy)).json()["items"][0]["id"]
+    async with session_factory() as session:
+        await session.execute(
+            update(Project)
+            .where(Project.id == uuid.UUID(project_id))
+            .values(status=ProjectStatus.READY)
+        )
+        await session.commit()
+    assert (await _start(api, heavy)).status_code == 200
+
+    assert admission.stats()["rejected_active"] == 1
+
+
+@pytest.mark.asyncio
+async def test_request_rate_is_limited_per_user(api, admission):
+    admission.max_active_per_user = 0
+    admission.rate.limit = 3
+    _, headers = await _register(api)
+
+    for i in range(3):
+        assert (await _start(api, headers, f"p{i}")).status_code == 200
+    r = await _start(api, headers)
+    assert r.status_code == 429
+    assert 1 <= int(r.headers["retry-after"]) <= admission.rate.window * 2
+    assert admission.stats()["rejected_rate"] == 1
+
+
+@pytest.mark.asyncio
+async def test_full_queue_returns_503(api, admission):
+    admission.max_queue_depth = 2
+    admission.queue_depth_ttl = 0
+    users = [await _register(api) for _ in range(3)]
+
+    for _, headers in users[:2]:
+        assert (await _start(api, headers)).status_code == 200
+    r = await _start(api, users[2][1])
+    assert r.status_code == 503
+    assert int(r.headers["retry-after"]) == admission.retry_after
+    assert admission.stats()["queue_depth"] == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_sections_and_stream_go_through_admission(
+    api, session_factory, admission
+):
+    admission.max_active_per_user = 0
+    admission.rate.limit = 1
+    _, headers = await _register(api)
+    project_id = (await _start(api, headers)).json()["project_id"]
+
+    for path in ("retry", "stream"):
+        method = api.post if path == "retry" else api.get
+        r = await method(f"/generate/{path}/{project_id}", headers=headers)
+        assert r.status_code == 429
+        assert "retry-after" in r.headers
+
+    # Правка секций готового сайта — после проверок запроса, до вызовов LLM
+    async with session_factory() as session:
+        await session.execute(
+            update(Project)
+            .where(Project.id == uuid.UUID(project_id))
+            .values(status=ProjectStatus.READY)
+        )
+        await ArtifactRepository().save(
+            session, uuid.UUID(project_id), {ArtifactKind.STRUCTURE: STRUCTURE}
+        )
+        await session.commit()
+    r = await api.post(
+        f"/generate/sections/{project_id}",
+        json={"sections": ["about"]},
+        headers=headers,
+    )
+    assert r.status_code == 429
+    assert admission.stats()["rejected_rate"] == 3
+
+
+@pytest.mark.asyncio
+async def test_streamed_project_is_not_counted_against_itself(
+    api, session_factory, admission
+):
+    admission.max_active_per_user = 1
+    user_id, headers = await _register(api)
+    project_id = uuid.UUID((await _start(api, headers)).json()["project_id"])
+
+    async with session_factory() as session:
+        await admission.admit(session, user_id, project_id, enqueue=False)
+        with pytest.raises(AdmissionRejected):
+            await admission.admit(session, user_id)
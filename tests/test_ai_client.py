@@ -0,0 +1,52 @@
+import pytest
+
+from app.ai.client import DeepSeekClient
+from tests.fake_deepseek import FakeDeepSeekServer
+
+
+@pytest.mark.asyncio
+async def test_client_reuses_pooled_connection():
+    async with FakeDeepSeekServer(content="<html></html>") as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        await client.start()
+        try:
+            for _ in range(4):
+                result = await client.generate_completion(prompt="hi")
+                assert result["content"] == "<html></html>"
+        finally:
+            await client.close()
+
+    assert len(server.requests) == 4
+    assert server.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_client_starts_lazily_and_closes():
+    async with FakeDeepSeekServer() as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        await client.generate_completion(prompt="hi")
+        session = client._session
+        assert session is not None and not session.closed
+
+        await client.close()
+        assert session.closed
+        assert client._session is None
+
+
+@pytest.mark.asyncio
+async def test_stream_completion_yields_deltas_and_usage():
+    content = "<section id='about'>Привет, мир</section>"
+    async with FakeDeepSeekServer(content=content, chunk_size=5) as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        try:
+            stream = client.stream_completion(prompt="hi")
+            deltas = [delta async for delta in stream]
+        finally:
+            await client.close()
+
+    assert server.requests[0]["stream"] is True
+    assert len(deltas) > 1
+    assert "".join(deltas) == content
+    result = stream.result()
+    assert result["content"] == content
+    assert result["tokens_used"]["completion_tokens"] == len(content) // 4
@@ -0,0 +1,208 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+
+from app.ai.agents.frontend_agent import FrontendAgent
+from app.ai.client import DeepSeekClient
+from app.core import events as events_module
+from app.core.events import MemoryEventBus, PostgresEventBus, event_bus
+from app.services.generation_service import GenerationService
+from tests.fake_deepseek import FakeDeepSeekServer
+from tests.test_frontend_agent import fake_content
+from tests.test_projects import _register
+
+
+def _parse_sse(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(
+            line.split(": ", 1) for line in block.splitlines() if not line.startswith(":")
+        )
+        if lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.mark.asyncio
+async def test_subscribers_get_events_of_their_channel():
+    bus = MemoryEventBus()
+    first = await bus.subscribe("project:1")
+    second = await bus.subscribe("project:1")
+    other = await bus.subscribe("project:2")
+
+    await bus.publish("project:1", {"event": "stage", "stage": "structure"})
+    assert await first.get(timeout=1) == {"event": "stage", "stage": "structure"}
+    assert await second.get(timeout=1) == {"event": "stage", "stage": "structure"}
+    assert await other.get(timeout=0.01) is None
+
+    # Медленный подписчик теряет старые события, а не копит их
+    for i in range(150):
+        await bus.publish("project:2", {"i": i})
+    assert other.dropped == 50
+    assert (await other.get(timeout=1))["i"] == 50
+
+    for subscription in (first, second, other):
+        subscription.close()
+    assert bus.stats()["subscribers"] == 0
+    assert bus.stats()["channels"] == 0
+
+
+@pytest.mark.asyncio
+async def test_generation_events_are_pushed_to_subscribers(api, session_factory):
+    _, headers = await _register(api)
+    r = await api.post(
+        "/generate/start",
+        json={"prompt": "портфолио", "project_name": "p"},
+        headers=headers,
+    )
+    project_id = r.json()["project_id"]
+
+    r = await api.get(f"/generate/status/{project_id}", headers=headers)
+    assert r.json()["status"] == "generating"
+    assert r.json()["job_status"] == "pending"
+
+    stream = asyncio.create_task(
+        api.get(f"/generate/events/{project_id}", headers=headers)
+    )
+    while event_bus.stats()["subscribers"] == 0:
+        await asyncio.sleep(0.01)
+
+    async with FakeDeepSeekServer(content=fake_content) as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        service = GenerationService(frontend_agent=FrontendAgent(client=client))
+        try:
+            async with session_factory() as session:
+                await service.generate_frontend(session, uuid.UUID(project_id))
+        finally:
+            await client.close()
+
+    r = await asyncio.wait_for(stream, timeout=5)
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(r.text)
+
+    # Снимок, затем события воркера до ready; поток закрылся сам
+    assert events[0] == (
+        "status",
+        {
+            "project_id": project_id,
+            "status": "generating",
+            "job_status": "pending",
+            "stages": [],
+            "error": None,
+        },
+    )
+    assert events[1][1]["job_status"] == "running"
+    stages = [data["stage"] for name, data in events if name == "stage"]
+    assert {"structure", "colors", "html", "css"} <= set(stages)
+    assert events[-1] == (
+        "status",
+        {"project_id": project_id, "status": "ready", "job_status": "completed"},
+    )
+    assert event_bus.stats()["subscribers"] == 0
+
+    r = await api.get(f"/generate/status/{project_id}", headers=headers)
+    assert r.json()["status"] == "ready"
+    assert set(stages) <= set(r.json()["stages"])
+
+    # Готовый проект: только снимок
+    r = await api.get(f"/generate/events/{project_id}", headers=headers)
+    assert [name for name, _ in _parse_sse(r.text)] == ["status"]
+
+    r = await api.get(f"/generate/events/{uuid.uuid4()}", headers=headers)
+    assert r.status_code == 404
+    assert event_bus.stats()["subscribers"] == 0
+
+    # Чужой проект неотличим от несуществующего
+    _, other = await _register(api)
+    for path in ("status", "events"):
+        url = f"/generate/{path}/{project_id}"
+        assert (await api.get(url)).status_code == 401
+        assert (await api.get(url, headers=other)).status_code == 404
+    assert event_bus.stats()["subscribers"] == 0
+
+
+class _FakeListener:
+    """Соединение asyncpg, которое тест может оборвать; запоминает запросы"""
+
+    def __init__(self):
+        self.on_terminated = None
+        self.closed = False
+        self.executed = []
+
+    async def execute(self, query, *args) -> None:
+        self.executed.append((query, *args))
+
+    def add_termination_listener(self, callback) -> None:
+        self.on_terminated = callback
+
+    async def add_listener(self, channel, callback) -> None:
+        pass
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    def terminate(self) -> None:
+        self.closed = True
+        self.on_terminated(self)
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_lost_listener_aborts_subscriptions_and_reconnects(monkeypatch):
+    connections = []
+
+    async def connect(dsn):
+        connections.append(_FakeListener())
+        return connections[-1]
+
+    monkeypatch.setattr(events_module.asyncpg, "connect", connect)
+    bus = PostgresEventBus("postgresql://test")
+    subscription = await bus.subscribe("project:1")
+    waiting = asyncio.create_task(subscription.get(timeout=5))
+    await asyncio.sleep(0)
+
+    connections[0].terminate()
+
+    # Подписчик узнаёт о возможном пропуске событий сразу, а не по таймауту
+    assert await asyncio.wait_for(waiting, timeout=1) is None
+    assert subscription.closed
+    assert bus.stats()["subscribers"] == 0
+    # Соединение восстановлено без новой подписки
+    for _ in range(100):
+        if len(connections) == 2:
+            break
+        await asyncio.sleep(0.01)
+    assert len(connections) == 2
+    await bus.close()
+    assert all(c.closed for c in connections)
+
+
+@pytest.mark.asyncio
+async def test_oversized_event_is_shortened_to_fit_notify(monkeypatch):
+    connections = []
+
+    async def connect(dsn):
+        connections.append(_FakeListener())
+        return connections[-1]
+
+    monkeypatch.setattr(events_module.asyncpg, "connect", connect)
+    bus = PostgresEventBus("postgresql://test")
+    error = "Ошибка провайдера: " + "я" * 20000
+    await bus.publish(
+        "project:1",
+        {"event": "status", "status": "failed", "job_status": "failed", "error": error},
+    )
+    await bus.publish("project:1", {"event": "status", "sections": ["я" * 100] * 100})
+
+    failed, sections = [payload for _, _, payload in connections[0].executed]
+    assert len(failed.encode()) < 8000 and len(sections.encode()) < 8000
+    event = json.loads(failed)["event"]
+    assert event["status"] == event["job_status"] == "failed"
+    assert event["error"].startswith("Ошибка провайдера: ")
+    # Длинных строк нет, но всё равно не влезает: остаются ключевые поля
+    assert json.loads(sections)["event"] == {"event": "status"}
+    await bus.close()
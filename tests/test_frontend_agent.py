@@ -0,0 +1,180 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.ai.agents.frontend_agent import FrontendAgent
+from app.ai.agents.stages import Stage, StageExecutor
+from app.ai.client import DeepSeekClient
+from tests.fake_deepseek import FakeDeepSeekServer
+
+STRUCTURE = {
+    "name": "Портфолио",
+    "description": "Сайт-портфолио разработчика",
+    "sections": [
+        {"type": "hero", "title": "Привет", "order": 1},
+        {"type": "about", "title": "Обо мне", "order": 2},
+        {"type": "contact", "title": "Контакты", "order": 3},
+    ],
+    "features": ["адаптивность"],
+    "target_audience": "работодатели",
+}
+
+
+def fake_content(payload: dict) -> str:
+    if payload.get("response_format"):
+        return json.dumps(STRUCTURE, ensure_ascii=False)
+    prompt = payload["messages"][-1]["content"]
+    if prompt.startswith("Создай CSS"):
+        return "body { color: #fff; }"
+    if prompt.startswith("Сгенерируй JavaScript"):
+        return "console.log('ok');"
+    return "<html></html>"
+
+
+@pytest.mark.asyncio
+async def test_stage_executor_runs_independent_stages_concurrently():
+    async def sleep_and_return(value):
+        await asyncio.sleep(0.1)
+        return value
+
+    executor = StageExecutor(
+        [
+            Stage("root", lambda ctx: sleep_and_return(1)),
+            Stage("a", lambda ctx: sleep_and_return(ctx["root"] + 1), ("root",)),
+            Stage("b", lambda ctx: sleep_and_return(ctx["root"] + 2), ("root",)),
+            Stage("c", lambda ctx: sleep_and_return(ctx["root"] + 3), ("root",)),
+        ]
+    )
+    run = await executor.run()
+
+    assert run.results == {"root": 1, "a": 2, "b": 3, "c": 4}
+    assert set(run.timings) == {"root", "a", "b", "c"}
+    assert run.wall_time < 0.3
+
+
+def test_stage_executor_rejects_cycles_and_unknown_deps():
+    async def noop(ctx):
+        return None
+
+    with pytest.raises(ValueError, match="cycle"):
+        StageExecutor([Stage("a", noop, ("b",)), Stage("b", noop, ("a",))])
+
+    with pytest.raises(ValueError, match="unknown stage"):
+        StageExecutor([Stage("a", noop, ("missing",))])
+
+
+@pytest.mark.asyncio
+async def test_stage_executor_cancels_siblings_on_failure():
+    cancelled = asyncio.Event()
+
+    async def slow(ctx):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def broken(ctx):
+        raise RuntimeError("boom")
+
+    executor = StageExecutor([Stage("slow", slow), Stage("broken", broken)])
+    with pytest.raises(RuntimeError, match="boom"):
+        await executor.run()
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_frontend_agent_parallel_wall_time():
+    latency = 0.2
+    async with FakeDeepSeekServer(content=fake_content, latency=latency) as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        agent = FrontendAgent(client=client)
+        try:
+            started = time.perf_counter()
+            result = await agent.generate(
+                {"user_prompt": "портфолио", "color_scheme": "тёмная"}
+            )
+            wall_time = time.perf_counter() - started
+        finally:
+            await client.close()
+
+    assert result["html"] == "<html></html>"
+    assert result["css"] == "body { color: #fff; }"
+    assert result["javascript"] == "console.log('ok');"
+    assert result["structure"]["name"] == "Портфолио"
+    assert len(server.requests) == 4
+
+    # Вызов длится structure + max(html, css, js), а не сумму четырёх вызовов
+    timings = result["stage_timings"]
+    assert sum(timings.values()) > 3.5 * latency
+    assert wall_time < 3 * latency
+
+
+@pytest.mark.asyncio
+async def test_frontend_agent_stream_emits_tokens_before_done():
+    async with FakeDeepSeekServer(content=fake_content, chunk_size=4) as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        agent = FrontendAgent(client=client)
+        try:
+            events = [
+                event
+                async for event in agent.stream(
+                    {"user_prompt": "портфолио", "color_scheme": "тёмная"}
+                )
+            ]
+        finally:
+            await client.close()
+
+    assert events[-1]["event"] == "done"
+    result = events[-1]["result"]
+
+    tokens = [e for e in events if e["event"] == "token"]
+    assert {e["stage"] for e in tokens} == {"html", "css", "javascript"}
+    for stage, key in (("html", "html"), ("css", "css"), ("javascript", "javascript")):
+        streamed = "".join(e["delta"] for e in tokens if e["stage"] == stage)
+        assert streamed == result[key]
+
+    stages = [e["stage"] for e in events if e["event"] == "stage"]
+    assert stages[:2] == ["structure", "colors"]
+    assert set(stages) == {"structure", "colors", "html", "css", "javascript"}
+
+
+def sectioned_content(payload: dict) -> str:
+    prompt = payload["messages"][-1]["content"]
+    if prompt.startswith("Сгенерируй каркас"):
+        return "<html><body><nav></nav><main><!-- SECTIONS --></main></body></html>"
+    if prompt.startswith("Сгенерируй HTML одной секции"):
+        section_type = prompt.split("Тип секции: ")[1].split("\n")[0]
+        return f'```html\n<section id="{section_type}"></section>\n```'
+    return fake_content(payload)
+
+
+@pytest.mark.asyncio
+async def test_frontend_agent_sections_mode_fans_out_and_assembles_in_order():
+    latency = 0.2
+    structure = dict(STRUCTURE, sections=list(reversed(STRUCTURE["sections"])))
+
+    def content(payload: dict) -> str:
+        if payload.get("response_format"):
+            return json.dumps(structure, ensure_ascii=False)
+        return sectioned_content(payload)
+
+    async with FakeDeepSeekServer(content=content, latency=latency) as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        agent = FrontendAgent(client=client, html_mode="sections")
+        try:
+            result = await agent.generate({"user_prompt": "портфолио"})
+        finally:
+            await client.close()
+
+    html = result["html"]
+    positions = [html.index(f'id="{t}"') for t in ("hero", "about", "contact")]
+    assert positions == sorted(positions)
+    assert html.startswith("<html><body><nav></nav><main>")
+
+    # structure + css + js + каркас + 3 секции
+    assert len(server.requests) == 7
+    # Каркас и секции запрашиваются одновременно
+    assert result["stage_timings"]["html"] < 2 * latency
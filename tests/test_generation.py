@@ -0,0 +1,287 @@
+import asyncio
+import gc
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, update
+
+from app.ai.agents.frontend_agent import FrontendAgent
+from app.ai.client import DeepSeekClient
+from app.models.job import Job, JobStatus
+from app.models.project import ProjectStatus
+from app.repositories.job_repo import JobRepository
+from app.services.generation_service import GenerationService
+from tests.fake_deepseek import FakeDeepSeekServer
+from tests.test_frontend_agent import fake_content
+from tests.test_projects import _register
+
+
+@pytest.mark.asyncio
+async def test_concurrent_starts_do_not_block_event_loop(
+    api, session_factory, admission
+):
+    _, headers = await _register(api)
+    # Здесь меряется цикл событий, а не лимиты допуска
+    admission.max_active_per_user = admission.rate.limit = 0
+    max_lag = 0.0
+    stop = asyncio.Event()
+
+    async def measure_loop_lag():
+        nonlocal max_lag
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            max_lag = max(max_lag, time.perf_counter() - started - 0.005)
+
+    # Сборка мусора от предыдущих тестов не должна попасть в замер
+    gc.collect()
+    ticker = asyncio.create_task(measure_loop_lag())
+    responses = await asyncio.gather(
+        *(
+            api.post(
+                "/generate/start",
+                json={"prompt": f"Сайт-портфолио {i}", "project_name": f"p{i}"},
+                headers=headers,
+            )
+            for i in range(25)
+        )
+    )
+    stop.set()
+    await ticker
+
+    assert all(r.status_code == 200 for r in responses), responses[0].text
+    assert len({r.json()["project_id"] for r in responses}) == 25
+
+    async with session_factory() as session:
+        pending = await session.scalar(
+            select(func.count()).select_from(Job).where(Job.status == JobStatus.PENDING)
+        )
+    assert pending == 25
+
+    # Синхронный драйвер держал бы цикл событий на каждом запросе к БД
+    assert max_lag < 0.1
+
+
+@pytest.mark.asyncio
+async def test_result_is_served_from_db(api):
+    _, headers = await _register(api)
+    r = await api.get(f"/generate/result/{uuid.uuid4()}", headers=headers)
+    assert r.status_code == 404
+
+    r = await api.post(
+        "/generate/start",
+        json={"prompt": "Сайт-портфолио", "project_name": "p"},
+        headers=headers,
+    )
+    project_id = r.json()["project_id"]
+
+    r = await api.get(f"/generate/result/{project_id}", headers=headers)
+    assert r.status_code == 409
+    assert "generating" in r.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_artifacts_are_stored_apart_and_fetched_on_demand(api, session_factory):
+    user_id, headers = await _register(api)
+    async with FakeDeepSeekServer(content=fake_content) as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        service = GenerationService(frontend_agent=FrontendAgent(client=client))
+        try:
+            async with session_factory() as session:
+                started = await service.start_generation(
+                    session, "портфолио", "p", user_id=user_id
+                )
+                await service.generate_frontend(session, uuid.UUID(started["project_id"]))
+        finally:
+            await client.close()
+    project_id = started["project_id"]
+
+    # Чужой проект неотличим от несуществующего
+    _, other = await _register(api)
+    for path in ("result/{}", "artifacts/{}/css", "artifacts/{}/css/raw"):
+        url = "/generate/" + path.format(project_id)
+        assert (await api.get(url)).status_code == 401
+        assert (await api.get(url, headers=other)).status_code == 404
+
+    r = await api.get(f"/generate/result/{project_id}", headers=headers)
+    assert r.status_code == 200
+    assert r.json()["structure"]["name"] == "Портфолио"
+    assert r.json()["has_javascript"] is True
+
+    r = await api.get(f"/generate/artifacts/{project_id}/javascript", headers=headers)
+    assert r.status_code == 200
+    assert r.json()["content"] == "console.log('ok');"
+    assert r.json()["version"] == 1
+    sha256 = r.json()["sha256"]
+
+    r = await api.get(
+        f"/generate/artifacts/{project_id}/javascript/raw", headers=headers
+    )
+    assert r.text == "console.log('ok');"
+    assert r.headers["content-type"].startswith("text/javascript")
+    assert r.headers["etag"] == f'"{sha256}"'
+    r = await api.get(
+        f"/generate/artifacts/{project_id}/javascript/raw",
+        headers={**headers, "If-None-Match": f'"{sha256}"'},
+    )
+    assert r.status_code == 304
+
+    for missing in ("backend", "css?version=2"):
+        url = f"/generate/artifacts/{project_id}/{missing}"
+        assert (await api.get(url, headers=headers)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_failed_generation_resumes_from_checkpoint(session_factory):
+    provider_down = True
+
+    def content(payload: dict) -> str:
+        prompt = payload["messages"][-1]["content"]
+        if provider_down and prompt.startswith("Создай CSS"):
+            raise RuntimeError("provider down")  # фейковый сервер ответит 500
+        return fake_content(payload)
+
+    async with FakeDeepSeekServer(content=content) as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        service = GenerationService(frontend_agent=FrontendAgent(client=client))
+        try:
+            async with session_factory() as session:
+                started = await service.start_generation(session, "портфолио", "p")
+                project_id = uuid.UUID(started["project_id"])
+
+                with pytest.raises(Exception, match="API error: 500"):
+                    await service.generate_frontend(session, project_id)
+
+            async with session_factory() as session:
+                retried = await service.retry_generation(session, project_id)
+                assert {"structure", "colors"} <= set(retried["resumed_stages"])
+                assert "css" not in retried["resumed_stages"]
+
+            provider_down = False
+            first_run_requests = len(server.requests)
+            async with session_factory() as session:
+                await service.generate_frontend(session, project_id)
+                project = await service.get_result(session, project_id)
+                assert project.status == ProjectStatus.READY
+                artifacts = await service.get_artifacts(session, project_id)
+                assert artifacts["css"] == "body { color: #fff; }"
+        finally:
+            await client.close()
+
+    # Структура (единственный JSON-вызов) повторно не запрашивалась
+    resumed_requests = server.requests[first_run_requests:]
+    assert not any(r.get("response_format") for r in resumed_requests)
+    assert 1 <= len(resumed_requests) <= 3
+
+
+@pytest.mark.asyncio
+async def test_stream_requires_owner(api):
+    _, owner = await _register(api)
+    _, other = await _register(api)
+    r = await api.post(
+        "/generate/start",
+        json={"prompt": "Сайт-портфолио", "project_name": "p"},
+        headers=owner,
+    )
+    project_id = r.json()["project_id"]
+
+    assert (await api.get(f"/generate/stream/{project_id}")).status_code == 401
+    r = await api.get(f"/generate/stream/{project_id}", headers=other)
+    assert r.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_closed_stream_stops_generation_before_releasing_job(session_factory):
+    async with FakeDeepSeekServer(content=fake_content, chunk_delay=0.01) as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        service = GenerationService(frontend_agent=FrontendAgent(client=client))
+        try:
+            async with session_factory() as session:
+                started = await service.start_generation(session, "портфолио", "p")
+                project_id = uuid.UUID(started["project_id"])
+
+                events = service.stream_frontend(session, project_id)
+                assert (await anext(events))["event"] in ("token", "stage")
+                await events.aclose()
+                sent = len(server.requests)
+
+                # Генерация остановлена, задание снова ждёт воркера
+                await asyncio.sleep(0.2)
+                assert len(server.requests) == sent
+                job = await session.scalar(
+                    select(Job).where(Job.project_id == project_id)
+                )
+                assert job.status == JobStatus.PENDING
+                assert job.worker_id is None and job.attempts == 0
+        finally:
+            await client.close()
+
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_job_is_reclaimed(session_factory):
+    async with FakeDeepSeekServer(content=fake_content, chunk_delay=0.01) as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        service = GenerationService(frontend_agent=FrontendAgent(client=client))
+        repo = JobRepository()
+        try:
+            async with session_factory() as session:
+                started = await service.start_generation(session, "портфолио", "p")
+                project_id = uuid.UUID(started["project_id"])
+
+                events = service.stream_frontend(session, project_id)
+                await anext(events)
+
+                async with session_factory() as other:
+                    job = await other.scalar(
+                        select(Job).where(Job.project_id == project_id)
+                    )
+                    assert job.status == JobStatus.RUNNING
+                    assert job.worker_id == service.worker_id
+                    assert job.lease_expires_at is not None
+
+                    # Процесс API упал: аренду больше никто не продлевает
+                    await other.execute(
+                        update(Job)
+                        .where(Job.id == job.id)
+                        .values(
+                            lease_expires_at=datetime.now(timezone.utc)
+                            - timedelta(seconds=1)
+                        )
+                    )
+                    await other.commit()
+                    reclaimed = await repo.claim_next(
+                        other, "w", lease_seconds=60, max_attempts=3
+                    )
+                    assert reclaimed is not None and reclaimed.id == job.id
+
+                # Закрытие брошенного потока не отбирает задание у воркера
+                await events.aclose()
+                job = await session.scalar(
+                    select(Job).where(Job.project_id == project_id)
+                )
+                await session.refresh(job)
+                assert job.status == JobStatus.RUNNING
+                assert job.worker_id == "w"
+        finally:
+            await client.close()
+
+
+@pytest.mark.asyncio
+async def test_retry_requires_owner(api):
+    _, owner = await _register(api)
+    _, other = await _register(api)
+    r = await api.post(
+        "/generate/start",
+        json={"prompt": "Сайт-портфолио", "project_name": "p"},
+        headers=owner,
+    )
+    project_id = r.json()["project_id"]
+
+    assert (await api.post(f"/generate/retry/{project_id}")).status_code == 401
+    r = await api.post(f"/generate/retry/{project_id}", headers=other)
+    assert r.status_code == 404
+    # Владелец доходит до проверки статуса: генерация ещё идёт
+    r = await api.post(f"/generate/retry/{project_id}", headers=owner)
+    assert r.status_code == 409
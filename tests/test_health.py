@@ -7,6 +7,7 @@ https://www.python-httpx.org/advanced/transports/#asgi-transport
 from httpx import AsyncClient, ASGITransport
 import pytest
 
+from app.core.shutdown import close_all
 from app.main import app
 
 
@@ -22,3 +23,24 @@ async def test_health_check():
 
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
+
+
+@pytest.mark.asyncio
+async def test_shutdown_closes_every_resource_despite_errors():
+    closed = []
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    async def close_async():
+        closed.append("async")
+
+    await close_all(
+        [
+            ("broken", broken),
+            ("async", close_async),
+            ("sync", lambda: closed.append("sync")),
+        ]
+    )
+
+    assert closed == ["async", "sync"]
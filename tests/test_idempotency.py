@@ -0,0 +1,111 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.events import MemoryEventBus
+from app.models import IdempotencyKey, Job, User
+from app.services.generation_service import GenerationService
+from tests.test_projects import _register
+
+
+async def _start(api, headers, key, prompt: str = "Сайт-портфолио"):
+    return await api.post(
+        "/generate/start",
+        json={"prompt": prompt, "project_name": "p"},
+        headers={**headers, "Idempotency-Key": key},
+    )
+
+
+async def _count_jobs(session_factory) -> int:
+    async with session_factory() as session:
+        return await session.scalar(select(func.count()).select_from(Job))
+
+
+@pytest.mark.asyncio
+async def test_retry_with_same_key_replays_the_original(api, session_factory):
+    _, headers = await _register(api)
+
+    first = await _start(api, headers, "key-1")
+    second = await _start(api, headers, "key-1")
+
+    assert first.status_code == second.status_code == 200
+    assert second.json()["project_id"] == first.json()["project_id"]
+    assert second.json()["status"] == "generating"
+    assert second.json()["replayed"] is True
+    assert "replayed" not in first.json()
+    assert await _count_jobs(session_factory) == 1
+
+    # Другой ключ — другая генерация
+    third = await _start(api, headers, "key-2")
+    assert third.json()["project_id"] != first.json()["project_id"]
+    assert await _count_jobs(session_factory) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_share_one_generation(api, session_factory):
+    _, headers = await _register(api)
+
+    responses = await asyncio.gather(*(_start(api, headers, "key") for _ in range(4)))
+
+    assert {r.status_code for r in responses} == {200}
+    assert len({r.json()["project_id"] for r in responses}) == 1
+    assert sum("replayed" in r.json() for r in responses) == 3
+    assert await _count_jobs(session_factory) == 1
+
+
+@pytest.mark.asyncio
+async def test_key_reused_with_other_request_is_rejected(api):
+    _, headers = await _register(api)
+
+    assert (await _start(api, headers, "key")).status_code == 200
+    r = await _start(api, headers, "key", prompt="Интернет-магазин")
+    assert r.status_code == 409
+    assert "different request" in r.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_keys_are_per_user_and_expire(api, session_factory):
+    _, alice = await _register(api)
+    _, bob = await _register(api)
+
+    first = (await _start(api, alice, "key")).json()
+    assert "replayed" not in (await _start(api, bob, "key")).json()
+
+    async with session_factory() as session:
+        await session.execute(
+            update(IdempotencyKey).values(
+                expires_at=datetime.now(timezone.utc) - timedelta(seconds=1)
+            )
+        )
+        await session.commit()
+
+    again = (await _start(api, alice, "key")).json()
+    assert "replayed" not in again
+    assert again["project_id"] != first["project_id"]
+    assert await _count_jobs(session_factory) == 3
+
+
+@pytest.mark.asyncio
+async def test_key_is_unique_across_processes(session_factory):
+    """Повтор из другого процесса (мимо его future) упирается в уникальный индекс"""
+    service = GenerationService(events=MemoryEventBus())
+    async with session_factory() as session:
+        user = User(email="idem@example.com", hashed_password="-")
+        session.add(user)
+        await session.commit()
+
+        start = dict(
+            user_prompt="портфолио",
+            project_name="p",
+            user_id=user.id,
+            idempotency_key="key",
+            request_hash="h",
+        )
+        await service.start_generation(session, **start)
+        with pytest.raises(IntegrityError):
+            await service.start_generation(session, **start)
+
+    assert await _count_jobs(session_factory) == 1
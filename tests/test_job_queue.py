@@ -0,0 +1,145 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+
+from app.models.job import Job, JobStatus, JobType
+from app.models.project import Project
+from app.repositories.job_repo import JobRepository
+from app.services.job_worker import JobWorker
+
+repo = JobRepository()
+
+
+async def _enqueue(session_factory, count: int) -> list[uuid.UUID]:
+    ids = []
+    async with session_factory() as session:
+        for i in range(count):
+            project = Project(name=f"p{i}", prompt="портфолио")
+            session.add(project)
+            await session.flush()
+            job = await repo.create(session, project.id, JobType.FRONTEND_GENERATION)
+            ids.append(job.id)
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_claim_takes_pending_jobs_once(session_factory):
+    first, second = await _enqueue(session_factory, 2)
+
+    async with session_factory() as session:
+        a = await repo.claim_next(session, "w1", lease_seconds=60, max_attempts=3)
+        b = await repo.claim_next(session, "w2", lease_seconds=60, max_attempts=3)
+        c = await repo.claim_next(session, "w3", lease_seconds=60, max_attempts=3)
+
+    assert {a.id, b.id} == {first, second}
+    assert c is None
+    assert a.status == JobStatus.RUNNING and a.attempts == 1
+    assert a.worker_id == "w1" and a.lease_expires_at is not None
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed(session_factory):
+    (job_id,) = await _enqueue(session_factory, 1)
+
+    async with session_factory() as session:
+        await repo.claim_next(session, "crashed", lease_seconds=60, max_attempts=3)
+        # Воркер упал: аренда истекла без heartbeat
+        await session.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .values(lease_expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+        )
+        await session.commit()
+
+        job = await repo.claim_next(session, "w2", lease_seconds=60, max_attempts=3)
+        assert job.id == job_id
+        assert job.worker_id == "w2" and job.attempts == 2
+
+        # Старый воркер больше не может продлить аренду
+        assert not await repo.heartbeat(session, job_id, "crashed", 60)
+        assert await repo.heartbeat(session, job_id, "w2", 60)
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_jobs_concurrently(session_factory):
+    ids = await _enqueue(session_factory, 6)
+    in_flight = 0
+    peak = 0
+
+    async def handler(job: Job) -> None:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        if job.id == ids[0]:
+            raise RuntimeError("boom")
+
+    worker = JobWorker(
+        handlers={JobType.FRONTEND_GENERATION: handler},
+        concurrency=3,
+        session_factory=session_factory,
+        poll_interval=0.01,
+    )
+    runner = asyncio.create_task(worker.run())
+
+    async def all_finished() -> bool:
+        async with session_factory() as session:
+            res = await session.execute(select(Job.status))
+            return all(
+                s in (JobStatus.COMPLETED, JobStatus.FAILED) for s in res.scalars()
+            )
+
+    for _ in range(200):
+        if await all_finished():
+            break
+        await asyncio.sleep(0.02)
+    worker.stop()
+    await runner
+
+    async with session_factory() as session:
+        statuses = {
+            job.id: job.status for job in (await session.execute(select(Job))).scalars()
+        }
+
+    assert peak == 3
+    assert statuses[ids[0]] == JobStatus.FAILED
+    assert all(statuses[i] == JobStatus.COMPLETED for i in ids[1:])
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_after_handler_commit_does_not_cancel_job(session_factory):
+    (job_id,) = await _enqueue(session_factory, 1)
+    returned = asyncio.Event()
+
+    async def handler(job: Job) -> None:
+        # Обработчик сам коммитит итог, как generate_frontend, и ещё
+        # какое-то время не возвращается (публикация событий и т.п.)
+        async with session_factory() as session:
+            await session.execute(
+                update(Job).where(Job.id == job.id).values(status=JobStatus.COMPLETED)
+            )
+            await session.commit()
+        await asyncio.sleep(0.1)
+        returned.set()
+
+    worker = JobWorker(
+        handlers={JobType.FRONTEND_GENERATION: handler},
+        concurrency=1,
+        session_factory=session_factory,
+        heartbeat_seconds=0.01,
+        poll_interval=0.01,
+    )
+    runner = asyncio.create_task(worker.run())
+    await asyncio.wait_for(returned.wait(), timeout=5)
+    await asyncio.sleep(0.1)
+    worker.stop()
+    await runner
+
+    async with session_factory() as session:
+        job = await repo.get(session, job_id)
+    assert job.status == JobStatus.COMPLETED
+    assert job.completed_at is not None and job.lease_expires_at is None
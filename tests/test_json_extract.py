@@ -0,0 +1,71 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from app.ai.client import DeepSeekClient
+from app.ai.json_extract import extract_json, iter_json_objects, validate_json
+from app.ai.schemas import WebsiteStructure
+from tests.fake_deepseek import FakeDeepSeekServer
+from tests.test_frontend_agent import STRUCTURE
+
+PAYLOAD = json.dumps(STRUCTURE, ensure_ascii=False)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        PAYLOAD,
+        f"```json\n{PAYLOAD}\n```",
+        f"Вот структура сайта:\n\n{PAYLOAD}\n\nЕсли нужно, добавлю секцию {{faq}}.",
+        f"Шаблон {{name}} заменён. Ответ: {PAYLOAD}",
+        f"Незакрытая скобка {{ в пояснении, а ниже ответ\n{PAYLOAD}",
+        f"```\n{PAYLOAD}\n```\n```json\n{{\"note\": 1}}\n```",
+    ],
+)
+def test_extract_json_from_messy_output(text):
+    assert extract_json(text) == STRUCTURE
+
+
+def test_braces_and_quotes_inside_strings_do_not_split_objects():
+    text = 'ok: {"a": "x } y", "b": "escaped \\" { quote", "c": {"d": []}} tail }'
+    assert list(iter_json_objects(text)) == [
+        '{"a": "x } y", "b": "escaped \\" { quote", "c": {"d": []}}'
+    ]
+    assert extract_json(text)["c"] == {"d": []}
+
+
+def test_extract_json_without_object_raises():
+    with pytest.raises(json.JSONDecodeError):
+        extract_json("Извините, не могу помочь с этим запросом")
+
+
+def test_validate_json_skips_objects_that_do_not_match_model():
+    text = f'Пример секции: {{"type": "hero", "order": 1}}\nОтвет:\n{PAYLOAD}'
+    structure = validate_json(WebsiteStructure, text)
+    assert isinstance(structure, WebsiteStructure)
+    assert [s.type.value for s in structure.sections] == ["hero", "about", "contact"]
+
+    with pytest.raises(ValidationError):
+        validate_json(WebsiteStructure, '{"name": "без секций"}')
+
+
+@pytest.mark.asyncio
+async def test_generate_model_validates_and_drops_unusable_cached_response():
+    contents = iter([f"```json\n{PAYLOAD}\n```", "не JSON", PAYLOAD])
+
+    async with FakeDeepSeekServer(content=lambda payload: next(contents)) as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        try:
+            structure = await client.generate_model("сайт", WebsiteStructure)
+            assert structure.name == STRUCTURE["name"]
+
+            with pytest.raises(ValidationError):
+                await client.generate_model("другой сайт", WebsiteStructure)
+            # Непригодный ответ не остался в кэше: повтор идёт к модели
+            retried = await client.generate_model("другой сайт", WebsiteStructure)
+        finally:
+            await client.close()
+
+    assert retried.name == STRUCTURE["name"]
+    assert len(server.requests) == 3
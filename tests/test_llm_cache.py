@@ -0,0 +1,82 @@
+import os
+import time
+
+import pytest
+
+from app.ai.cache import DiskResponseStore, ResponseCache, response_cache_key
+from app.ai.client import DeepSeekClient
+from tests.fake_deepseek import FakeDeepSeekServer
+
+
+@pytest.mark.asyncio
+async def test_identical_prompts_hit_cache_and_opt_out_bypasses_it():
+    async with FakeDeepSeekServer(content="<html></html>") as server:
+        cache = ResponseCache(ttl=60, max_size=16)
+        client = DeepSeekClient(api_key="test", base_url=server.base_url, cache=cache)
+        try:
+            first = await client.generate_completion(prompt="landing", temperature=0.2)
+            second = await client.generate_completion(prompt="landing", temperature=0.2)
+            other = await client.generate_completion(prompt="landing", temperature=0.3)
+            fresh = await client.generate_completion(
+                prompt="landing", temperature=0.2, use_cache=False
+            )
+        finally:
+            await client.close()
+
+    assert len(server.requests) == 3
+    assert "cached" not in first and second["cached"] is True
+    assert second["content"] == first["content"]
+    assert "cached" not in other and "cached" not in fresh
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_and_plain_calls_share_cache():
+    async with FakeDeepSeekServer(content="<main>hello</main>", chunk_size=4) as server:
+        client = DeepSeekClient(
+            api_key="test", base_url=server.base_url, cache=ResponseCache(ttl=60)
+        )
+        try:
+            stream = client.stream_completion(prompt="hi")
+            assert "".join([d async for d in stream]) == "<main>hello</main>"
+
+            replay = client.stream_completion(prompt="hi")
+            deltas = [d async for d in replay]
+            plain = await client.generate_completion(prompt="hi")
+        finally:
+            await client.close()
+
+    assert len(server.requests) == 1
+    assert deltas == ["<main>hello</main>"]
+    assert replay.result()["cached"] is True
+    assert plain["content"] == "<main>hello</main>"
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart_and_evicts_by_size(tmp_path):
+    payload = {"model": "m", "messages": [{"role": "user", "content": "x"}]}
+    key = response_cache_key(payload)
+    value = {"content": "a" * 100, "tokens_used": {}, "model": "m"}
+
+    first = ResponseCache(ttl=60, disk=DiskResponseStore(str(tmp_path), 10_000))
+    await first.set(key, value)
+
+    # Новый процесс: память пуста, ответ поднимается с диска
+    second = ResponseCache(ttl=60, disk=DiskResponseStore(str(tmp_path), 10_000))
+    assert await second.get(key) == value
+    assert await second.get(key) == value
+    assert second.stats()["disk_hits"] == 1
+    assert second.stats()["memory_hits"] == 1
+
+    store = DiskResponseStore(str(tmp_path / "small"), max_bytes=1_000)
+    for i in range(20):
+        store.set(f"{i:064x}", value, time.time() + 60)
+        os.utime(store._path(f"{i:064x}"), (i, i))
+    assert store._size <= 1_000
+    assert store.evictions > 0
+    assert store.get(f"{19:064x}") is not None
+    assert store.get(f"{0:064x}") is None
+
+    store.set("f" * 64, value, time.time() - 1)
+    assert store.get("f" * 64) is None
@@ -0,0 +1,87 @@
+import pytest
+
+from app.ai.agents.frontend_agent import FrontendAgent
+from app.ai.client import DeepSeekClient
+from app.core.metrics import LLM_CALLS, LLM_TOKENS, Registry, instrument_engine
+from tests.fake_deepseek import FakeDeepSeekServer
+from tests.test_frontend_agent import fake_content
+from tests.test_projects import _register
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry(prefix="t_")
+    requests = registry.counter("requests", "Requests", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    registry.stats_collector("cache", lambda: {"hits": 3, "enabled": True, "name": "x"})
+
+    requests.labels('/a"b').inc()
+    requests.labels('/a"b').inc(2)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+
+    text = registry.render()
+    assert '# TYPE t_requests counter\nt_requests_total{route="/a\\"b"} 3.0' in text
+    assert 't_latency_seconds_bucket{le="0.1"} 2\n' in text
+    assert 't_latency_seconds_bucket{le="1.0"} 3\n' in text
+    assert 't_latency_seconds_bucket{le="+Inf"} 4\n' in text
+    assert "t_latency_seconds_sum 3.65\nt_latency_seconds_count 4\n" in text
+    # Из stats() — только числа
+    assert "t_cache_hits 3\n" in text
+    assert "t_cache_enabled" not in text and "t_cache_name" not in text
+
+    with pytest.raises(ValueError):
+        requests.labels("/a", "extra")
+    with pytest.raises(ValueError):
+        registry.counter("requests", "Duplicate")
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_routes_db_and_queue(api, session_factory):
+    instrument_engine(session_factory.kw["bind"].sync_engine)
+
+    _, headers = await _register(api)
+    r = await api.post(
+        "/generate/start",
+        json={"prompt": "портфолио", "project_name": "p"},
+        headers=headers,
+    )
+    project_id = r.json()["project_id"]
+    await api.get(f"/generate/status/{project_id}", headers=headers)
+
+    r = await api.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = r.text
+
+    # Шаблон маршрута, а не путь с идентификатором
+    assert (
+        'aiws_http_requests_total{method="GET",route="/generate/status/{project_id}",'
+        'status="200"}' in text
+    )
+    assert project_id not in text
+    assert 'aiws_job_queue_depth{status="pending"} 1' in text
+    # Завершённые задания на каждом чтении метрик не считаются
+    assert 'aiws_job_queue_depth{status="completed"}' not in text
+    assert 'aiws_db_query_duration_seconds_count{operation="INSERT"}' in text
+    assert "aiws_db_connection_acquire_seconds_count" in text
+    assert "aiws_artifact_store_writes" in text
+    assert "aiws_generation_events_published" in text
+
+
+@pytest.mark.asyncio
+async def test_llm_calls_are_measured_per_agent_and_stage():
+    calls = LLM_CALLS.labels("FrontendAgent", "structure", "ok")
+    prompt_tokens = LLM_TOKENS.labels("FrontendAgent", "html", "prompt")
+    calls_before, tokens_before = calls.value, prompt_tokens.value
+
+    async with FakeDeepSeekServer(content=fake_content) as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        try:
+            await FrontendAgent(client=client).generate(
+                {"user_prompt": "метрики", "color_scheme": "тёмная"}
+            )
+        finally:
+            await client.close()
+
+    assert calls.value == calls_before + 1
+    assert prompt_tokens.value > tokens_before
@@ -0,0 +1,87 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import Project
+from app.models.project import ProjectStatus
+
+
+async def _register(client) -> tuple[int, dict]:
+    email = f"u{uuid.uuid4().hex[:10]}@example.com"
+    r = await client.post(
+        "/auth/register",
+        json={"email": email, "password": "strongpass123"},
+    )
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    r = await client.get("/users/me", headers=headers)
+    return r.json()["id"], headers
+
+
+async def _seed(db_session, user_id: int, count: int) -> list[uuid.UUID]:
+    """Проекты по три на одну метку времени: порядок решает id"""
+    started = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    projects = [
+        Project(
+            id=uuid.uuid4(),
+            user_id=user_id,
+            name=f"p{i}",
+            prompt="портфолио",
+            status=ProjectStatus.READY,
+            created_at=started + timedelta(minutes=i // 3),
+        )
+        for i in range(count)
+    ]
+    db_session.add_all(projects)
+    await db_session.commit()
+    projects.sort(key=lambda p: (p.created_at, p.id), reverse=True)
+    return [p.id for p in projects]
+
+
+@pytest.mark.asyncio
+async def test_projects_are_listed_page_by_page(client, db_session):
+    user_id, headers = await _register(client)
+    other_id, _ = await _register(client)
+    expected = await _seed(db_session, user_id, 45)
+    await _seed(db_session, other_id, 5)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 20, **({"cursor": cursor} if cursor else {})}
+        r = await client.get("/projects", params=params, headers=headers)
+        assert r.status_code == 200
+        seen += [uuid.UUID(item["id"]) for item in r.json()["items"]]
+        pages += 1
+        cursor = r.json()["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert seen == expected
+    # Проекция: строки списка без промпта
+    assert "prompt" not in r.json()["items"][0]
+
+    r = await client.get("/projects", params={"cursor": "garbage"}, headers=headers)
+    assert r.status_code == 400
+    assert (await client.get("/projects")).status_code in (401, 403)
+
+
+@pytest.mark.asyncio
+async def test_started_project_belongs_to_user(client):
+    _, headers = await _register(client)
+    r = await client.post(
+        "/generate/start",
+        json={"prompt": "Сайт-портфолио", "project_name": "мой"},
+        headers=headers,
+    )
+    project_id = r.json()["project_id"]
+
+    r = await client.get("/projects", headers=headers)
+    assert [item["id"] for item in r.json()["items"]] == [project_id]
+
+    r = await client.get(f"/projects/{project_id}", headers=headers)
+    assert r.json()["prompt"] == "Сайт-портфолио"
+
+    _, stranger = await _register(client)
+    r = await client.get(f"/projects/{project_id}", headers=stranger)
+    assert r.status_code == 404
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import pytest
+
+from app.ai.client import DeepSeekAPIError, DeepSeekClient
+from app.ai.rate_limit import DatabaseBucketStore, LLMRateLimiter
+from tests.fake_deepseek import FakeDeepSeekServer
+
+
+@pytest.mark.asyncio
+async def test_limiter_caps_in_flight_requests():
+    async with FakeDeepSeekServer(latency=0.05) as server:
+        client = DeepSeekClient(
+            api_key="test",
+            base_url=server.base_url,
+            limiter=LLMRateLimiter(max_concurrency=2, requests_per_minute=0),
+        )
+        try:
+            await asyncio.gather(
+                *(client.generate_completion(prompt=f"p{i}") for i in range(6))
+            )
+        finally:
+            await client.close()
+
+    assert len(server.requests) == 6
+    assert server.max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_requests_per_minute_paces_callers_in_order():
+    # 600 RPM = 10 запросов в секунду, без всплеска
+    limiter = LLMRateLimiter(
+        max_concurrency=0, requests_per_minute=600, burst_seconds=0
+    )
+    order = []
+
+    async def call(i: int):
+        async with limiter.acquire():
+            order.append(i)
+
+    started = time.monotonic()
+    await asyncio.gather(*(call(i) for i in range(5)))
+    elapsed = time.monotonic() - started
+
+    assert order == [0, 1, 2, 3, 4]
+    assert 0.35 <= elapsed < 1.0
+
+
+@pytest.mark.asyncio
+async def test_429_raises_typed_error_and_pauses_limiter():
+    async with FakeDeepSeekServer(statuses=[429], retry_after="0.2") as server:
+        limiter = LLMRateLimiter(max_concurrency=4, requests_per_minute=0)
+        client = DeepSeekClient(api_key="test", base_url=server.base_url, limiter=limiter)
+        try:
+            with pytest.raises(DeepSeekAPIError) as exc_info:
+                await client.generate_completion(prompt="hi")
+
+            started = time.monotonic()
+            result = await client.generate_completion(prompt="hi")
+            waited = time.monotonic() - started
+        finally:
+            await client.close()
+
+    assert exc_info.value.status == 429
+    assert exc_info.value.retry_after == pytest.approx(0.2)
+    assert limiter.throttled == 1
+    assert result["content"] == "ok"
+    assert waited >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_database_store_shares_budget_between_limiters(session_factory):
+    store = DatabaseBucketStore(session_factory)
+    # Два "процесса" с общим бюджетом 60 RPM (1 запрос в секунду)
+    first = LLMRateLimiter(max_concurrency=0, requests_per_minute=60, store=store)
+    second = LLMRateLimiter(max_concurrency=0, requests_per_minute=60, store=store)
+
+    name, rate, capacity = first._bucket("requests", 60)
+    assert await store.reserve(name, 1, rate, capacity) == 0
+    delay = await second.store.reserve(name, 1, rate, capacity)
+
+    assert delay == pytest.approx(1.0, abs=0.1)
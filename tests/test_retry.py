@@ -0,0 +1,88 @@
+import random
+import time
+
+import pytest
+
+from app.ai.client import DeepSeekAPIError, DeepSeekClient
+from app.ai.errors import DeadlineExceeded
+from app.ai.retry import RetryPolicy, deadline_scope
+from tests.fake_deepseek import FakeDeepSeekServer
+
+
+def _client(server: FakeDeepSeekServer, **policy) -> DeepSeekClient:
+    policy.setdefault("base_delay", 0.001)
+    return DeepSeekClient(
+        api_key="test",
+        base_url=server.base_url,
+        retry=RetryPolicy(rng=random.Random(1), **policy),
+    )
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried_to_full_goodput():
+    async with FakeDeepSeekServer(error_rate=0.2, seed=7) as server:
+        client = _client(server, max_attempts=6)
+        try:
+            results = [await client.generate_completion(prompt=f"p{i}") for i in range(40)]
+        finally:
+            await client.close()
+
+    assert all(r["content"] == "ok" for r in results)
+    assert server.errors > 0
+    assert len(server.requests) == 40 + server.errors
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    async with FakeDeepSeekServer(statuses=[400]) as server:
+        client = _client(server)
+        try:
+            with pytest.raises(DeepSeekAPIError) as exc_info:
+                await client.generate_completion(prompt="hi")
+        finally:
+            await client.close()
+
+    assert exc_info.value.status == 400
+    assert len(server.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honored_within_deadline():
+    async with FakeDeepSeekServer(statuses=[503], retry_after="0.2") as server:
+        client = _client(server)
+        try:
+            started = time.monotonic()
+            result = await client.generate_completion(prompt="hi")
+            waited = time.monotonic() - started
+
+            # Пауза не укладывается в бюджет — ошибка сразу, без ожидания
+            server.statuses = [503]
+            started = time.monotonic()
+            with deadline_scope(0.1):
+                with pytest.raises(DeepSeekAPIError):
+                    await client.generate_completion(prompt="again")
+            assert time.monotonic() - started < 0.15
+
+            with deadline_scope(0.01):
+                time.sleep(0.02)
+                with pytest.raises(DeadlineExceeded):
+                    await client.generate_completion(prompt="late")
+        finally:
+            await client.close()
+
+    assert result["content"] == "ok"
+    assert waited >= 0.2
+
+
+@pytest.mark.asyncio
+async def test_stream_is_retried_before_first_delta():
+    async with FakeDeepSeekServer(content="<main>x</main>", statuses=[502]) as server:
+        client = _client(server)
+        try:
+            stream = client.stream_completion(prompt="hi")
+            deltas = [delta async for delta in stream]
+        finally:
+            await client.close()
+
+    assert "".join(deltas) == "<main>x</main>"
+    assert len(server.requests) == 2
@@ -0,0 +1,135 @@
+import uuid
+from collections import Counter
+
+import pytest
+
+from app.ai.agents.frontend_agent import FrontendAgent
+from app.ai.client import DeepSeekClient
+from app.core.events import MemoryEventBus
+from app.models import Project, User
+from app.models.artifact import ArtifactKind
+from app.models.job import JobPriority, JobType, fair_finish_tag
+from app.models.project import ProjectStatus
+from app.repositories.artifact_repo import ArtifactRepository
+from app.repositories.job_repo import JobRepository
+from app.services.generation_service import GenerationService
+from tests.fake_deepseek import FakeDeepSeekServer
+from tests.test_frontend_agent import STRUCTURE
+from tests.test_sections import CSS, HTML, _section_content
+
+repo = JobRepository()
+
+
+async def _user(session, weight: float = 1.0) -> int:
+    user = User(email=f"{uuid.uuid4().hex[:10]}@example.com", hashed_password="-")
+    user.queue_weight = weight
+    session.add(user)
+    await session.flush()
+    return user.id
+
+
+async def _enqueue(session, user_id: int, job_type=JobType.FRONTEND_GENERATION):
+    project = Project(name="p", prompt="портфолио", user_id=user_id)
+    session.add(project)
+    await session.flush()
+    job = await repo.enqueue(session, project.id, job_type, user_id=user_id)
+    await session.commit()
+    return job.id
+
+
+async def _claim(session):
+    return await repo.claim_next(session, "w", lease_seconds=60, max_attempts=3)
+
+
+def test_fair_finish_tag_starts_at_virtual_time():
+    assert fair_finish_tag(100, 20, 10) == 110
+    assert fair_finish_tag(100, 130, 10) == 140
+    assert fair_finish_tag(100, 0, 10, weight=2) == 105
+
+
+@pytest.mark.asyncio
+async def test_single_job_is_not_stuck_behind_a_backlog(session_factory):
+    async with session_factory() as session:
+        heavy, light = await _user(session), await _user(session)
+        for _ in range(50):
+            await _enqueue(session, heavy)
+        # Первое задание "тяжёлого" пользователя уже выполняется
+        assert (await _claim(session)).user_id == heavy
+
+        single = await _enqueue(session, light)
+        claimed = [(await _claim(session)).id for _ in range(2)]
+
+    # Чужое задание — второе после текущего, а не 51-е
+    assert single in claimed
+
+
+@pytest.mark.asyncio
+async def test_section_edit_does_not_advance_the_queue(session_factory):
+    """Правка секции идёт мимо очереди и не сдвигает виртуальное время"""
+    async with session_factory() as session:
+        heavy, light = await _user(session), await _user(session)
+        for _ in range(50):
+            await _enqueue(session, heavy)
+        assert (await _claim(session)).user_id == heavy
+
+        project = Project(
+            name="p", prompt="портфолио", user_id=heavy, status=ProjectStatus.READY
+        )
+        session.add(project)
+        await session.flush()
+        await ArtifactRepository().save(
+            session,
+            project.id,
+            {
+                ArtifactKind.STRUCTURE: STRUCTURE,
+                ArtifactKind.HTML: HTML,
+                ArtifactKind.CSS: CSS,
+            },
+        )
+        await session.commit()
+
+    async with FakeDeepSeekServer(content=_section_content) as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        service = GenerationService(
+            frontend_agent=FrontendAgent(client=client), events=MemoryEventBus()
+        )
+        try:
+            async with session_factory() as session:
+                await service.regenerate_sections(session, project.id, ["about"])
+        finally:
+            await client.close()
+
+    async with session_factory() as session:
+        single = await _enqueue(session, light)
+        claimed = [(await _claim(session)).id for _ in range(2)]
+
+    assert single in claimed
+
+
+@pytest.mark.asyncio
+async def test_section_edit_overtakes_full_generations(session_factory):
+    async with session_factory() as session:
+        user = await _user(session)
+        for _ in range(5):
+            await _enqueue(session, user)
+        section = await _enqueue(session, user, JobType.SECTION_REGENERATION)
+
+        job = await _claim(session)
+
+    assert job.id == section
+    assert job.priority == JobPriority.INTERACTIVE
+
+
+@pytest.mark.asyncio
+async def test_weights_split_the_queue(session_factory):
+    async with session_factory() as session:
+        paid, free = await _user(session, weight=3), await _user(session)
+        for _ in range(20):
+            await _enqueue(session, paid)
+            await _enqueue(session, free)
+
+        shares = Counter([(await _claim(session)).user_id for _ in range(20)])
+
+    # Доля 3:1 с точностью до одного задания (равные метки — по created_at)
+    assert abs(shares[paid] - 15) <= 1
+    assert shares[paid] + shares[free] == 20
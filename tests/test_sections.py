@@ -0,0 +1,136 @@
+import pytest
+from sqlalchemy import select
+
+from app.ai.agents.frontend_agent import FrontendAgent
+from app.ai.client import DeepSeekClient
+from app.ai.sections import (
+    find_section,
+    splice_section_css,
+    splice_section_html,
+    strip_code_fences,
+)
+from app.models.artifact import ArtifactKind
+from app.models.job import Job, JobStatus, JobType
+from app.models.project import Project, ProjectStatus
+from app.repositories.artifact_repo import ArtifactRepository
+from app.services.generation_service import GenerationService
+from tests.fake_deepseek import FakeDeepSeekServer
+from tests.test_frontend_agent import STRUCTURE
+from tests.test_projects import _register
+
+HTML = """<html><body><main>
+<section id="hero" class="section-hero"><h1>Привет</h1></section>
+<section id="about" class="section-about">
+  <section class="inner"><p>вложенная</p></section>
+  <p>Обо мне</p>
+</section>
+</main></body></html>"""
+
+CSS = """body { margin: 0; }
+/* section:hero */
+.section-hero { color: red; }
+/* /section:hero */
+"""
+
+
+def test_splice_replaces_section_including_nested_sections():
+    start, end = find_section(HTML, "about")
+    assert HTML[start:end].endswith("<p>Обо мне</p>\n</section>")
+
+    html = splice_section_html(
+        HTML, "about", '<section id="about" class="section-about">new</section>'
+    )
+    assert "Обо мне" not in html and "вложенная" not in html
+    assert '<section id="about" class="section-about">new</section>' in html
+    assert "<h1>Привет</h1>" in html and html.endswith("</main></body></html>")
+
+    html = splice_section_html(HTML, "contact", "<section id='contact'></section>")
+    assert html.index("<section id='contact'>") < html.index("</main>")
+
+
+def test_splice_css_blocks_by_markers():
+    css = splice_section_css(CSS, "hero", ".section-hero { color: blue; }")
+    assert "color: red" not in css and "color: blue" in css
+    assert css.startswith("body { margin: 0; }")
+
+    css = splice_section_css(css, "about", ".section-about { padding: 0; }")
+    assert css.rstrip().endswith("/* /section:about */")
+    assert strip_code_fences("```css\n.a {}\n```") == ".a {}"
+
+
+def _section_content(payload: dict) -> str:
+    prompt = payload["messages"][-1]["content"]
+    if prompt.startswith("Создай CSS"):
+        return "```css\n.section-about { padding: 4rem; }\n```"
+    return '<section id="about" class="section-about"><p>Новый текст</p></section>'
+
+
+@pytest.mark.asyncio
+async def test_regenerate_only_selected_sections(session_factory):
+    async with session_factory() as session:
+        project = Project(name="p", prompt="портфолио", status=ProjectStatus.READY)
+        session.add(project)
+        await session.flush()
+        await ArtifactRepository().save(
+            session,
+            project.id,
+            {
+                ArtifactKind.STRUCTURE: STRUCTURE,
+                ArtifactKind.HTML: HTML,
+                ArtifactKind.CSS: CSS,
+            },
+        )
+        await session.commit()
+        project_id = project.id
+
+    async with FakeDeepSeekServer(content=_section_content) as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        service = GenerationService(frontend_agent=FrontendAgent(client=client))
+        try:
+            async with session_factory() as session:
+                result = await service.regenerate_sections(
+                    session, project_id, ["about"], "короче"
+                )
+        finally:
+            await client.close()
+
+    # Один HTML-фрагмент и одни CSS-правила, без структуры и всей страницы
+    assert len(server.requests) == 2
+    assert result["sections"] == ["about"]
+    assert result["tokens_used"] > 0
+
+    artifacts = ArtifactRepository()
+    async with session_factory() as session:
+        latest = await artifacts.latest(session, project_id)
+        job = await session.scalar(select(Job).where(Job.project_id == project_id))
+
+    html, css = latest[ArtifactKind.HTML], latest[ArtifactKind.CSS]
+    html_code, css_code = await artifacts.read(html), await artifacts.read(css)
+    assert "Новый текст" in html_code
+    assert "Обо мне" not in html_code
+    assert "<h1>Привет</h1>" in html_code
+    assert ".section-hero { color: red; }" in css_code
+    assert "/* section:about */\n.section-about { padding: 4rem; }" in css_code
+    # Изменились только HTML и CSS, прежние версии сохранены
+    assert html.version == css.version == 2
+    assert latest[ArtifactKind.STRUCTURE].version == 1
+    assert job.job_type == JobType.SECTION_REGENERATION
+    assert job.status == JobStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_regenerate_sections_requires_owner(api):
+    _, owner = await _register(api)
+    _, other = await _register(api)
+    r = await api.post(
+        "/generate/start",
+        json={"prompt": "Сайт-портфолио", "project_name": "p"},
+        headers=owner,
+    )
+    url = f"/generate/sections/{r.json()['project_id']}"
+    body = {"sections": ["about"]}
+
+    assert (await api.post(url, json=body)).status_code == 401
+    assert (await api.post(url, json=body, headers=other)).status_code == 404
+    # Владелец доходит до проверки статуса: сайт ещё генерируется
+    assert (await api.post(url, json=body, headers=owner)).status_code == 409
@@ -0,0 +1,82 @@
+import asyncio
+import hashlib
+import time
+
+import pytest
+from jose import JWTError
+
+from app.core import security
+from app.core.security import (
+    HashingBusyError,
+    PasswordHasher,
+    create_access_token,
+    decode_access_token,
+)
+
+
+@pytest.mark.asyncio
+async def test_hashing_runs_off_the_event_loop():
+    hasher = PasswordHasher(kind="thread", workers=1, max_pending=4)
+    max_lag = 0.0
+    done = asyncio.Event()
+
+    async def measure_loop_lag():
+        nonlocal max_lag
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            max_lag = max(max_lag, time.perf_counter() - started - 0.005)
+
+    ticker = asyncio.create_task(measure_loop_lag())
+    try:
+        hashed = await hasher.hash("strongpass123")
+        assert await hasher.verify("strongpass123", hashed)
+        assert not await hasher.verify("WRONG_PASS", hashed)
+    finally:
+        done.set()
+        await ticker
+        hasher.shutdown()
+
+    # bcrypt занимает сотни миллисекунд, но цикл событий не стоит
+    assert max_lag < 0.05
+
+
+@pytest.mark.asyncio
+async def test_saturated_hasher_rejects_with_busy_error():
+    hasher = PasswordHasher(kind="thread", workers=1, max_pending=1, queue_timeout=0.01)
+    try:
+        first = asyncio.create_task(hasher.hash("strongpass123"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(HashingBusyError):
+            await hasher.hash("strongpass123")
+
+        assert await first
+    finally:
+        hasher.shutdown()
+
+
+def test_verified_token_is_served_from_cache():
+    token = create_access_token("cached@example.com")
+    hits = security._verified_tokens.hits
+
+    first = decode_access_token(token)
+    second = decode_access_token(token)
+
+    assert first["sub"] == second["sub"] == "cached@example.com"
+    assert security._verified_tokens.hits == hits + 1
+
+
+def test_tampered_and_expired_tokens_are_rejected():
+    token = create_access_token("cached@example.com")
+    decode_access_token(token)
+
+    with pytest.raises(JWTError):
+        decode_access_token(token[:-2] + ("AA" if token[-2:] != "AA" else "BB"))
+
+    expired = create_access_token("old@example.com", expires_minutes=-1)
+    with pytest.raises(JWTError):
+        decode_access_token(expired)
+    assert security._verified_tokens.get(
+        hashlib.sha256(expired.encode()).digest()
+    ) is None
@@ -0,0 +1,99 @@
+import pytest
+
+from app.ai.agents.frontend_agent import FrontendAgent
+from app.ai.client import DeepSeekClient
+from app.ai.structure_index import MinHasher, StructureIndex, jaccard, shingles
+from tests.fake_deepseek import FakeDeepSeekServer
+from tests.test_frontend_agent import STRUCTURE, fake_content
+
+
+def test_minhash_estimates_jaccard():
+    a = shingles("Создай сайт-портфолио фотографа с галереей, отзывами и контактами")
+    b = shingles("Создай сайт-портфолио фотографа с галереей работ и контактами")
+    hasher = MinHasher(num_perm=256)
+    sig_a, sig_b = hasher.signature(a), hasher.signature(b)
+
+    estimate = sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+    assert abs(estimate - jaccard(a, b)) < 0.1
+
+
+def test_lookup_thresholds_and_stats():
+    index = StructureIndex(max_size=10, reuse_threshold=0.8, seed_threshold=0.3)
+    index.add("Сайт-портфолио разработчика: обо мне, проекты, контакты", STRUCTURE)
+
+    # Формы слов и регистр не мешают совпадению
+    exact = index.lookup("сайт-портфолио разработчика — обо мне, проектами, контакты")
+    assert exact is not None and exact.similarity >= 0.8
+    assert exact.structure == STRUCTURE
+
+    similar = index.lookup("Сайт-портфолио дизайнера: обо мне, проекты, отзывы")
+    assert similar is not None and 0.3 <= similar.similarity < 0.8
+
+    assert index.lookup("Интернет-магазин кроссовок с корзиной") is None
+    assert index.stats() == {
+        "size": 1,
+        "reused": 1,
+        "seeded": 1,
+        "misses": 1,
+        "reuse_rate": 1 / 3,
+        "evictions": 0,
+    }
+
+
+def test_eviction_keeps_recently_used():
+    index = StructureIndex(max_size=2, reuse_threshold=0.8, seed_threshold=0.8)
+    index.add("лендинг кофейни в центре города", {"n": 1})
+    index.add("портфолио фотографа свадеб", {"n": 2})
+    assert index.lookup("лендинг кофейни в центре города") is not None
+
+    index.add("блог о путешествиях по азии", {"n": 3})
+
+    assert len(index) == 2
+    assert index.evictions == 1
+    assert index.lookup("портфолио фотографа свадеб") is None
+    assert index.lookup("лендинг кофейни в центре города").structure == {"n": 1}
+
+
+@pytest.mark.asyncio
+async def test_frontend_agent_reuses_or_seeds_structure():
+    index = StructureIndex(max_size=10, reuse_threshold=0.8, seed_threshold=0.3)
+    async with FakeDeepSeekServer(content=fake_content) as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        agent = FrontendAgent(client=client, index=index)
+        try:
+            prompt = "Сайт-портфолио разработчика: обо мне, проекты, контакты"
+            await agent._generate_structure(prompt)
+            assert len(server.requests) == 1
+
+            # Почти тот же запрос — без обращения к модели
+            reused = await agent._generate_structure(prompt + "!")
+            assert reused.name == STRUCTURE["name"]
+            assert len(server.requests) == 1
+
+            # Похожий — структура уходит в промпт как пример
+            await agent._generate_structure(
+                "Сайт-портфолио дизайнера: обо мне, проекты, отзывы"
+            )
+        finally:
+            await client.close()
+
+    assert len(server.requests) == 2
+    seeded_prompt = server.requests[-1]["messages"][-1]["content"]
+    assert "Пример структуры для похожего запроса" in seeded_prompt
+    assert '"title": "Привет"' in seeded_prompt
+
+
+def test_structures_are_not_shared_between_users():
+    index = StructureIndex(max_size=10, reuse_threshold=0.8, seed_threshold=0.3)
+    prompt = "Сайт-портфолио разработчика: обо мне, проекты, контакты"
+    index.add(prompt, STRUCTURE, owner=1)
+
+    # Ни готовой структурой, ни примером: в ней тексты первого пользователя
+    assert index.lookup(prompt, owner=2) is None
+    assert index.lookup("Сайт-портфолио дизайнера: обо мне, проекты", owner=2) is None
+    assert index.lookup(prompt, owner=1).structure == STRUCTURE
+
+    index.add(prompt, {"n": 2}, owner=2)
+    assert len(index) == 2
+    assert index.lookup(prompt, owner=1).structure == STRUCTURE
+    assert index.lookup(prompt, owner=2).structure == {"n": 2}
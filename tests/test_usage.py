@@ -0,0 +1,147 @@
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from app.ai.agents.frontend_agent import FrontendAgent
+from app.ai.client import DeepSeekClient
+from app.models import Job, LLMUsage, Project, UserUsageDaily
+from app.services.generation_service import GenerationService
+from tests.fake_deepseek import FakeDeepSeekServer
+from tests.test_frontend_agent import fake_content
+from tests.test_projects import _register
+
+
+@pytest.mark.asyncio
+async def test_generation_tokens_are_recorded_per_stage_and_rolled_up(
+    api, session_factory
+):
+    user_id, headers = await _register(api)
+    r = await api.post(
+        "/generate/start",
+        json={"prompt": "портфолио", "project_name": "p"},
+        headers=headers,
+    )
+    project_id = uuid.UUID(r.json()["project_id"])
+
+    async with FakeDeepSeekServer(content=fake_content) as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        service = GenerationService(frontend_agent=FrontendAgent(client=client))
+        try:
+            async with session_factory() as session:
+                await service.generate_frontend(session, project_id)
+        finally:
+            await client.close()
+
+    async with session_factory() as session:
+        rows = (await session.execute(select(LLMUsage))).scalars().all()
+        job = await session.scalar(select(Job).where(Job.project_id == project_id))
+        project = await session.get(Project, project_id)
+        daily = (await session.execute(select(UserUsageDaily))).scalars().all()
+
+    # Строка на каждую стадию, где был вызов LLM
+    assert {"structure", "html", "css", "javascript"} <= {r.stage for r in rows}
+    assert sum(r.calls for r in rows) == len(server.requests)
+    assert all(r.user_id == user_id and r.job_id == job.id for r in rows)
+    total = sum(r.prompt_tokens + r.completion_tokens for r in rows)
+    assert job.tokens_used == total > 0
+    assert project.tokens_used["html"]["prompt"] > 0
+    assert sum(
+        s["prompt"] + s["completion"] for s in project.tokens_used.values()
+    ) == total
+
+    assert len(daily) == 1
+    assert daily[0].jobs == 1
+    assert daily[0].prompt_tokens + daily[0].completion_tokens == total
+
+    r = await api.get("/users/me/usage?days=7", headers=headers)
+    assert r.status_code == 200
+    report = r.json()
+    assert report["totals"]["calls"] == len(server.requests)
+    assert report["totals"]["cost"] > 0
+    assert [d["jobs"] for d in report["days"]] == [1]
+    assert report["top_projects"][0]["project_id"] == str(project_id)
+    assert {s["stage"] for s in report["stages"]} == {r.stage for r in rows}
+
+    r = await api.get("/users/me/usage")
+    assert r.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_tokens_of_failed_generation_are_still_recorded(session_factory):
+    def content(payload: dict) -> str:
+        if payload["messages"][-1]["content"].startswith("Создай CSS"):
+            raise RuntimeError("provider down")
+        return fake_content(payload)
+
+    async with FakeDeepSeekServer(content=content) as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        service = GenerationService(frontend_agent=FrontendAgent(client=client))
+        try:
+            async with session_factory() as session:
+                started = await service.start_generation(session, "портфолио", "p")
+                project_id = uuid.UUID(started["project_id"])
+                with pytest.raises(Exception, match="API error: 500"):
+                    await service.generate_frontend(session, project_id)
+        finally:
+            await client.close()
+
+    async with session_factory() as session:
+        stages = set(await session.scalars(select(LLMUsage.stage)))
+        recorded = await session.scalar(
+            select(func.sum(LLMUsage.prompt_tokens + LLMUsage.completion_tokens))
+        )
+        job = await session.scalar(select(Job).where(Job.project_id == project_id))
+
+    assert "structure" in stages and "css" not in stages
+    assert job.tokens_used == recorded > 0
+    # Анонимный проект — без дневной свёртки
+    async with session_factory() as session:
+        assert await session.scalar(select(func.count(UserUsageDaily.user_id))) == 0
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_committed_with_checkpoints_and_job_counted_once(
+    api, session_factory
+):
+    user_id, _ = await _register(api)
+
+    async def usage_rows():
+        async with session_factory() as other:
+            return (await other.execute(select(LLMUsage))).scalars().all()
+
+    async with FakeDeepSeekServer(content=fake_content, chunk_delay=0.01) as server:
+        client = DeepSeekClient(api_key="test", base_url=server.base_url)
+        service = GenerationService(frontend_agent=FrontendAgent(client=client))
+        try:
+            async with session_factory() as session:
+                started = await service.start_generation(
+                    session, "портфолио", "p", user_id=user_id
+                )
+                project_id = uuid.UUID(started["project_id"])
+
+                events = service.stream_frontend(session, project_id)
+                async for event in events:
+                    if event["event"] == "stage" and event["stage"] == "structure":
+                        break
+                # Токены готовой стадии закоммичены с её чекпоинтом, до конца задания
+                assert {r.stage for r in await usage_rows()} == {"structure"}
+
+                # Клиент отключился, задание доделывает другой исполнитель
+                await events.aclose()
+            async with session_factory() as session:
+                await service.generate_frontend(session, project_id)
+        finally:
+            await client.close()
+
+    rows = await usage_rows()
+    async with session_factory() as session:
+        job = await session.scalar(select(Job).where(Job.project_id == project_id))
+        daily = (await session.execute(select(UserUsageDaily))).scalars().all()
+
+    total = sum(r.prompt_tokens + r.completion_tokens for r in rows)
+    assert {"structure", "html", "css", "javascript"} <= {r.stage for r in rows}
+    assert job.tokens_used == total > 0
+    assert len(daily) == 1
+    assert daily[0].jobs == 1
+    assert daily[0].prompt_tokens + daily[0].completion_tokens == total
@@ -0,0 +1,95 @@
+import uuid
+
+import pytest
+from sqlalchemy import inspect, select, update
+
+from app.models import User
+from app.services.user_cache import user_cache
+
+
+async def _register(client) -> tuple[str, str]:
+    email = f"u{uuid.uuid4().hex[:10]}@example.com"
+    r = await client.post(
+        "/auth/register",
+        json={"email": email, "password": "strongpass123"},
+    )
+    return email, r.json()["access_token"]
+
+
+@pytest.mark.asyncio
+async def test_me_is_served_from_cache_when_warm(client):
+    email, token = await _register(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    hits, misses = user_cache.hits, user_cache.misses
+    r1 = await client.get("/users/me", headers=headers)
+    r2 = await client.get("/users/me", headers=headers)
+
+    assert r1.status_code == r2.status_code == 200
+    assert r1.json() == r2.json()
+    assert r2.json()["email"] == email
+    assert user_cache.misses == misses + 1
+    assert user_cache.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_deactivated_user_is_invalidated(client, db_session):
+    email, token = await _register(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert (await client.get("/users/me", headers=headers)).status_code == 200
+
+    user = await db_session.scalar(select(User).where(User.email == email))
+    user.is_active = False
+    await db_session.flush()
+    # До коммита изменение не видно другим сессиям — кэш ещё верен
+    assert user_cache.local.get(email) is not None
+    await db_session.commit()
+    assert user_cache.local.get(email) is None
+
+    r = await client.get("/users/me", headers=headers)
+    assert r.status_code == 401
+    assert r.json()["detail"] == "Inactive user"
+
+
+@pytest.mark.asyncio
+async def test_bulk_deactivation_is_seen_by_other_sessions(api, session_factory):
+    email, token = await _register(api)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert (await api.get("/users/me", headers=headers)).status_code == 200
+    assert (await api.get("/users/me", headers=headers)).status_code == 200
+
+    async with session_factory() as session:
+        await session.execute(
+            update(User).where(User.email == email).values(is_active=False)
+        )
+        await session.commit()
+
+    r = await api.get("/users/me", headers=headers)
+    assert r.status_code == 401
+    assert r.json()["detail"] == "Inactive user"
+
+
+@pytest.mark.asyncio
+async def test_shared_tier_refills_local_cache(client, db_session):
+    from app.core.cache import InMemorySharedCache
+    from app.services.user_cache import UserCache
+
+    email, _ = await _register(client)
+    user = await db_session.scalar(select(User).where(User.email == email))
+
+    shared = InMemorySharedCache()
+    cache = UserCache(ttl=60, max_size=10, shared=shared)
+    await cache.set(user)
+    assert "hashed_password" not in cache.local.get(email)
+    assert "hashed_password" not in await shared.get(cache._key(email))
+    cache.clear()  # другой процесс: локальный уровень пуст
+    db_session.expunge(user)
+
+    cached = await cache.get(db_session, email)
+    assert cached is not user
+    assert cached.id == user.id and cached.email == email
+    assert cached.created_at == user.created_at
+    assert "hashed_password" in inspect(cached).unloaded
+    assert len(cache.local) == 1 and cache.hits == 1